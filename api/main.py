@@ -1,21 +1,78 @@
+# Temps d'importació de cada mòdul per al perfil d'arrencada, a cada arrencada
+from api.utils.profiling import import_profiler
+import_profiler.install()
+
+import asyncio
 import csv
+import hashlib
 import os
 import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 import datetime
-import tensorflow as tf
+import numpy as np
 import pandas as pd
 from logging.handlers import RotatingFileHandler
-from api.rce_predictors.config.window_predictor import WindowPredictor
+from api.rce_predictors.registry import DEMAND_MODEL, config_key, registry
 from api.rce_predictors.rain_predictor import WeatherPredictor
-from api.rce_predictors.temperature_predictor import TemperaturePredictor
-from api.utils.schemas import EntryList
+from api.rce_predictors.future.cache import forecast_cache
+from api.rce_predictors.future.prefetcher import forecast_prefetcher
+from api.rce_predictors.temperature_predictor import HORIZON, TemperaturePredictor
+from api.utils.schemas import FEATURES, OutputFormat, ScenarioList, window_values
+from api.utils.payload import OPENAPI_REQUEST_BODY, read_window
 from api.utils.out import output, structure
+from api.utils.out.encoding import json_response
 from api.utils import loaders
+from api.utils.stages import StageGraph
+from api.utils.result_cache import entries_fingerprint, result_cache, result_key, time_slot
+from api.utils.metrics import CONTENT_TYPE, metrics
 from api.rce_predictors.production_predictor import ProductionPredictor
 from api.rce_predictors.demand_predictor import DemandPredictor
 from api.rce_predictors.config.rce.specs import RceSpecs
-app = FastAPI()
+from api.rce_predictors.registry import process_rss
+from api.rce_predictors.warmup import READY_TIMEOUT, readiness, warm_up
+
+# Fi de les importacions: builtins.__import__ torna a ser l'original
+import_profiler.uninstall()
+
+
+def startup() -> dict:
+    """Loads and warms up every model, returns the startup profile"""
+    start = time.perf_counter()
+    run_config = loaders.config_watcher.current()
+    registry.load(run_config)
+    warm = warm_up(registry, run_config)
+    profile = {
+        "artifacts": registry.stats(),
+        "warm-up": {name: round(seconds, 4) for name, seconds in warm.items()},
+        "startup_seconds": round(time.perf_counter() - start, 3),
+        "rss_mb": round(process_rss() / 2**20, 1),
+    }
+    # Sempre el resum de les més lentes; la llista sencera amb PROFILE_IMPORTS=1
+    profile["imports"] = import_profiler.summary()
+    logger.info(f"Perfil d'arrencada: {profile}")
+    return profile
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # La configuració es llegeix un cop i es recarrega en segon pla si canvia;
+    # un model nou es carrega abans de publicar-la
+    loaders.config_watcher.set_prepare(registry.prepare)
+    loaders.config_watcher.start()
+    # Models carregats i escalfats en segon pla; /health diu "ready" quan acaben
+    readiness.run(startup)
+    # Les previsions es refresquen en segon pla; /predict només llegeix la instantània
+    forecast_prefetcher.start()
+    yield
+    forecast_prefetcher.stop(timeout=5)
+    loaders.config_watcher.stop(timeout=5)
+
+
+app = FastAPI(lifespan=lifespan)
 
 log_dir = os.path.join(os.getcwd(), "logs")
 os.makedirs(log_dir, exist_ok=True)
@@ -58,22 +115,119 @@ log_config = {
 logger = logging.getLogger(__name__)
 logger.info("Logger inicializado")
 
+# Latència de /predict: total i per etapa (lectura de l'entrada, pluja, temperatura, demanda, producció i construcció de la resposta)
+PREDICT_SECONDS = metrics.histogram("rce_predict_seconds", "Duration of /predict requests")
+STAGE_SECONDS = metrics.histogram(
+    "rce_predict_stage_seconds", "Duration of each /predict stage", ("stage",)
+)
+
+
+def model_info() -> dict:
+    """Artefact and backend served for each model, labelled with a short
+    hash of its configuration section"""
+    run_config = loaders.config_watcher.current()
+    info = {}
+    for model, model_name in (
+        ("temperature", run_config["temperature"]["model-name"]),
+        ("demand", DEMAND_MODEL),
+    ):
+        section = run_config[model]
+        version = hashlib.sha1(config_key(section).encode()).hexdigest()[:12]
+        info[(model, registry.model_file(model_name, section), section.get("backend", "keras"), version)] = 1
+    return info
+
+
+metrics.callback(
+    "rce_model_info", "Model served by the API", model_info,
+    labelnames=("model", "file", "backend", "version"),
+)
+metrics.callback("process_resident_memory_bytes", "Resident set size of the process", process_rss)
+metrics.callback(
+    "rce_result_cache_lookups_total",
+    "Lookups of the /predict result cache by outcome",
+    lambda: {(k,): v for k, v in result_cache.stats().items() if k in ("hits", "misses", "coalesced")},
+    type="counter",
+    labelnames=("outcome",),
+)
+metrics.callback(
+    "rce_forecast_cache_lookups_total",
+    "Lookups of the forecast cache by source and outcome",
+    lambda: {
+        (source, outcome): value
+        for source, counters in forecast_cache.stats().items()
+        for outcome, value in counters.items()
+    },
+    type="counter",
+    labelnames=("source", "outcome"),
+)
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    forecasts_ready = forecast_prefetcher.current() is not None
+    content = {
+        "status": readiness.status,
+        "forecasts": "ready" if forecasts_ready else "waiting",
+        "forecast-age": forecast_prefetcher.ages(),
+    }
+    if readiness.error:
+        content["error"] = readiness.error
+    ready = readiness.ready and forecasts_ready
+    return JSONResponse(content, status_code=200 if ready else 503)
+
+@app.get("/models")
+def models():
+    return registry.stats()
+
+@app.get("/startup")
+def startup_profile():
+    return readiness.profile
+
+@app.get("/forecast/cache")
+def forecast_cache_stats():
+    return forecast_cache.stats()
+
+@app.get("/predict/cache")
+def result_cache_stats():
+    return result_cache.stats()
+
+@app.get("/metrics")
+def metrics_text():
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
 
 # Endpoint de predicció
-@app.post("/predict")
-def predict(data: EntryList):
+@app.post("/predict", openapi_extra=OPENAPI_REQUEST_BODY)
+async def predict(request: Request, format: OutputFormat = "legacy"):
     logger.info("Nova crida a la API")
+    # Totes les sortides compten a la latència: també 422, 503 i excepcions
+    with PREDICT_SECONDS.time():
+        return await _predict(request, format)
+
+
+async def _predict(request: Request, format: OutputFormat):
+    # EntryList en JSON o la finestra en columnes (JSON o float32), com a EntryArray
+    with STAGE_SECONDS.time(stage="parse"):
+        data = await read_window(request)
     out = output.OutputBuilder()
-    run_config = loaders.load_json()
+    if not readiness.ready and not await asyncio.to_thread(readiness.wait, READY_TIMEOUT):
+        return JSONResponse(
+            out.add_exception(f"Prediction service not ready ({readiness.status})").build(),
+            status_code=503,
+        )
+    # Les previsions només surten de la instantània del prefetcher: fins a la
+    # primera completa el servei no està a punt
+    forecasts = forecast_prefetcher.current()
+    if forecasts is None:
+        return JSONResponse(
+            out.add_exception("Prediction service not ready (forecasts)").build(),
+            status_code=503,
+        )
+    run_config = loaders.config_watcher.current()
 
-    if len(data.data) != run_config["temperature"]["input"]:
+    if len(data) != run_config["temperature"]["input"]:
         logger.warning("Datos de entrada con longitud inesperada")
         return out.add_exception(
             output.unexpected_data_length(
-                actual=len(data.data),
+                actual=len(data),
                 expected=run_config["temperature"]["input"],
                 fetched=True,
             )
@@ -87,89 +241,215 @@ def predict(data: EntryList):
     # Variable que guarda els temps futurs de 15 min a 15 min
     _large_future = structure.future_times(
         datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-        192
+        HORIZON
     )
 
-    # Part de predicció de temps atmosfèric
-    _rain_predictor = rain_predictor()
-    r_pred = _rain_predictor.predict()
-
-    # Part de predicció de temperatura dels tancs
     logger.info(f"VITOR: entrada predictor: {data}")
-    _temp_predictor = temp_predictor(run_config["temperature"])
-    t_pred = _temp_predictor.predict(data, do_plot=False)
+    _compare_row = compare_row(data, run_config["temperature"]["labels"])
 
-    # Part de predicció de demanda
-    _dema_predictor = dema_predictor(run_config["demand"])
-    d_pred = _dema_predictor.predict()
-
-    # Part de predicció de producció
-    _prod_predictor = prod_predictor(run_config["rce-specs"])
+    async def run_stages() -> dict:
+        # Pluja, demanda i temperatura són independents i s'executen alhora;
+        # la producció espera la temperatura
+        stages = (
+            StageGraph()
+            .add("rain", lambda: rain_predictor().predict(forecasts.rain))
+            .add(
+                "temperature",
+                lambda: temp_predictor(run_config["temperature"]).predict(
+                    data, do_plot=False, fut_val=forecasts.fut_val
+                ),
+            )
+            .add(
+                "demand",
+                lambda: dema_predictor(run_config["demand"]).predict(
+                    forecasts.forecast_24h
+                ),
+            )
+            .add(
+                "production",
+                lambda t_pred: prod_predictor(run_config["rce-specs"]).predict(
+                    pd.concat([_compare_row, t_pred], ignore_index=True)
+                ).round(decimals=2),
+                after=("temperature",),
+            )
+        )
+        results = await stages.run()
+        for name, seconds in stages.timings.items():
+            STAGE_SECONDS.observe(seconds, stage=name)
+        logger.info(
+            "Temps per etapa: "
+            + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stages.timings.items())
+        )
+        return results
 
-    df = pd.DataFrame([entry.dict() for entry in data.data])
-    compare_row = pd.DataFrame(
-        df[run_config["temperature"]["labels"]].iloc[-1].T.to_dict(),
-        columns=run_config["temperature"]["labels"],
-        index=[0],
+    # La mateixa finestra amb la mateixa previsió, configuració i franja de
+    # 15 minuts dona el mateix resultat: es calcula un sol cop
+    results = await result_cache.get_or_compute(
+        result_key(
+            entries_fingerprint(data),
+            forecasts.version,
+            config_key(run_config),
+            time_slot(),
+        ),
+        run_stages,
     )
-    p_pred = _prod_predictor.predict(
-        pd.concat([compare_row, t_pred], ignore_index=True)
-    ).round(decimals=2)
+
+    r_pred = results["rain"]
+    t_pred = results["temperature"]
+    d_pred = results["demand"]
+    p_pred = results["production"]
 
     # Construir el json resultant fusionant totes les prediccions
+    response_start = time.perf_counter()
     try:
-        out.add_data("rain-prediction", structure.rain(r_pred))\
-           .add_data("demand", structure.dema(d_pred, _future))\
-           .add_data("energy-production", structure.prod(
-               p_pred, _large_future, run_config["temperature"]["labels"]
-           ))\
-           .add_data("tank-temperature", structure.temp(
-               t_pred, _large_future,
-               run_config["temperature"]["column-indices"],
-               run_config["temperature"]["labels"]
-           ))
+        if forecasts.errors:
+            out.add_data("forecast-fallbacks", forecasts.errors)
+        if format == "columnar":
+            out.add_data("format", format)\
+               .add_data("timestamps", _large_future)\
+               .add_data("rain-prediction", structure.frame_columnar(r_pred))\
+               .add_data("demand", structure.frame_columnar(d_pred))\
+               .add_data("energy-production", structure.prod_columnar(
+                   p_pred, _large_future, run_config["temperature"]["labels"]
+               ))\
+               .add_data("tank-temperature", structure.temp_columnar(
+                   t_pred, _large_future,
+                   run_config["temperature"]["column-indices"],
+                   run_config["temperature"]["labels"]
+               ))
+        else:
+            out.add_data("rain-prediction", structure.rain(r_pred))\
+               .add_data("demand", structure.dema(d_pred, _future))\
+               .add_data("energy-production", structure.prod(
+                   p_pred, _large_future, run_config["temperature"]["labels"]
+               ))\
+               .add_data("tank-temperature", structure.temp(
+                   t_pred, _large_future,
+                   run_config["temperature"]["column-indices"],
+                   run_config["temperature"]["labels"]
+               ))
         logger.info("Predicción completada correctamente")
     except Exception as e:
         logger.error(f"Error al construir la salida: {e}")
         out.add_exception(f"Error when building output: {e}")
 
+    response = json_response(out.build()) if format == "columnar" else out.build()
+    STAGE_SECONDS.observe(time.perf_counter() - response_start, stage="response")
+    return response
+
+# Endpoint de predicció de diversos plans d'operació en una sola passada
+@app.post("/predict/scenarios")
+def predict_scenarios(data: ScenarioList, format: OutputFormat = "legacy"):
+    logger.info(f"Nova crida a la API amb {len(data.scenarios)} escenaris")
+    out = output.OutputBuilder()
+    if not readiness.wait(READY_TIMEOUT):
+        return JSONResponse(
+            out.add_exception(f"Prediction service not ready ({readiness.status})").build(),
+            status_code=503,
+        )
+    forecasts = forecast_prefetcher.current()
+    if forecasts is None:
+        return JSONResponse(
+            out.add_exception("Prediction service not ready (forecasts)").build(),
+            status_code=503,
+        )
+    run_config = loaders.config_watcher.current()
+
+    if len(data.data) != run_config["temperature"]["input"]:
+        logger.warning("Datos de entrada con longitud inesperada")
+        return out.add_exception(
+            output.unexpected_data_length(
+                actual=len(data.data),
+                expected=run_config["temperature"]["input"],
+                fetched=True,
+            )
+        ).build()
+
+    scenarios = [scenario.dict(exclude_none=True) for scenario in data.scenarios]
+    for scenario in scenarios:
+        for key, value in scenario.items():
+            if isinstance(value, list) and len(value) != HORIZON:
+                logger.warning("Escenario con longitud inesperada")
+                return out.add_exception(
+                    output.unexpected_data_length(
+                        actual=len(value),
+                        expected=HORIZON,
+                        fetched=False,
+                    )
+                ).build()
+
+    _large_future = structure.future_times(
+        datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        HORIZON
+    )
+
+    labels = run_config["temperature"]["labels"]
+    _temp_predictor = temp_predictor(run_config["temperature"])
+    t_preds = _temp_predictor.predict_batch(data, scenarios, fut_val=forecasts.fut_val)
+
+    # Producció de tots els escenaris en una sola operació
+    _prod_predictor = prod_predictor(run_config["rce-specs"])
+    _compare_row = compare_row(data, labels)
+    p_preds = _prod_predictor.predict_batch(
+        _compare_row[labels].iloc[0].to_numpy(),
+        np.stack([t_pred[labels].to_numpy() for t_pred in t_preds]),
+        labels=tuple(labels),
+    ).round(decimals=2)
+
+    if format == "columnar":
+        temp_builder, prod_builder = structure.temp_columnar, structure.prod_columnar
+        out.add_data("format", format).add_data("timestamps", _large_future)
+    else:
+        temp_builder, prod_builder = structure.temp, structure.prod
+
+    try:
+        out.add_data("scenarios", [
+            {
+                "tank-temperature": temp_builder(
+                    t_pred, _large_future,
+                    run_config["temperature"]["column-indices"],
+                    labels
+                ),
+                "energy-production": prod_builder(
+                    pd.DataFrame(p_pred, columns=labels),
+                    _large_future, labels
+                ),
+            }
+            for t_pred, p_pred in zip(t_preds, p_preds)
+        ])
+        logger.info("Predicción de escenarios completada correctamente")
+    except Exception as e:
+        logger.error(f"Error al construir la salida: {e}")
+        out.add_exception(f"Error when building output: {e}")
+
+    if format == "columnar":
+        return json_response(out.build())
     return out.build()
 
+# Última lectura dels tancs, punt de comparació per a la producció
+def compare_row(data, labels: list[str]) -> pd.DataFrame:
+    last = window_values(data)[-1]
+    return pd.DataFrame(
+        [[last[FEATURES.index(label)] for label in labels]],
+        columns=labels,
+        index=[0],
+    )
+
 # Crear predictor de pluja
 def rain_predictor() -> WeatherPredictor:
     return WeatherPredictor()
 
-# Crear predictor de temperatura
+# Predictor de temperatura (ja carregat al registre)
 def temp_predictor(temperature_config: dict) -> TemperaturePredictor:
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    return TemperaturePredictor(
-        window_predictor=WindowPredictor(
-            model=tf.keras.models.load_model(
-                os.path.join(base_dir, "rce_predictors", "keras", temperature_config["model-name"]),
-                compile=False
-            ),
-            input_width=int(temperature_config["input"]),
-            label_width=int(temperature_config["output"]),
-            shift=int(temperature_config["shift"]),
-            column_indices=temperature_config["column-indices"],
-            label_columns=temperature_config["labels"],
-        ),
-        postprocess_pipelines_filepath=os.path.join(
-            "rce_predictors", "config", "config-preprocess.json"
-        ),
-    )
+    return registry.temperature(temperature_config)
 
 # Crear predictor de producci
 def prod_predictor(rce_specs: dict) -> ProductionPredictor:
     return ProductionPredictor(RceSpecs(**rce_specs))
 
-# Crear predictor de demanda
+# Predictor de demanda (ja carregat al registre)
 def dema_predictor(demand_config: dict) -> DemandPredictor:
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    return DemandPredictor(
-        demand_path=os.path.join(base_dir, demand_config["filepath"]),
-        date_format="%Y-%m-%d %H:%M",
-    )
+    return registry.demand(demand_config)
 
 
 if __name__ == "__main__":
@@ -103,12 +103,6 @@ class MultiPipeline:
 def load_json():
     import json
 
-
-    print(os.path.dirname(__file__))
-
     config_path = os.path.join(os.path.dirname(__file__), r'config-full.json')
-    print(config_path)
     with open(config_path, 'r') as f:
-        file_content = f.read()
-
-    return json.loads(file_content)
\ No newline at end of file
+        return json.load(f)
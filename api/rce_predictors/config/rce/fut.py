@@ -1,9 +1,10 @@
 from .open import get_forecast_from_now_local
 from .nasa import get_ir
 
-def get_fut_val():
-    a = get_forecast_from_now_local()
-    b = get_ir()
+def get_fut_val(forecast=None, ir=None):
+    # forecast i ir permeten passar les previsions ja obtingudes (ForecastClient)
+    a = get_forecast_from_now_local() if forecast is None else forecast
+    b = get_ir() if ir is None else ir
 
     res = []
     for open_data, nasa_data in zip(a, b):
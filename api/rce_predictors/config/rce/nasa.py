@@ -1,6 +1,7 @@
 import requests
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+from api.rce_predictors.future.cache import NASA_POWER, forecast_cache
 
 def nasa_url():
     # Coordenadas para Madrid
@@ -37,12 +38,15 @@ def nasa_url():
     # Definir la URL para la API de NASA POWER
     url_nasa = f"https://power.larc.nasa.gov/api/temporal/daily/point?parameters=ALLSKY_SFC_LW_DWN&community=RE&longitude={lon}&latitude={lat}&start={start}&end={end}&format=JSON"
 
-    # Hacer la solicitud a la API de NASA
-    response_nasa = requests.get(url_nasa)
+    # Hacer la solicitud a la API de NASA (o recuperarla de la caché)
+    try:
+        data_nasa = forecast_cache.get_json(NASA_POWER, url_nasa)
+    except requests.exceptions.RequestException as e:
+        print(f"Error al hacer la solicitud a NASA: {e}")
+        data_nasa = None
 
     # Verificar si la solicitud fue exitosa
-    if response_nasa.status_code == 200:
-        data_nasa = response_nasa.json()
+    if data_nasa is not None:
 
         # Extraer y mostrar la radiación infrarroja
         if 'properties' in data_nasa:
@@ -63,10 +67,9 @@ def nasa_url():
             return resultados_radiacion
         else:
             print("No se encontraron los datos de radiación infrarroja en la respuesta de NASA.")
-    else:
-        print(f"Error al hacer la solicitud a NASA. Código de respuesta: {response_nasa.status_code}")
 
-    return 0
+    # Llista buida, del mateix tipus que la resposta: get_ir la tracta com un error
+    return []
 
 def get_val(a):
     import numpy as np
@@ -92,7 +95,11 @@ def get_val(a):
     return predicciones
 
 def get_ir():
-    return get_val(nasa_url()[0])
+    daily = nasa_url()
+    # nasa_url retorna una llista buida si no hi ha hagut resposta de NASA
+    if not daily:
+        raise RuntimeError("No hi ha dades de radiació infraroja de NASA")
+    return get_val(daily[0])
 
 if __name__ == "__main__":
     print(get_ir())
\ No newline at end of file
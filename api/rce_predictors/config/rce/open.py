@@ -1,5 +1,5 @@
-import requests
 from datetime import datetime, timedelta
+from api.rce_predictors.future.cache import OPEN_METEO, forecast_cache
 
 def get_forecast_from_now_local():
     
@@ -28,8 +28,7 @@ def get_forecast_from_now_local():
         "timezone": "auto"  # para recibir la hora local
     }
 
-    response = requests.get(url, params=params)
-    data = response.json()
+    data = forecast_cache.get_json(OPEN_METEO, url, params)
 
     # Parsear tiempos ya en hora local
     times = [datetime.fromisoformat(t) for t in data["hourly"]["time"]]
@@ -10,15 +10,16 @@ def Ei(
     t_1: np.float16,
     mode: Literal["hot", "cold"] = "hot",
 ) -> np.float16:
-    """Calculates the energy capability of the RCE in t1 compared to t0
+    """Calculates the energy capability of the RCE in t1 compared to t0.
+    Temperatures can be scalars or broadcastable arrays
 
     Args:
         rce (RceSpecs): Rce specifications
-        t_0 (np.float16): Cold/Hot tank temperature in base time
-        t_1 (np.float16): Cold/Hot tank temperature in t1
+        t_0 (np.float16 | np.ndarray): Cold/Hot tank temperature in base time
+        t_1 (np.float16 | np.ndarray): Cold/Hot tank temperature in t1
 
     Returns:
-        np.float16:
+        np.float16 | np.ndarray:
     """
     v = rce.VH if mode == "hot" else rce.VC
-    return v * rce.RHO * rce.CP * abs((t_1 - t_0))
\ No newline at end of file
+    return v * rce.RHO * rce.CP * np.abs(np.subtract(t_1, t_0))
@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-import tensorflow as tf
 import numpy as np
 import random
 
@@ -49,7 +47,7 @@ class WindowPredictor:
             ]
         )
 
-    def predict(self, data: tf.data.Dataset) -> np.array:
+    def predict(self, data: "tf.data.Dataset") -> np.array:
         """Make a prediction based on the given data."""
         return self.model.predict(data.batch(self.input_width)).reshape(
             (-1, len(self.label_columns))
@@ -57,12 +55,16 @@ class WindowPredictor:
 
     def plot(
         self,
-        data: tf.data.Dataset,
+        data: "tf.data.Dataset",
         predictions,
         plot_cols,
         title="",
         max_subplots=3,
     ) -> np.array:
+        # Només per a l'entrenament: no es carreguen en servir prediccions
+        import matplotlib.pyplot as plt
+        import tensorflow as tf
+
         predictions = np.expand_dims(predictions, axis=0)
 
         inputs, labels = [], []
@@ -1,81 +1,103 @@
-import datetime
+import hashlib
 import os
 import logging
+import threading
 
 import joblib
 import pandas as pd
 from api.rce_predictors.base_predictor import IDatedPredictor
-import tensorflow as tf
 import numpy as np
-from api.rce_predictors.future.open import get_forecast_24h
+from api.rce_predictors.future.open import FEATURES_24H, SITE, forecast_24h_frame
+from api.rce_predictors.scaling import Affine, ScaledModel
 
 GLOBAL_DATE_FORMAT = "%Y-%m-%d %H:%M"
 
 logger = logging.getLogger(__name__)
 
 y_path = os.path.join(os.path.dirname(__file__), r'keras/dem_y_scaler.pkl')
-y_scaler = joblib.load(y_path)
 x_path = os.path.join(os.path.dirname(__file__), r'keras/dem_x_scaler.pkl')
-x_scaler = joblib.load(x_path)
 model_path = os.path.join(os.path.dirname(__file__), r'keras/modelo_dem_fin.keras')
-model = tf.keras.models.load_model(model_path, compile=False)
-logger.info("Loaded demand model")
 
-columns = ['cold_dem', 'hot_dem']
-
-def _to_datetime(date):
-    date, time = date.strip().split("  ")
-    month, day = list(map(int, date.split("/")))
-    hour, minute, _ = list(map(int, time.split(":")))
-    return datetime.datetime(
-        datetime.datetime.now().year,
-        month=month,
-        day=day,
-    ) + datetime.timedelta(hours=hour, minutes=minute)
-
-def evaluate_model(model, X_scaled, scaler_y):
-    y_pred_scaled = model.predict(X_scaled)
-    y_pred = scaler_y.inverse_transform(y_pred_scaled)
-
-    for i in range(len(y_pred)):
-        for j in range(len(y_pred[i])):
-            if y_pred[i][j] < 0:
-                y_pred[i][j] = 0
 
-    return y_pred
+def load_artifacts():
+    import tensorflow as tf
 
-def read_data():
-    return pd.read_csv(os.path.join(os.path.dirname(__file__), r'keras/ex.txt'), sep=",", decimal=".")
+    model = tf.keras.models.load_model(model_path, compile=False)
+    x_scaler = joblib.load(x_path)
+    y_scaler = joblib.load(y_path)
+    logger.info("Loaded demand model")
+    return model, x_scaler, y_scaler
 
-def features_to_datetime(row, year=datetime.datetime.now().year):
-    # Día del año a partir de year_sin, year_cos
-    year_angle = np.arctan2(row['year_sin'], row['year_cos'])
-    day_of_year = int((year_angle % (2*np.pi)) / (2*np.pi) * 365) + 1
-
-    # Hora del día a partir de day_sin, day_cos
-    day_angle = np.arctan2(row['day_sin'], row['day_cos'])
-    hour_of_day = int((day_angle % (2*np.pi)) / (2*np.pi) * 24)
-    minute_of_hour = int((((day_angle % (2*np.pi)) / (2*np.pi) * 24 - hour_of_day) * 60))
+columns = ['cold_dem', 'hot_dem']
 
-    # Construir datetime
-    date = datetime.datetime(year, 1, 1) + datetime.timedelta(days=day_of_year-1, hours=hour_of_day, minutes=minute_of_hour)
-    return date
+def evaluate_model(model, X, scaler_y=None):
+    # Amb un ScaledModel X i el resultat ja són valors sense escalar
+    y_pred = np.asarray(model(np.asarray(X, dtype=np.float32), training=False))
+    if scaler_y is not None:
+        y_pred = scaler_y.inverse_transform(y_pred)
+    return np.maximum(y_pred, 0)
 
 class DemandPredictor(IDatedPredictor):
 
-    def __init__(self, demand_path: str, date_format: str) -> None:
+    def __init__(
+        self,
+        demand_path: str,
+        date_format: str,
+        model=None,
+        x_scaler=None,
+        y_scaler=None,
+    ) -> None:
         self._demand = None
-
-
-    def predict(self) -> pd.DataFrame:
+        if model is None or x_scaler is None or y_scaler is None:
+            model, x_scaler, y_scaler = load_artifacts()
+        self._model = model
+        self._x_scaler = x_scaler
+        self._y_scaler = y_scaler
+        self._x_affine = Affine.from_scaler(x_scaler)
+        self._y_affine = Affine.from_scaler(y_scaler)
+
+        # La demanda només depèn de la previsió: es guarda per (lloc, hora de
+        # la previsió) amb l'empremta de les dades d'entrada
+        self._memo: dict[tuple, tuple[str, pd.DataFrame]] = {}
+        self._memo_lock = threading.Lock()
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    @staticmethod
+    def fingerprint(forecast: pd.DataFrame) -> str:
+        values = np.ascontiguousarray(forecast[FEATURES_24H].to_numpy(dtype=np.float64))
+        return hashlib.sha1(values.tobytes()).hexdigest()
+
+    def predict(self, forecast: pd.DataFrame = None, fetch_forecast: bool = False) -> pd.DataFrame:
+        # forecast és la previsió ja obtinguda (ForecastClient); només es
+        # demana a la xarxa si es diu explícitament, mai des de l'API
+        if forecast is None:
+            if not fetch_forecast:
+                raise ValueError("forecast is required unless fetch_forecast=True")
+            forecast = forecast_24h_frame()
+
+        key = (SITE, forecast.index[0])
+        fingerprint = self.fingerprint(forecast)
+        with self._memo_lock:
+            memo = self._memo.get(key)
+            if memo is not None and memo[0] == fingerprint:
+                self.memo_hits += 1
+                return memo[1].copy()
+
+            self.memo_misses += 1
+            df_y = self._predict(forecast)
+            # Només cal la previsió de l'hora actual
+            self._memo = {key: (fingerprint, df_y)}
+            return df_y.copy()
+
+    def _predict(self, forecast: pd.DataFrame) -> pd.DataFrame:
         logger.info("START demand prediction")
-        parameters = pd.DataFrame(get_forecast_24h())
-        X_scaled = x_scaler.transform(parameters)
-        y_pred = evaluate_model(model, X_scaled, y_scaler)
-        df_y = pd.DataFrame(y_pred, columns=columns)
-        index = [features_to_datetime(row, year=datetime.datetime.now().year)
-             for _, row in parameters.iterrows()]
-        df_y.index = index
+        model = ScaledModel(self._model, self._x_affine, self._y_affine)
+        y_pred = evaluate_model(model, forecast[FEATURES_24H].to_numpy())
+        # El SC (get_now_val_2) resta un dia a cada instant de la demanda: es
+        # manté el desplaçament d'un dia que donava l'índex original
+        index = (forecast.index + pd.Timedelta(days=1)).rename(None)
+        df_y = pd.DataFrame(y_pred, columns=columns, index=index)
         logger.info("END demand prediction")
         return df_y
 
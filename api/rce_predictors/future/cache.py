@@ -0,0 +1,353 @@
+"""Shared cache of the external forecast responses (Open-Meteo, NASA POWER).
+
+Responses live in memory and in a JSON file per request on disk, so they
+survive API restarts. Each source has its own TTL: inside it the cached
+response is returned, after it and up to the stale limit the cached response
+is still returned while a background thread refreshes it, and past the stale
+limit the request blocks on the network. The keys include the requested
+dates, so entries past the stale limit are never asked for again: a write
+prunes them from memory and from disk, at most once every PRUNE_SECONDS.
+
+`track()` lists the cache entries served to the calling thread with the time
+they were fetched, so a caller can report the real age of a forecast and
+notice when the network failed and an old response was handed back.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv(
+    "FORECAST_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "forecast-cache"),
+)
+
+OPEN_METEO = "open-meteo"
+NASA_POWER = "nasa-power"
+
+# Open-Meteo actualitza les dades horàries cada hora, NASA POWER un cop al dia
+SOURCE_TTLS = {
+    OPEN_METEO: 60 * 60,
+    NASA_POWER: 24 * 60 * 60,
+}
+
+# Temps extra, després del TTL, en què es retorna la dada antiga mentre es refresca
+SOURCE_STALE = {
+    OPEN_METEO: 3 * 60 * 60,
+    NASA_POWER: 2 * 24 * 60 * 60,
+}
+
+# Interval mínim entre dues purgues de les entrades caducades (segons): la
+# purga recorre tot el directori i no cal fer-la a cada escriptura
+PRUNE_SECONDS = 10 * 60
+
+# Temps màxim (connexió, lectura) de cada petició en segons
+SOURCE_TIMEOUTS = {
+    OPEN_METEO: (3.05, 10),
+    NASA_POWER: (3.05, 20),
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def session() -> requests.Session:
+    """Process-wide HTTP session, keeps the connections to each host open"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def http_get_json(url: str, params: dict = None, timeout=None):
+    response = session().get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """Cached response of a forecast request"""
+
+    value: object
+    fetched_at: float
+    source: str = None
+
+
+@dataclass(frozen=True)
+class ServedEntry:
+    """Cache entry handed back by `get_json`, `error` is set when the refresh
+    failed and the previous response was returned instead"""
+
+    source: str
+    fetched_at: float
+    error: str = None
+
+
+class ForecastCache:
+    """Two tier (memory + disk) TTL cache with stale-while-revalidate"""
+
+    def __init__(
+        self,
+        cache_dir: str = CACHE_DIR,
+        ttls: dict = None,
+        stale: dict = None,
+        fetch=http_get_json,
+        prune_seconds: float = PRUNE_SECONDS,
+    ):
+        self._cache_dir = cache_dir
+        self._ttls = dict(SOURCE_TTLS if ttls is None else ttls)
+        self._stale = dict(SOURCE_STALE if stale is None else stale)
+        self._fetch = fetch
+        self._prune_seconds = prune_seconds
+        self._last_prune: float = None
+
+        self._memory: dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._refreshing: set[str] = set()
+        self._counters: dict[str, dict[str, int]] = {}
+        self._local = threading.local()
+
+    @staticmethod
+    def key(source: str, url: str, params: dict = None) -> str:
+        raw = json.dumps([source, url, params or {}], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, source: str, name: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(
+                source, {"hits": 0, "stale": 0, "misses": 0, "errors": 0}
+            )
+            counters[name] += 1
+
+    @contextmanager
+    def track(self):
+        """Collects the entries served to this thread inside the block
+
+        Yields:
+            list[ServedEntry]: filled as `get_json` returns responses
+        """
+        previous = getattr(self._local, "served", None)
+        served = self._local.served = []
+        try:
+            yield served
+        finally:
+            self._local.served = previous
+
+    def _serve(self, source: str, entry: CacheEntry, error: str = None):
+        served = getattr(self._local, "served", None)
+        if served is not None:
+            served.append(ServedEntry(source, entry.fetched_at, error))
+        return entry.value
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.json")
+
+    def _read(self, key: str) -> CacheEntry:
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        entry = CacheEntry(
+            value=stored["value"], fetched_at=stored["fetched_at"], source=stored.get("source")
+        )
+        # Si mentrestant s'ha escrit una resposta més nova, es queda aquella
+        with self._lock:
+            return self._memory.setdefault(key, entry)
+
+    def _expired(self, source: str, fetched_at: float, now: float) -> bool:
+        """Past the stale limit of its source (unknown sources are kept)"""
+        if source not in self._ttls:
+            return False
+        return now - fetched_at >= self._ttls[source] + self._stale.get(source, 0)
+
+    def prune(self) -> int:
+        """Drops the entries past the stale limit of their source, from memory
+        and from disk
+
+        Returns:
+            int: number of entries dropped from disk
+        """
+        now = time.time()
+        with self._lock:
+            for key, entry in list(self._memory.items()):
+                if self._expired(entry.source, entry.fetched_at, now):
+                    del self._memory[key]
+                    self._key_locks.pop(key, None)
+
+        # Un fitxer més nou que el límit més curt no cal llegir-lo
+        newest = now - min(
+            (ttl + self._stale.get(source, 0) for source, ttl in self._ttls.items()), default=0
+        )
+        removed = 0
+        try:
+            files = [f for f in os.scandir(self._cache_dir) if f.name.endswith(".json")]
+        except OSError:
+            return 0
+        for f in files:
+            try:
+                if f.stat().st_mtime > newest:
+                    continue
+                with open(f.path, "r", encoding="utf-8") as fp:
+                    stored = json.load(fp)
+                if self._expired(stored.get("source"), stored["fetched_at"], now):
+                    os.remove(f.path)
+                    removed += 1
+            except (OSError, ValueError, KeyError) as e:
+                logger.debug(f"No s'ha pogut revisar {f.name}: {e}")
+        if removed:
+            logger.info(f"{removed} previsions caducades esborrades del disc")
+        return removed
+
+    def _write(self, key: str, source: str, url: str, params: dict, value) -> CacheEntry:
+        entry = CacheEntry(value=value, fetched_at=time.time(), source=source)
+        with self._lock:
+            self._memory[key] = entry
+
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "source": source,
+                        "url": url,
+                        "params": params,
+                        "fetched_at": entry.fetched_at,
+                        "value": value,
+                    },
+                    f,
+                    default=str,
+                )
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"No s'ha pogut desar la previsió de {source} a disc: {e}")
+
+        if self._prune_due(entry.fetched_at):
+            self.prune()
+        return entry
+
+    def _prune_due(self, now: float) -> bool:
+        """True at most once every `prune_seconds`, the first write included"""
+        with self._lock:
+            if self._last_prune is not None and now - self._last_prune < self._prune_seconds:
+                return False
+            self._last_prune = now
+            return True
+
+    def _refresh(self, key: str, source: str, url: str, params: dict, timeout):
+        with self._key_lock(key):
+            entry = self._read(key)
+            # Una altra petició ja l'ha refrescat mentre esperàvem
+            if entry is not None and time.time() - entry.fetched_at < self._ttls[source]:
+                return entry
+            try:
+                value = self._fetch(url, params=params, timeout=timeout)
+            except Exception:
+                self._count(source, "errors")
+                raise
+            return self._write(key, source, url, params, value)
+
+    def _refresh_in_background(self, key, source, url, params, timeout) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._refresh(key, source, url, params, timeout)
+            except Exception as e:
+                logger.warning(f"Error refrescant la previsió de {source}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"refresh-{source}", daemon=True).start()
+
+    def get_json(
+        self,
+        source: str,
+        url: str,
+        params: dict = None,
+        timeout=None,
+    ):
+        """JSON response of the given GET request, from the cache when it is
+        fresh enough
+
+        Args:
+            source (str): forecast source, selects the TTL
+            url (str): request url
+            params (dict, optional): query parameters. Defaults to None.
+            timeout (optional): network timeout in seconds. Defaults to the
+                timeout of the source.
+
+        Returns:
+            object: decoded JSON response
+        """
+        key = self.key(source, url, params)
+        entry = self._read(key)
+        ttl = self._ttls[source]
+        if timeout is None:
+            timeout = SOURCE_TIMEOUTS.get(source)
+
+        if entry is not None:
+            age = time.time() - entry.fetched_at
+            if age < ttl:
+                self._count(source, "hits")
+                return self._serve(source, entry)
+            if age < ttl + self._stale.get(source, 0):
+                self._count(source, "stale")
+                self._refresh_in_background(key, source, url, params, timeout)
+                return self._serve(source, entry)
+
+        self._count(source, "misses")
+        try:
+            return self._serve(source, self._refresh(key, source, url, params, timeout))
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(
+                f"Error obtenint la previsió de {source}, es fa servir la darrera "
+                f"disponible ({time.time() - entry.fetched_at:.0f}s)"
+            )
+            return self._serve(source, entry, error=repr(e))
+
+    def stats(self) -> dict:
+        """Hit/miss counters per source"""
+        with self._lock:
+            return {source: dict(c) for source, c in self._counters.items()}
+
+    def clear(self) -> None:
+        """Drops the memory tier (the disk tier is kept)"""
+        with self._lock:
+            self._memory.clear()
+
+
+forecast_cache = ForecastCache()
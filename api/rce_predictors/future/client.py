@@ -0,0 +1,221 @@
+"""Concurrent fetch of every external forecast used by /predict.
+
+The rain, wind/solar, 24h meteo and NASA IR requests are independent, so they
+run at the same time (one worker thread each, over the pooled session of the
+forecast cache) instead of one after another. Each source has its own
+deadline; a source that fails or misses it is replaced by a fallback and the
+rest of the forecasts are still returned. A source answered by the forecast
+cache with an old response because the network failed is reported as an
+error too, and every source carries the time its data was really fetched.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from api.rce_predictors.config.rce.fut import get_fut_val
+from api.rce_predictors.config.rce.nasa import get_val
+from api.rce_predictors.config.rce.open import get_forecast_from_now_local
+from api.rce_predictors.future.cache import ForecastCache, forecast_cache
+from api.rce_predictors.future.nasa import fetch_nasa_ir
+from api.rce_predictors.future.open import fetch_forecast_24h, forecast_24h_frame
+from api.rce_predictors.rain_predictor import WeatherPredictor
+from api.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RAIN = "rain"
+WIND_SOLAR = "wind_solar"
+METEO_24H = "meteo_24h"
+NASA_IR = "nasa_ir"
+
+# Temps màxim de cada font en segons, inclosos els reintents de connexió
+SOURCE_DEADLINES = {
+    RAIN: 12,
+    WIND_SOLAR: 12,
+    METEO_24H: 12,
+    NASA_IR: 25,
+}
+
+# Temps màxim de tota la recollida
+DEFAULT_DEADLINE = 25
+
+FETCH_SECONDS = metrics.histogram(
+    "rce_forecast_fetch_seconds", "Duration of each upstream forecast fetch", ("source",)
+)
+FETCH_FAILURES = metrics.counter(
+    "rce_forecast_fetch_failures_total",
+    "Upstream forecast fetches that failed or missed their deadline",
+    ("source", "reason"),
+)
+FALLBACKS = metrics.counter(
+    "rce_forecast_fallbacks_total",
+    "Forecasts replaced by a default value or by the previous snapshot",
+    ("source", "kind"),
+)
+
+
+@dataclass
+class ForecastBundle:
+    """External forecasts of a /predict request.
+
+    `fut_val` and `forecast_24h` are None when their sources failed and there
+    is no fallback; such a bundle is not `complete` and /predict does not use
+    it. `results` holds the raw response of every source that answered, so
+    the prefetcher can rebuild the forecasts from the last good response of
+    each source. `fetched_at` holds, per source, the epoch of the oldest
+    cached response it used. `version` is the number of the prefetcher
+    snapshot, None when fetched outside the prefetcher.
+    """
+
+    rain: dict
+    fut_val: list = None
+    forecast_24h: pd.DataFrame = None
+    errors: dict = field(default_factory=dict)
+    results: dict = field(default_factory=dict)
+    fetched_at: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    version: int = None
+
+    @property
+    def complete(self) -> bool:
+        """Every forecast the predictors need is present"""
+        return self.fut_val is not None and self.forecast_24h is not None
+
+
+class ForecastClient:
+    """Runs the forecast fetches concurrently, each one with a deadline"""
+
+    def __init__(
+        self, fetches: dict = None, deadlines: dict = None, cache: ForecastCache = forecast_cache
+    ):
+        # Les funcions llancen l'error en lloc de tornar un valor per defecte
+        self._fetches = (
+            {
+                RAIN: lambda: WeatherPredictor().fetch_future(),
+                WIND_SOLAR: get_forecast_from_now_local,
+                METEO_24H: fetch_forecast_24h,
+                NASA_IR: fetch_nasa_ir,
+            }
+            if fetches is None
+            else dict(fetches)
+        )
+        self._deadlines = dict(SOURCE_DEADLINES if deadlines is None else deadlines)
+        self._cache = cache
+        # Pool propi: una font penjada no bloqueja el tancament del bucle d'asyncio
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * len(self._fetches), thread_name_prefix="forecast"
+        )
+
+    @property
+    def sources(self) -> list[str]:
+        return list(self._fetches)
+
+    def _call(self, name: str):
+        # Al fil del pool: les entrades de la caché que ha fet servir la font
+        with self._cache.track() as served:
+            value = self._fetches[name]()
+        return value, served
+
+    async def _fetch(self, name: str):
+        loop = asyncio.get_running_loop()
+        with FETCH_SECONDS.time(source=name):
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._call, name),
+                timeout=self._deadlines.get(name),
+            )
+
+    async def fetch_all_async(self, deadline: float = DEFAULT_DEADLINE) -> ForecastBundle:
+        """Fetches every source concurrently
+
+        Args:
+            deadline (float, optional): seconds to wait for the whole set.
+                Defaults to DEFAULT_DEADLINE.
+
+        Returns:
+            ForecastBundle: forecasts, with fallbacks for the failed sources
+        """
+        start = time.perf_counter()
+        tasks = {name: asyncio.create_task(self._fetch(name)) for name in self._fetches}
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+        results, errors, stale, fetched_at = {}, {}, {}, {}
+        for name, task in tasks.items():
+            if task not in done or task.cancelled():
+                errors[name] = "timeout"
+            elif isinstance(task.exception(), asyncio.TimeoutError):
+                errors[name] = "timeout"
+            elif task.exception() is not None:
+                errors[name] = repr(task.exception())
+            else:
+                results[name], served = task.result()
+                if served:
+                    fetched_at[name] = min(entry.fetched_at for entry in served)
+                failed = [entry.error for entry in served if entry.error]
+                if failed:
+                    stale[name] = f"stale: {failed[0]}"
+
+        for name, error in errors.items():
+            logger.warning(f"Previsió {name} no disponible ({error}), es fa servir el valor per defecte")
+            FETCH_FAILURES.inc(source=name, reason="timeout" if error == "timeout" else "error")
+            FALLBACKS.inc(source=name, kind="default")
+        # La caché ha tornat la resposta anterior: és un error encara que hi hagi valor
+        for name, error in stale.items():
+            logger.warning(f"Previsió {name} no refrescada ({error}), es fa servir la darrera de la caché")
+            FETCH_FAILURES.inc(source=name, reason="error")
+            FALLBACKS.inc(source=name, kind="cache")
+        errors.update(stale)
+
+        bundle = self.compose(results, errors)
+        bundle.results = results
+        bundle.fetched_at = fetched_at
+        bundle.seconds = time.perf_counter() - start
+        return bundle
+
+    def fetch_all(self, deadline: float = DEFAULT_DEADLINE) -> ForecastBundle:
+        """Blocking version of `fetch_all_async`, for callers without an event loop"""
+        return asyncio.run(self.fetch_all_async(deadline))
+
+    @staticmethod
+    def compose(results: dict, errors: dict) -> ForecastBundle:
+        """Forecasts built from the raw response of each source, without any
+        network access"""
+        rain = results.get(RAIN)
+        if rain is None:
+            rain = {p: 0.0 for p in WeatherPredictor.Period}
+
+        # Sense NASA, l'IR s'estima a partir de la temperatura i la humitat
+        ir_list = results.get(NASA_IR) or []
+
+        forecast_24h = None
+        if METEO_24H in results:
+            try:
+                forecast_24h = forecast_24h_frame(ir_list=ir_list, data=results[METEO_24H])
+            except Exception as e:
+                errors[METEO_24H] = repr(e)
+
+        fut_val = None
+        if WIND_SOLAR in results:
+            if ir_list:
+                mu = ir_list[0]["radiation_infrared"]
+            elif forecast_24h is not None:
+                mu = float(forecast_24h["ir_rad"].iloc[0])
+            else:
+                mu = None
+            if mu is not None:
+                fut_val = get_fut_val(
+                    forecast=results[WIND_SOLAR], ir=get_val({"radiation_infrared": mu})
+                )
+
+        return ForecastBundle(
+            rain=rain, fut_val=fut_val, forecast_24h=forecast_24h, errors=errors
+        )
+
+
+forecast_client = ForecastClient()
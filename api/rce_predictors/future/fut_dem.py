@@ -1,7 +1,8 @@
 import requests
 from datetime import datetime, timedelta, timezone
+import pandas as pd
 import pytz
-import math
+from api.utils import features
 from api.rce_predictors.future.open import get_forecast_24h
 def demanda(lat=41.6176, lon=0.6200):
     """
@@ -41,33 +42,19 @@ def demanda(lat=41.6176, lon=0.6200):
     # Zona horaria de España
     tz_spain = pytz.timezone("Europe/Madrid")
 
-    resultados = []
-    for i in range(start_idx, end_idx):
-        dt_utc = datetime.fromisoformat(horas[i]).replace(tzinfo=timezone.utc)
-        dt_local = dt_utc.astimezone(tz_spain)
-
-        # --- Codificación cíclica ---
-        # Hora del día
-        seconds_in_day = dt_local.hour * 3600 + dt_local.minute * 60 + dt_local.second
-        day_frac = seconds_in_day / 86400
-        day_sin = math.sin(2 * math.pi * day_frac)
-        day_cos = math.cos(2 * math.pi * day_frac)
-
-        # Día del año
-        day_of_year = dt_local.timetuple().tm_yday
-        year_frac = day_of_year / 365.0
-        year_sin = math.sin(2 * math.pi * year_frac)
-        year_cos = math.cos(2 * math.pi * year_frac)
+    # --- Codificación cíclica, en hora local de España ---
+    horas_utc = pd.DatetimeIndex(horas[start_idx:end_idx]).tz_localize("UTC")
+    horas_local = horas_utc.tz_convert(tz_spain).tz_localize(None)
+    ciclicas = features.cyclic(horas_local)
 
+    resultados = []
+    for k, i in enumerate(range(start_idx, end_idx)):
         resultados.append({
             "temp_C": round(temps[i], 1),
             "humedad_%": humedades[i],
             "presion_hPa": presiones[i],
             "radiacion_Wm2": round(radiacion[i], 1),
-            "day_sin": day_sin,
-            "day_cos": day_cos,
-            "year_sin": year_sin,
-            "year_cos": year_cos
+            **{col: float(ciclicas[col][k]) for col in features.CYCLIC_COLUMNS},
         })
     print(dem[0], resultados[0])
     return resultados
@@ -2,8 +2,9 @@ import requests
 import numpy as np
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+from api.rce_predictors.future.cache import NASA_POWER, forecast_cache
 
-def nasa_url():
+def fetch_nasa_ir():
     # Coordenadas para Madrid
     # lat = 40.4168
     # lon = -3.7038
@@ -33,23 +34,26 @@ def nasa_url():
 
     url_nasa = f"https://power.larc.nasa.gov/api/temporal/daily/point?parameters=ALLSKY_SFC_LW_DWN&community=RE&longitude={lon}&latitude={lat}&start={today}&end={tomorrow}&format=JSON"
 
-    response_nasa = requests.get(url_nasa)
-    if response_nasa.status_code == 200:
-        data_nasa = response_nasa.json()
-        if 'properties' in data_nasa and 'parameter' in data_nasa['properties']:
-            radiation_infrared = data_nasa['properties']['parameter']['ALLSKY_SFC_LW_DWN']
-            resultados_radiacion = []
-            for date, value in radiation_infrared.items():
-                nd = datetime.strptime(date, "%Y%m%d")
-                resultados_radiacion.append({
-                    "date": nd.strftime("%Y-%m-%d"),
-                    "radiation_infrared": value
-                })
-            return resultados_radiacion
-        else:
-            print("No se encontraron datos de radiación infrarroja.")
-    else:
-        print(f"Error en la solicitud a NASA: {response_nasa.status_code}")
+    # Els errors es propaguen: ForecastClient els ha de veure
+    data_nasa = forecast_cache.get_json(NASA_POWER, url_nasa)
+    if 'properties' not in data_nasa or 'parameter' not in data_nasa['properties']:
+        raise ValueError("No se encontraron datos de radiación infrarroja.")
+
+    radiation_infrared = data_nasa['properties']['parameter']['ALLSKY_SFC_LW_DWN']
+    resultados_radiacion = []
+    for date, value in radiation_infrared.items():
+        nd = datetime.strptime(date, "%Y%m%d")
+        resultados_radiacion.append({
+            "date": nd.strftime("%Y-%m-%d"),
+            "radiation_infrared": value
+        })
+    return resultados_radiacion
+
+def nasa_url():
+    try:
+        return fetch_nasa_ir()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error en la solicitud a NASA: {e}")
     return []
 
 def get_val(daily_data, interval_hours=1):
@@ -1,32 +1,38 @@
-import requests
 from datetime import datetime, timedelta
-import math
+import numpy as np
+import pandas as pd
+from api.rce_predictors.future.cache import OPEN_METEO, forecast_cache
 from api.rce_predictors.future.nasa import nasa_url
+from api.utils import features
 
 saved_ir = {}
 last_update = None
 
+# Lleida EPS (latitud, longitud)
+SITE = (41.606527, 0.623429)
+
+# Columnas de la previsión de 24h, en el orden de entrada del modelo de demanda
+FEATURES_24H = [
+    "temperature", "humidity", "pressure", "solar_rad", "ir_rad",
+    "v_wind", "day_sin", "day_cos", "year_sin", "year_cos",
+]
+
 def estimate_longwave_ir(temp_C, rh):
-    """Estimació de radiació infraroja descendente (W/m²)"""
+    """Estimació de radiació infraroja descendente (W/m²), accepta arrays"""
     Ta = temp_C + 273.15  # K
     ea = rh / 100 * 6.11 * 10**(7.5 * temp_C / (237.3 + temp_C))
     epsilon = 1.24 * (ea / Ta)**(1/7)
     sigma = 5.67e-8
     return epsilon * sigma * Ta**4
 
-def get_forecast_24h():
-    global saved_ir, last_update
+def fetch_forecast_24h():
+    """Respuesta horaria de Open-Meteo (2 días) en la que se basa get_forecast_24h"""
     # lat, lon = 41.4, 2.2  #Preguntar porque se usa estas diferentes lat y lon
     
     # lat=41.6176
     # lon=0.6200
 
-    # Lleida EPS
-    lat=41.606527
-    lon=0.623429
-    
-    now = datetime.utcnow()
-    next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+    lat, lon = SITE
 
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
@@ -36,102 +42,77 @@ def get_forecast_24h():
         "forecast_days": 2,  # <-- Pedimos 2 días para asegurar 24h
         "timezone": "UTC"
     }
-    data = requests.get(url, params=params, timeout=30).json()
+    return forecast_cache.get_json(OPEN_METEO, url, params)
+
+def forecast_24h_frame(ir_list=None, data=None) -> pd.DataFrame:
+    """Previsión horaria de las próximas 24h, indexada por la hora real (UTC).
+
+    Las columnas son FEATURES_24H, en el orden que espera el modelo de demanda.
+    ir_list y data permiten pasar las respuestas de NASA y Open-Meteo ya
+    obtenidas (p. ej. en paralelo por ForecastClient); si no, se piden aquí.
+    """
+    global saved_ir, last_update
+    now = datetime.utcnow()
+    next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
 
-    temps = data["hourly"]["temperature_2m"]
-    hums = data["hourly"]["relative_humidity_2m"]
-    pres = data["hourly"]["surface_pressure"]
-    wind = data["hourly"]["windspeed_10m"]
-    solar = data["hourly"]["shortwave_radiation"]
-    times = [datetime.strptime(t, "%Y-%m-%dT%H:%M") for t in data["hourly"]["time"]]
+    if data is None:
+        data = fetch_forecast_24h()
+    hourly = data["hourly"]
 
+    times = np.array(hourly["time"], dtype="datetime64[m]")
     # índice de la próxima hora
-    start_idx = next(i for i, t in enumerate(times) if t >= next_hour)
-    n_hours = 24  # siempre queremos 24 horas
-    ir_list = nasa_url()
-
-    # Si hemos recibido más de un día, guardamos copia y mapeamos por fecha
-    # if len(ir_list) > 1:
-    #     saved_ir = ir_list
-    #     last_update = datetime.now().day
-    #     with open("data.txt", "w") as text:
-    #         text.write(str(ir_list))
-        
+    after = np.flatnonzero(times >= np.datetime64(next_hour))
+    if len(after) == 0:
+        raise ValueError("La previsión de Open-Meteo no llega a la próxima hora")
+    hours = slice(after[0], after[0] + 24)  # siempre queremos 24 horas
+
+    def column(name):
+        return np.asarray(hourly[name], dtype=np.float64)[hours]
+
+    times = times[hours]
+    temp = column("temperature_2m")
+    rh = column("relative_humidity_2m")
+
+    # Sin datos de NASA para un día, la IR se estima por temperatura+humedad
+    ir = estimate_longwave_ir(temp, rh)
+    if ir_list is None:
+        ir_list = nasa_url()
     if ir_list:
         saved_ir = ir_list
         last_update = datetime.now().day
-        # with open("data.txt", "w") as text:
-        #     text.write(str(ir_list))
-
-        # Mapa fecha -> valor diario de IR
-        ir_by_date = {
-            item["date"]: item["radiation_infrared"]
-            for item in ir_list
-            if "date" in item
-        }
-    else:
-        ir_by_date = {}
-
-  
-
-    resultados = []
-    # print(f"\n VITOR times: {times} ")
-    # print(f"\n VITOR n_hours: {n_hours} ")
-    # print(f"\n VITOR start_idx: {start_idx} ")
-    # print(f"\n VITOR ir_list: {ir_list} ")
-
-    for i in range(n_hours):
-        dt = times[start_idx + i]
-        temp = temps[start_idx + i]
-        rh = hums[start_idx + i]
-
-        date_key = dt.date().isoformat()  # 'YYYY-MM-DD'
-
-        # Caso 1: no hay datos de NASA o están caducados -> estimar por temp+humedad
-        if (not ir_by_date) or (last_update and last_update != datetime.now().day):
-            ir = estimate_longwave_ir(temp, rh)
-
-        else:
-            # Tenemos datos de NASA para algún día
-            if date_key in ir_by_date:
-                ir = ir_by_date[date_key]
-            else:
-                # No hay IR para ese día concreto -> fallback a estimación
-                ir = estimate_longwave_ir(temp, rh)
-                
-        # # Decidir IR
-        # if (len(ir_list) == 1 and not saved_ir) or (last_update and last_update != datetime.now().day):
-        #     ir = estimate_longwave_ir(temp, rh)
-        # elif len(ir_list) == 1 and saved_ir:
-        #     ir = saved_ir
-        # else:
-        #     ir = ir_list[start_idx + i]
-
-        # Codificación cíclica
-        seconds_in_day = dt.hour * 3600 + dt.minute * 60
-        day_frac = seconds_in_day / 86400
-        day_sin = math.sin(2 * math.pi * day_frac)
-        day_cos = math.cos(2 * math.pi * day_frac)
-
-        day_of_year = dt.timetuple().tm_yday
-        year_frac = day_of_year / 365.0
-        year_sin = math.sin(2 * math.pi * year_frac)
-        year_cos = math.cos(2 * math.pi * year_frac)
-
-        resultados.append({
-            "temperature": round(temp,1),
-            "humidity": round(rh,1),
-            "pressure": round(pres[start_idx + i],1),
-            "solar_rad": round(solar[start_idx + i],1),
-            "ir_rad": round(ir,1),
-            "v_wind": round(wind[start_idx + i],1),
-            "day_sin": round(day_sin,6),
-            "day_cos": round(day_cos,6),
-            "year_sin": round(year_sin,6),
-            "year_cos": round(year_cos,6)
-        })
-
-    return resultados
+        ir_by_date = {item["date"]: item["radiation_infrared"] for item in ir_list if "date" in item}
+        dates = times.astype("datetime64[D]").astype(str)
+        known = np.array([d in ir_by_date for d in dates])
+        if known.any():
+            ir[known] = [ir_by_date[d] for d in dates[known]]
+
+    # Codificación cíclica
+    cyclic = features.cyclic(times)
+
+    return pd.DataFrame(
+        {
+            "temperature": np.round(temp, 1),
+            "humidity": np.round(rh, 1),
+            "pressure": np.round(column("surface_pressure"), 1),
+            "solar_rad": np.round(column("shortwave_radiation"), 1),
+            "ir_rad": np.round(ir, 1),
+            "v_wind": np.round(column("windspeed_10m"), 1),
+            "day_sin": np.round(cyclic["day_sin"], 6),
+            "day_cos": np.round(cyclic["day_cos"], 6),
+            "year_sin": np.round(cyclic["year_sin"], 6),
+            "year_cos": np.round(cyclic["year_cos"], 6),
+        },
+        index=pd.DatetimeIndex(times, name="time"),
+    )
+
+def get_forecast_24h(ir_list=None, data=None):
+    """Previsión de las próximas 24h como lista de diccionarios, uno por hora,
+    con la hora real en "time"."""
+    frame = forecast_24h_frame(ir_list=ir_list, data=data)
+    return [
+        {**row, "time": time.strftime("%Y-%m-%dT%H:%M")}
+        for time, row in zip(frame.index, frame.to_dict("records"))
+    ]
 
 if __name__ == "__main__":
     datos = get_forecast_24h()
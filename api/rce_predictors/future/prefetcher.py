@@ -0,0 +1,142 @@
+"""Background refresh of the external forecasts.
+
+A daemon thread asks the ForecastClient for every forecast on a fixed wall
+clock cadence and keeps the latest snapshot in memory, so /predict never waits
+for the network. The forecast cache decides when a refresh really hits the
+network (Open-Meteo hourly, NASA POWER daily); the snapshot itself is rebuilt
+more often because the 15 minute forecasts are relative to the current time.
+
+A source that fails keeps its last good response, and the forecasts are
+rebuilt from the last good response of every source: an upstream outage shows
+up as the age of that source, not as request latency. /predict only reads the
+snapshot through `current()` and never fetches on its own. The age is measured from the
+time the cached response was fetched, so a cache hit or an old response
+handed back by the cache is not reported as fresh.
+"""
+
+import logging
+import threading
+import time
+
+from api.rce_predictors.future.client import (
+    FALLBACKS,
+    ForecastBundle,
+    ForecastClient,
+    METEO_24H,
+    RAIN,
+    WIND_SOLAR,
+    forecast_client,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cada quant es reconstrueix la instantània, alineat amb el rellotge (segons)
+REFRESH_SECONDS = 5 * 60
+
+
+class ForecastPrefetcher:
+    """Keeps an up to date ForecastBundle in memory"""
+
+    def __init__(self, client: ForecastClient = forecast_client, period: float = REFRESH_SECONDS):
+        self._client = client
+        self._period = period
+
+        self._snapshot: ForecastBundle = None
+        self._snapshot_at: float = None
+        self._updated: dict[str, float] = {}
+        self._results: dict = {}  # última resposta bona de cada font
+        self._version = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+    def refresh(self) -> ForecastBundle:
+        """Fetches every forecast and publishes the new snapshot"""
+        bundle = self._client.fetch_all()
+        now = time.time()
+
+        with self._lock:
+            previous = self._snapshot
+            for name in self._client.sources:
+                if name in bundle.fetched_at:
+                    self._updated[name] = bundle.fetched_at[name]
+                elif name not in bundle.errors:
+                    self._updated[name] = now
+
+            # Les fonts caigudes fan servir la seva última resposta bona i les
+            # previsions es recomponen amb totes, sense tornar a la xarxa
+            reused = [name for name in self._results if name not in bundle.results]
+            self._results.update(bundle.results)
+            if reused:
+                rebuilt = ForecastClient.compose(dict(self._results), dict(bundle.errors))
+                bundle.rain = rebuilt.rain
+                bundle.fut_val = rebuilt.fut_val
+                bundle.forecast_24h = rebuilt.forecast_24h
+                for name in reused:
+                    FALLBACKS.inc(source=name, kind="previous")
+            # Sense respostes per font, es manté el de la instantània anterior
+            elif previous is not None:
+                if RAIN in bundle.errors and RAIN not in bundle.fetched_at:
+                    bundle.rain = previous.rain
+                    FALLBACKS.inc(source=RAIN, kind="previous")
+                if bundle.fut_val is None and previous.fut_val is not None:
+                    bundle.fut_val = previous.fut_val
+                    FALLBACKS.inc(source=WIND_SOLAR, kind="previous")
+                if bundle.forecast_24h is None and previous.forecast_24h is not None:
+                    bundle.forecast_24h = previous.forecast_24h
+                    FALLBACKS.inc(source=METEO_24H, kind="previous")
+
+            self._version += 1
+            bundle.version = self._version
+            self._snapshot = bundle
+            self._snapshot_at = now
+        return bundle
+
+    def snapshot(self) -> ForecastBundle:
+        """Latest snapshot, None before the first refresh"""
+        with self._lock:
+            return self._snapshot
+
+    def current(self) -> ForecastBundle:
+        """Latest snapshot if it has every forecast, otherwise None. Never
+        fetches: the background refresh is the only one that hits the network"""
+        snapshot = self.snapshot()
+        return snapshot if snapshot is not None and snapshot.complete else None
+
+    def ages(self) -> dict:
+        """Seconds since the snapshot and since the last success of each source"""
+        now = time.time()
+        with self._lock:
+            return {
+                "snapshot": None if self._snapshot_at is None else round(now - self._snapshot_at, 1),
+                "sources": {
+                    name: round(now - self._updated[name], 1) if name in self._updated else None
+                    for name in self._client.sources
+                },
+                "errors": {} if self._snapshot is None else dict(self._snapshot.errors),
+            }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refrescant les previsions: {e}")
+            # Espera fins al següent múltiple del període
+            self._stop.wait(self._period - time.time() % self._period)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="forecast-prefetcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+forecast_prefetcher = ForecastPrefetcher()
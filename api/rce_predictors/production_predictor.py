@@ -1,3 +1,4 @@
+import numpy as np
 from pandas import DataFrame
 from api.rce_predictors.base_predictor import IDatedPredictor
 from api.rce_predictors.config.rce.prod import Ei
@@ -6,6 +7,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+LABELS = ("cold", "hot")
+
 class ProductionPredictor(IDatedPredictor):
 
     def __init__(self, rce_specs: RceSpecs) -> None:
@@ -33,34 +36,39 @@ class ProductionPredictor(IDatedPredictor):
             production capabilities
         """
         logger.info("START Production Prediction")
-        data["prod_cold"] = data.iloc[1:].apply(
-            lambda x: Ei(
-                self._specs,
-                t_0=data.iloc[0]["cold"],
-                t_1=x["cold"],
-                mode="cold",
-            ),
-            axis=1,
-        )
-        logger.debug("Cold production OK")
-        data["prod_hot"] = data.iloc[1:].apply(
-            lambda x: Ei(
-                self._specs,
-                t_0=data.iloc[0]["hot"],
-                t_1=x["hot"],
-                mode="hot",
-            ),
-            axis=1,
-        )
-        logger.debug("Hot production OK")
+        current = data[list(LABELS)].iloc[0].to_numpy(dtype=np.float64)
+        future = data[list(LABELS)].iloc[1:].to_numpy(dtype=np.float64)
+        energies = self.predict_batch(current, future[np.newaxis])[0]
+
+        result = data.iloc[1:].drop(columns=list(LABELS))
+        for i, label in enumerate(LABELS):
+            result[label] = energies[:, i]
         logger.info("END Production Prediction")
-        return (
-            data.iloc[1:]
-            .drop(columns=["cold", "hot"])
-            .rename(
-                columns={
-                    "prod_hot": "hot",
-                    "prod_cold": "cold",
-                }
+        return result
+
+    def predict_batch(
+        self,
+        current: np.ndarray,
+        temperatures: np.ndarray,
+        labels: tuple = LABELS,
+    ) -> np.ndarray:
+        """Production capabilities of several temperature rollouts at once
+
+        Args:
+            current (np.ndarray): current tank temperatures (labels,)
+            temperatures (np.ndarray): predicted temperatures
+                (scenarios, horizon, labels)
+            labels (tuple, optional): tank of each label column.
+                Defaults to ("cold", "hot").
+
+        Returns:
+            np.ndarray: energies with the shape of `temperatures`
+        """
+        temperatures = np.asarray(temperatures, dtype=np.float64)
+        current = np.asarray(current, dtype=np.float64)
+        energies = np.empty_like(temperatures)
+        for i, label in enumerate(labels):
+            energies[..., i] = Ei(
+                self._specs, t_0=current[i], t_1=temperatures[..., i], mode=label
             )
-        )
+        return energies
@@ -1,9 +1,9 @@
-import requests
 import pytz
 from datetime import datetime, timedelta
 from enum import Enum
 import pandas as pd
 from api.rce_predictors.base_predictor import IDatedPredictor
+from api.rce_predictors.future.cache import OPEN_METEO, forecast_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -61,48 +61,49 @@ class WeatherPredictor(IDatedPredictor):
             f"&timezone=Europe%2FMadrid"
         )
 
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
+        # Els errors de xarxa es propaguen, get_future posa els valors per defecte
+        data = forecast_cache.get_json(OPEN_METEO, url)
 
-            if 'hourly' not in data:
-                logger.warning("La respuesta de la API no contiene datos horarios")
-                return []
+        if 'hourly' not in data:
+            raise ValueError("La respuesta de la API no contiene datos horarios")
 
-            hours = data["hourly"]["time"]
-            precipitation_prob = data["hourly"]["precipitation_probability"]
+        hours = data["hourly"]["time"]
+        precipitation_prob = data["hourly"]["precipitation_probability"]
 
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            tomorrow_str = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-            valid_hours = [2, 8, 14, 20]
-            pred = []
+        today_str = datetime.now().strftime("%Y-%m-%d")
+        tomorrow_str = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        valid_hours = [2, 8, 14, 20]
+        pred = []
 
-            for i, time_str in enumerate(hours):
-                date_part, hour_part = time_str.split("T")
-                hour = int(hour_part.split(":")[0])
-                if date_part in [today_str, tomorrow_str] and hour in valid_hours:
-                    pred.append((f"{date_part}T{hour:02}:00", precipitation_prob[i]))
+        for i, time_str in enumerate(hours):
+            date_part, hour_part = time_str.split("T")
+            hour = int(hour_part.split(":")[0])
+            if date_part in [today_str, tomorrow_str] and hour in valid_hours:
+                pred.append((f"{date_part}T{hour:02}:00", precipitation_prob[i]))
 
-            logger.info(f"Predicción API obtenida correctamente")
-            return pred
+        logger.info(f"Predicción API obtenida correctamente")
+        return pred
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error en la petición API: {e}")
-            return []
+    def fetch_future(self) -> dict:
+        # Sense valors per defecte: ForecastClient ha de veure els errors
+        prediction = self._extern_api_req()
+        pred_map = dict(prediction)
+        return {p: float(pred_map.get(p.iso_format(), 0.0)) for p in WeatherPredictor.Period}
 
     def get_future(self):
         try:
-            prediction = self._extern_api_req()
-            pred_map = dict(prediction)
-            pred_dict = {p: float(pred_map.get(p.iso_format(), 0.0)) for p in WeatherPredictor.Period}
-            return pred_dict
+            return self.fetch_future()
         except Exception as e:
             logger.error(f"Error al generar predicciones futuras: {e}")
             return {p: 0.0 for p in WeatherPredictor.Period}
 
-    def predict(self) -> pd.DataFrame:
-        pred = self.get_future()
+    def predict(self, pred: dict = None, fetch_forecast: bool = False) -> pd.DataFrame:
+        # pred és la previsió ja obtinguda (ForecastClient); només es demana
+        # a la xarxa si es diu explícitament, mai des de l'API
+        if pred is None:
+            if not fetch_forecast:
+                raise ValueError("pred is required unless fetch_forecast=True")
+            pred = self.get_future()
         df = pd.DataFrame(
             data={"prediction": [pred.get(p) for p in WeatherPredictor.Period]},
             index=[p.to_datetime().strftime("%Y-%m-%d %H:%M") for p in WeatherPredictor.Period],
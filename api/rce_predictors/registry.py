@@ -0,0 +1,314 @@
+"""Process-wide registry of the models, scalers and pipelines used to serve
+predictions.
+
+Every artefact is loaded once (normally from the FastAPI lifespan) and the
+built predictors are handed back to each request, so `/predict` never pays
+for a `load_model` or an unpickle. Loads run outside the registry lock, which
+is only taken to look up and publish, so a model being loaded for a new
+configuration does not block the requests served with the current one.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock, RLock
+
+import joblib
+
+from api.rce_predictors.tflite import KERAS_BACKEND, TFLITE_BACKEND, TFLiteModel, tflite_name
+
+logger = logging.getLogger(__name__)
+
+KERAS_DIR = os.path.join(os.path.dirname(__file__), "keras")
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), "config")
+
+TEMPERATURE_SCALERS = ("x_scaler.pkl", "y_scaler.pkl")
+DEMAND_SCALERS = ("dem_x_scaler.pkl", "dem_y_scaler.pkl")
+DEMAND_MODEL = "modelo_dem_fin.keras"
+POSTPROCESS_CONFIG = "config-preprocess.json"
+
+
+def config_key(config) -> str:
+    """Canonical string of a (possibly frozen) configuration section"""
+    return json.dumps(config, sort_keys=True, default=dict)
+
+
+def process_rss() -> int:
+    """Resident set size of the current process in bytes (0 if unknown)"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+@dataclass(frozen=True)
+class ArtifactStats:
+    """Load information of a registry artefact"""
+
+    name: str
+    """Artefact identifier (file name of the model, scaler or pipeline)"""
+
+    load_seconds: float
+    """Wall time spent loading the artefact"""
+
+    rss_bytes: int
+    """Growth of the process RSS while loading the artefact"""
+
+    def to_dict(self) -> dict:
+        return {
+            "load_seconds": round(self.load_seconds, 4),
+            "rss_mb": round(self.rss_bytes / 2**20, 2),
+        }
+
+
+class ModelRegistry:
+    """Loads each artefact once and caches the predictors built on top of
+    them. Temperature predictors are keyed by their whole section of the
+    run configuration."""
+
+    def __init__(self, keras_dir: str = KERAS_DIR, config_dir: str = CONFIG_DIR):
+        self._keras_dir = keras_dir
+        self._config_dir = config_dir
+        self._lock = RLock()
+        # Un lock per artefacte o predictor: dues càrregues del mateix no es repeteixen
+        self._loading: dict[str, Lock] = {}
+        self._artifacts: dict[str, object] = {}
+        self._stats: dict[str, ArtifactStats] = {}
+        self._temperature: dict[str, object] = {}
+        self._temperature_models: dict[str, str] = {}
+        self._demand: dict[str, object] = {}
+        self._demand_models: dict[str, str] = {}
+
+    def __repr__(self) -> str:
+        return "\n\t".join(
+            [f"Class: {self.__class__.__name__}"]
+            + [f"{name}: {s.to_dict()}" for name, s in self._stats.items()]
+        )
+
+    def _load_lock(self, name: str) -> Lock:
+        with self._lock:
+            return self._loading.setdefault(name, Lock())
+
+    def _get(self, name: str, loader):
+        with self._lock:
+            if name in self._artifacts:
+                return self._artifacts[name]
+
+        with self._load_lock(name):
+            # Un altre fil l'ha carregat mentre esperàvem
+            with self._lock:
+                if name in self._artifacts:
+                    return self._artifacts[name]
+
+            rss_before = process_rss()
+            start = time.perf_counter()
+            artifact = loader()
+            stats = ArtifactStats(
+                name=name,
+                load_seconds=time.perf_counter() - start,
+                rss_bytes=max(process_rss() - rss_before, 0),
+            )
+            logger.info(f"Loaded {name} {stats.to_dict()}")
+
+            with self._lock:
+                self._artifacts[name] = artifact
+                self._stats[name] = stats
+            return artifact
+
+    def _build(self, kind: str, built: dict, key: str, builder):
+        """Predictor `key` of `built`, built outside the registry lock"""
+        with self._lock:
+            if key in built:
+                return built[key]
+
+        with self._load_lock(f"{kind}:{key}"):
+            with self._lock:
+                if key in built:
+                    return built[key]
+            predictor = builder()
+            with self._lock:
+                built[key] = predictor
+            return predictor
+
+    def model(self, model_name: str):
+        """Keras model stored in the keras folder, loaded without compiling"""
+
+        def _load():
+            import tensorflow as tf
+
+            return tf.keras.models.load_model(
+                os.path.join(self._keras_dir, model_name), compile=False
+            )
+
+        return self._get(model_name, _load)
+
+    def tflite_model(self, file_name: str):
+        """TFLite flatbuffer converted with `python -m api.rce_predictors.tflite`"""
+        path = os.path.join(self._keras_dir, file_name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"{path} not found, convert the model with "
+                f"`python -m api.rce_predictors.tflite`"
+            )
+        return self._get(file_name, lambda: TFLiteModel(path))
+
+    @staticmethod
+    def model_file(model_name: str, config: dict = None) -> str:
+        """Artefact served for `model_name` with the backend chosen in a
+        configuration section: `"backend"` is "keras" (default) or "tflite",
+        and `"tflite-model"` optionally names the flatbuffer (by default
+        modelo.keras -> modelo.tflite)"""
+        config = config or {}
+        backend = config.get("backend", KERAS_BACKEND)
+        if backend == KERAS_BACKEND:
+            return model_name
+        if backend == TFLITE_BACKEND:
+            return config.get("tflite-model") or tflite_name(model_name)
+        raise ValueError(f"Unknown inference backend {backend}")
+
+    def backend_model(self, model_name: str, config: dict = None):
+        """Keras model or TFLiteModel, as chosen by `model_file`"""
+        file_name = self.model_file(model_name, config)
+        if file_name.endswith(".tflite"):
+            return self.tflite_model(file_name)
+        return self.model(file_name)
+
+    def scaler(self, scaler_name: str):
+        """Scaler pickled with joblib during training"""
+        return self._get(
+            scaler_name,
+            lambda: joblib.load(os.path.join(self._keras_dir, scaler_name)),
+        )
+
+    def pipelines(self, config_name: str = POSTPROCESS_CONFIG):
+        """MultiPipeline built from the given configuration file"""
+        from api.rce_predictors.config.pipelines import MultiPipeline
+
+        return self._get(
+            config_name,
+            lambda: MultiPipeline().load_config(
+                os.path.join(self._config_dir, config_name)
+            ),
+        )
+
+    def temperature(self, temperature_config: dict):
+        """Already built TemperaturePredictor for the configured model"""
+        from api.rce_predictors.config.window_predictor import WindowPredictor
+        from api.rce_predictors.temperature_predictor import TemperaturePredictor
+
+        model_name = self.model_file(temperature_config["model-name"], temperature_config)
+        key = config_key(temperature_config)
+
+        def _build():
+            x_scaler, y_scaler = (self.scaler(s) for s in TEMPERATURE_SCALERS)
+            predictor = TemperaturePredictor(
+                window_predictor=WindowPredictor(
+                    model=self.backend_model(temperature_config["model-name"], temperature_config),
+                    input_width=int(temperature_config["input"]),
+                    label_width=int(temperature_config["output"]),
+                    shift=int(temperature_config["shift"]),
+                    column_indices=temperature_config["column-indices"],
+                    label_columns=temperature_config["labels"],
+                ),
+                postprocess_pipelines=self.pipelines(),
+                x_scaler=x_scaler,
+                y_scaler=y_scaler,
+            )
+            with self._lock:
+                self._temperature_models[key] = model_name
+            return predictor
+
+        return self._build("temperature", self._temperature, key, _build)
+
+    def demand(self, demand_config: dict = None):
+        """Already built DemandPredictor for the configured backend"""
+        from api.rce_predictors.demand_predictor import DemandPredictor
+
+        model_name = self.model_file(DEMAND_MODEL, demand_config)
+        key = config_key(demand_config or {})
+
+        def _build():
+            x_scaler, y_scaler = (self.scaler(s) for s in DEMAND_SCALERS)
+            predictor = DemandPredictor(
+                demand_path=(demand_config or {}).get("filepath"),
+                date_format="%Y-%m-%d %H:%M",
+                model=self.backend_model(DEMAND_MODEL, demand_config),
+                x_scaler=x_scaler,
+                y_scaler=y_scaler,
+            )
+            with self._lock:
+                self._demand_models[key] = model_name
+            return predictor
+
+        return self._build("demand", self._demand, key, _build)
+
+    def load(self, run_config: dict) -> "ModelRegistry":
+        """Loads every artefact needed by the given run configuration
+
+        Args:
+            run_config (dict): content of run-info.json
+
+        Returns:
+            ModelRegistry: self
+        """
+        start = time.perf_counter()
+        self.temperature(run_config["temperature"])
+        self.demand(run_config.get("demand"))
+        logger.info(
+            f"Model registry ready in {time.perf_counter() - start:.2f}s "
+            f"(RSS {process_rss() / 2**20:.1f} MB)"
+        )
+        return self
+
+    def prepare(self, old_config: dict, new_config: dict) -> None:
+        """ConfigWatcher hook: loads what a changed run configuration needs
+        before it is published, and drops the predictors of neither of them"""
+        start = time.perf_counter()
+        self.temperature(new_config["temperature"])
+        self.demand(new_config.get("demand"))
+
+        with self._lock:
+            self._evict(
+                self._temperature,
+                self._temperature_models,
+                {config_key(old_config["temperature"]), config_key(new_config["temperature"])},
+            )
+            self._evict(
+                self._demand,
+                self._demand_models,
+                {config_key(old_config.get("demand") or {}), config_key(new_config.get("demand") or {})},
+            )
+        logger.info(
+            f"Model registry prepared for "
+            f"{new_config['temperature']['model-name']} in {time.perf_counter() - start:.2f}s"
+        )
+
+    def _evict(self, built: dict, models: dict, keep: set) -> None:
+        """Drops the predictors of `built` whose key is not in `keep`, and the
+        models no other predictor uses. Called with the registry lock held"""
+        for key in [k for k in built if k not in keep]:
+            del built[key]
+            model_name = models.pop(key, None)
+            in_use = {*self._temperature_models.values(), *self._demand_models.values()}
+            if model_name is not None and model_name not in in_use:
+                self._artifacts.pop(model_name, None)
+                self._stats.pop(model_name, None)
+                logger.info(f"Unloaded {model_name}")
+
+    def stats(self) -> dict:
+        """Load time and memory of every loaded artefact"""
+        with self._lock:
+            return {name: s.to_dict() for name, s in self._stats.items()}
+
+
+registry = ModelRegistry()
@@ -0,0 +1,144 @@
+"""Autoregressive rollout of a window model.
+
+The window predictor forecasts one step (the label columns) from the last
+`input_width` rows. To cover the whole horizon the prediction is written back
+into a new row, whose remaining (exogenous) columns come from the forecast,
+and the window slides one position.
+
+The model works in the space of the training scalers. Given their affine maps
+(`api.rce_predictors.scaling`), the engine takes the window and the forecast
+rows unscaled, scales both inside the graph, feeds each prediction back in
+the input space and returns unscaled predictions.
+"""
+
+import numpy as np
+import tensorflow as tf
+
+from api.rce_predictors.scaling import Affine
+
+
+def label_scatter(label_indices: list[int], n_features: int) -> np.ndarray:
+    """Matrix (labels, features) that places each predicted label in its
+    column of a window row"""
+    scatter = np.zeros((len(label_indices), n_features), dtype=np.float32)
+    for i, col in enumerate(label_indices):
+        scatter[i, col] = 1.0
+    return scatter
+
+
+class RolloutEngine:
+    """Runs the whole rollout inside a single `tf.function`.
+
+    The window is a fixed size (batch, input_width, features) tensor that
+    slides inside a `tf.while_loop`, so a 192 step horizon costs one graph
+    call instead of 192 `model.predict` dispatches and DataFrame rebuilds.
+    """
+
+    def __init__(
+        self,
+        model,
+        label_indices: list[int],
+        n_features: int,
+        x_affine: Affine = None,
+        y_affine: Affine = None,
+    ):
+        self._model = model
+        self._label_indices = list(label_indices)
+        self._n_features = n_features
+
+        scatter = label_scatter(self._label_indices, n_features)
+        self._scatter = tf.constant(scatter)
+        self._keep = tf.constant(1.0 - scatter.sum(axis=0))
+
+        # Sense escaladors les entrades ja arriben escalades
+        x_affine = x_affine or Affine.identity(n_features)
+        y_affine = y_affine or Affine.identity(len(self._label_indices))
+        feedback = x_affine.select(self._label_indices).after_inverse(y_affine)
+        self._x_scale, self._x_offset = tf.constant(x_affine.scale), tf.constant(x_affine.offset)
+        self._y_scale, self._y_offset = tf.constant(y_affine.scale), tf.constant(y_affine.offset)
+        self._fb_scale, self._fb_offset = tf.constant(feedback.scale), tf.constant(feedback.offset)
+
+        self._rollout = tf.function(
+            self._rollout_graph,
+            input_signature=[
+                tf.TensorSpec(shape=[None, None, n_features], dtype=tf.float32),
+                tf.TensorSpec(shape=[None, None, n_features], dtype=tf.float32),
+            ],
+        )
+
+    def __repr__(self) -> str:
+        return "\n\t".join(
+            [
+                f"Class: {self.__class__.__name__}",
+                f"Label indices: {self._label_indices}",
+                f"Features: {self._n_features}",
+            ]
+        )
+
+    def _rollout_graph(self, window, exogenous):
+        horizon = tf.shape(exogenous)[1]
+        predictions = tf.TensorArray(tf.float32, size=horizon)
+        window = window * self._x_scale + self._x_offset
+        exogenous = exogenous * self._x_scale + self._x_offset
+
+        def step(i, window, predictions):
+            pred = self._model(window, training=False)
+            predictions = predictions.write(i, pred)
+            feedback = pred * self._fb_scale + self._fb_offset
+            row = exogenous[:, i, :] * self._keep + tf.matmul(feedback, self._scatter)
+            window = tf.concat([window[:, 1:, :], row[:, tf.newaxis, :]], axis=1)
+            return i + 1, window, predictions
+
+        _, _, predictions = tf.while_loop(
+            lambda i, *_: i < horizon,
+            step,
+            (tf.constant(0), window, predictions),
+            shape_invariants=(
+                tf.TensorShape([]),
+                tf.TensorShape([None, None, self._n_features]),
+                tf.TensorShape(None),
+            ),
+        )
+        # (horizon, batch, labels) -> (batch, horizon, labels)
+        predictions = tf.transpose(predictions.stack(), [1, 0, 2])
+        return (predictions - self._y_offset) / self._y_scale
+
+    def predict(self, window: np.ndarray, exogenous: np.ndarray) -> np.ndarray:
+        """Rolls the model over the horizon given by `exogenous`
+
+        Args:
+            window (np.ndarray): input windows (batch, input_width, features),
+                unscaled if the engine has scalers
+            exogenous (np.ndarray): rows to append at each step
+                (batch, horizon, features), label columns are ignored
+
+        Returns:
+            np.ndarray: predictions (batch, horizon, labels), unscaled if the
+                engine has scalers
+        """
+        return self._rollout(
+            tf.convert_to_tensor(window, dtype=tf.float32),
+            tf.convert_to_tensor(exogenous, dtype=tf.float32),
+        ).numpy()
+
+
+def stepwise_rollout(
+    model,
+    window: np.ndarray,
+    exogenous: np.ndarray,
+    label_indices: list[int],
+) -> np.ndarray:
+    """Reference rollout with one `model.predict` per step, as the original
+    TemperaturePredictor loop did. Kept for parity checks and benchmarks.
+
+    Same arguments and result as `RolloutEngine.predict`.
+    """
+    window = np.array(window, dtype=np.float32)
+    predictions = []
+    for i in range(exogenous.shape[1]):
+        pred = model.predict(tf.convert_to_tensor(window), verbose=0)
+        predictions.append(pred)
+        row = np.array(exogenous[:, i, :], dtype=np.float32)
+        row[:, label_indices] = pred
+        window = np.concatenate([window[:, 1:, :], row[:, np.newaxis, :]], axis=1)
+    return np.stack(predictions, axis=1)
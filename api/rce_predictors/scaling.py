@@ -0,0 +1,75 @@
+"""Scalers of the training data as scale/offset arrays.
+
+The sklearn scalers saved with the models (StandardScaler) are per-feature
+affine maps. Precomputing them once lets the predictors scale inputs and
+unscale outputs with array operations next to the model call, and lets the
+rollout run entirely in scaled space without calling sklearn at every request.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Affine:
+    """x -> x * scale + offset, feature by feature"""
+
+    scale: np.ndarray
+    offset: np.ndarray
+
+    @classmethod
+    def identity(cls, n_features: int) -> "Affine":
+        return cls(
+            scale=np.ones(n_features, dtype=np.float32),
+            offset=np.zeros(n_features, dtype=np.float32),
+        )
+
+    @classmethod
+    def from_scaler(cls, scaler) -> "Affine":
+        """Affine map of a fitted sklearn scaler, read from its `transform`
+
+        Raises:
+            ValueError: if the scaler is not affine per feature
+        """
+        n_features = scaler.n_features_in_
+        probe = np.vstack(
+            [np.zeros(n_features), np.ones(n_features), np.full(n_features, 3.0)]
+        )
+        zero, one, three = scaler.transform(probe)
+        offset = zero
+        scale = one - zero
+        if not np.allclose(three, 3.0 * scale + offset):
+            raise ValueError(f"{type(scaler).__name__} is not an affine scaler")
+        return cls(scale=scale.astype(np.float32), offset=offset.astype(np.float32))
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """Same as `scaler.transform`"""
+        return np.asarray(x, dtype=np.float32) * self.scale + self.offset
+
+    def inverse(self, y: np.ndarray) -> np.ndarray:
+        """Same as `scaler.inverse_transform`"""
+        return (np.asarray(y, dtype=np.float32) - self.offset) / self.scale
+
+    def select(self, indices: list[int]) -> "Affine":
+        """Affine map of some features only"""
+        return Affine(scale=self.scale[indices], offset=self.offset[indices])
+
+    def after_inverse(self, other: "Affine") -> "Affine":
+        """Map from the space of `other` to this one: `self.forward(other.inverse(y))`"""
+        scale = self.scale / other.scale
+        return Affine(scale=scale, offset=self.offset - other.offset * scale)
+
+
+class ScaledModel:
+    """Model that takes and returns unscaled values: the input scaler, the
+    model and the inverse output scaler in a single call"""
+
+    def __init__(self, model, x_affine: Affine, y_affine: Affine):
+        self.model = model
+        self.x_affine = x_affine
+        self.y_affine = y_affine
+
+    def __call__(self, x, training: bool = False) -> np.ndarray:
+        y = self.model(self.x_affine.forward(x), training=False)
+        return self.y_affine.inverse(np.asarray(y))
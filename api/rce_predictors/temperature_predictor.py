@@ -1,41 +1,64 @@
 import os
 import joblib
-import matplotlib as mpl
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import tensorflow as tf
-from datetime import datetime, timedelta
+from datetime import datetime
 from api.rce_predictors.base_predictor import IDatedPredictor
-from api.rce_predictors.config.pipelines import MultiPipeline
-from api.rce_predictors.config.window_predictor import WindowPredictor
 from api.rce_predictors.config.rce.fut import get_fut_val
+from api.utils import features
+from api.utils.schemas import FEATURES, Entry, window_values
 import logging
 
-
-mpl.rcParams["figure.figsize"] = (8, 6)
-mpl.rcParams["axes.grid"] = False
+# TensorFlow (rollout), sklearn/dill (pipelines) i WindowPredictor es carreguen
+# quan es construeix el predictor, no en importar el mòdul
 
 logger = logging.getLogger(__name__)
 
-# Carreguem els escaladors guardats durant entrenament
+# Nombre de passos de 15 minuts que es prediuen (48 hores)
+HORIZON = 192
+
+# Columnes que cada escenari pot planificar pas a pas
+SCHEDULE_COLUMNS = ("mode", "reset_cold", "reset_hot")
+
+# Escaladors guardats durant entrenament
 y_path = os.path.join(os.path.dirname(__file__), r'keras/y_scaler.pkl')
-y_scaler = joblib.load(y_path)
 x_path = os.path.join(os.path.dirname(__file__), r'keras/x_scaler.pkl')
-x_scaler = joblib.load(x_path)
-logger.info("Loaded scalers")
+
+
+def load_scalers():
+    x_scaler = joblib.load(x_path)
+    y_scaler = joblib.load(y_path)
+    logger.info("Loaded scalers")
+    return x_scaler, y_scaler
 
 
 class TemperaturePredictor(IDatedPredictor):
     def __init__(
         self,
-        window_predictor: WindowPredictor,
-        postprocess_pipelines_filepath: str,
+        window_predictor: "WindowPredictor",
+        postprocess_pipelines_filepath: str = None,
+        postprocess_pipelines: "MultiPipeline" = None,
+        x_scaler=None,
+        y_scaler=None,
     ):
         self._predictor = window_predictor
-        self._postprocess_pipelines = MultiPipeline().load_config(
-            postprocess_pipelines_filepath
-        )
+        if postprocess_pipelines is None:
+            from api.rce_predictors.config.pipelines import MultiPipeline
+
+            postprocess_pipelines = MultiPipeline().load_config(
+                postprocess_pipelines_filepath
+            )
+        self._postprocess_pipelines = postprocess_pipelines
+        if x_scaler is None or y_scaler is None:
+            x_scaler, y_scaler = load_scalers()
+        self._x_scaler = x_scaler
+        self._y_scaler = y_scaler
+        self._rollout = None
+
+    @property
+    def x_scaler(self):
+        """Scaler of the input window, fitted on the training data"""
+        return self._x_scaler
 
     def __repr__(self) -> str:
         return "\n\t".join(
@@ -50,65 +73,162 @@ class TemperaturePredictor(IDatedPredictor):
         parameters: pd.DataFrame,
         do_plot=False,
         plot_path="",
+        fut_val: list[dict] = None,
+        fetch_forecast: bool = False,
     ):
-        df = pd.DataFrame([entry.dict() for entry in parameters.data])
-        input_width = self._predictor.input_width
-        label_columns = self._predictor.label_columns
+        columns, window, exogenous = self._prepare(parameters, fut_val, fetch_forecast)
 
-        current_window = df.iloc[-input_width:].copy()
-
-        original_shape = current_window.shape
-        current_scaled = x_scaler.transform(current_window.values.reshape(-1, original_shape[1]))
-        current_window = pd.DataFrame(
-            current_scaled.reshape(original_shape),
-            columns=df.columns
-        )
+        logger.info("START Temperature Prediction")
 
-        fut_val = get_fut_val()
+        predictions = self._engine(columns).predict(
+            window[np.newaxis], exogenous[np.newaxis]
+        )[0]
 
-        predictions = []
-        date = datetime.now()
+        df_preds = self._postprocess(predictions)
+        logger.debug(df_preds["hot"])
+        return df_preds
 
-        logger.info("START Temperature Prediction")
+    def predict_batch(
+        self,
+        parameters: pd.DataFrame,
+        scenarios: list[dict],
+        fut_val: list[dict] = None,
+        fetch_forecast: bool = False,
+    ) -> list[pd.DataFrame]:
+        """Predicts the tank temperatures for several operating plans in a
+        single batched rollout.
+
+        Args:
+            parameters (EntryList): base window, shared by every scenario
+            scenarios (list[dict]): one dict per scenario with the optional
+                keys `mode`, `reset_cold` and `reset_hot`, each a value for
+                the whole horizon or a list with one value per step. Missing
+                keys keep the value of the first entry, as `predict` does.
+            fut_val (list[dict], optional): forecast already fetched.
+            fetch_forecast (bool, optional): call `get_fut_val` when `fut_val`
+                is missing. Only for callers outside the API, /predict always
+                passes the prefetched forecast.
+
+        Returns:
+            list[pd.DataFrame]: one prediction per scenario, as `predict`
+        """
+        columns, window, exogenous = self._prepare(parameters, fut_val, fetch_forecast)
+
+        batch_exogenous = np.repeat(exogenous[np.newaxis], len(scenarios), axis=0)
+        for k, scenario in enumerate(scenarios):
+            for col in SCHEDULE_COLUMNS:
+                if scenario.get(col) is not None:
+                    batch_exogenous[k, :, columns.index(col)] = scenario[col]
+        batch_window = np.repeat(window[np.newaxis], len(scenarios), axis=0)
+
+        logger.info(f"START Temperature Prediction ({len(scenarios)} scenarios)")
+
+        predictions = self._engine(columns).predict(batch_window, batch_exogenous)
+        return [self._postprocess(p) for p in predictions]
+
+    def _prepare(
+        self, parameters, fut_val=None, fetch_forecast=False
+    ) -> tuple[list[str], np.ndarray, np.ndarray]:
+        # La previsió només es demana a la xarxa si es diu explícitament
+        if fut_val is None:
+            if not fetch_forecast:
+                raise ValueError("fut_val is required unless fetch_forecast=True")
+            fut_val = get_fut_val()
+
+        # EntryList, ScenarioList o EntryArray (payload columnar o binari)
+        values = window_values(parameters)
+        columns = list(FEATURES)
+
+        # Sense escalar: l'escalat es fa dins del rollout
+        current_window = values[-self._predictor.input_width:].astype(np.float32)
+
+        exogenous = build_exogenous(
+            columns=columns,
+            fut_val=fut_val,
+            first_entry=Entry(**dict(zip(columns, map(float, values[0])))),
+            start=datetime.now(),
+            horizon=HORIZON,
+        )
+        return columns, current_window, exogenous
 
-        for i in range(192):
-            input_array = np.expand_dims(current_window.values, axis=0)
-            tensor = tf.convert_to_tensor(input_array, dtype=tf.float32)
-
-            pred = self._predictor.model.predict(tensor, verbose=0).squeeze()
-            predictions.append(pred)
-            new_row = current_window.iloc[-1].copy()
-            for i, col in enumerate(label_columns):
-                new_row[col] = pred[i]
-
-            curr = fut_val[i]
-            year = date.year
-            seconds_in_day = 24 * 60 * 60
-            time_seconds = date.hour * 3600 + date.minute * 60 + date.second
-            new_row["solar_rad_w_m2"] = curr["solar_radiation"]
-            new_row["ir_rad_w_m2"] = curr["radiation_infrared"]
-            new_row["wind_vel_m_s"] = curr["wind_speed"]
-            new_row["day_sin"] = np.sin(2 * np.pi * time_seconds / seconds_in_day)
-            new_row["day_cos"] = np.cos(2 * np.pi * time_seconds / seconds_in_day)
-            new_row["year_sin"] = np.sin(2 * np.pi * year / 365)
-            new_row["year_cos"] = np.cos(2 * np.pi * year / 365)
-            new_row["mode"] = parameters.data[0].mode
-            new_row["reset_cold"] = parameters.data[0].reset_cold
-            new_row["reset_hot"] = parameters.data[0].reset_hot
-            date = date + timedelta(minutes=15)
-            current_window = pd.concat([current_window, pd.DataFrame([new_row])], ignore_index=True)
-            current_window = current_window.iloc[1:]
-
-        predictions = np.array(predictions)
-        pred_desnormalitzades = y_scaler.inverse_transform(predictions)
-        df_preds = pd.DataFrame(pred_desnormalitzades, columns=label_columns)
-        print(df_preds["hot"])
+    def _postprocess(self, predictions: np.ndarray) -> pd.DataFrame:
+        df_preds = pd.DataFrame(
+            predictions, columns=self._predictor.label_columns
+        )
 
         s = df_preds['hot']
         df_preds['hot'] = s[0] + 2.75 * (s - s[0])
 
         return df_preds
 
+    def _engine(self, columns) -> "RolloutEngine":
+        if self._rollout is None:
+            from api.rce_predictors.scaling import Affine
+            from api.rce_predictors.tflite import TFLiteModel, TFLiteRollout
+
+            # Models TFLite: bucle d'invocacions de l'intèrpret en lloc del graf
+            if isinstance(self._predictor.model, TFLiteModel):
+                engine = TFLiteRollout
+            else:
+                from api.rce_predictors.rollout import RolloutEngine as engine
+
+            self._rollout = engine(
+                self._predictor.model,
+                label_indices=[
+                    list(columns).index(col) for col in self._predictor.label_columns
+                ],
+                n_features=len(columns),
+                x_affine=Affine.from_scaler(self._x_scaler),
+                y_affine=Affine.from_scaler(self._y_scaler),
+            )
+        return self._rollout
+
+
+def build_exogenous(
+    columns: list[str],
+    fut_val: list[dict],
+    first_entry,
+    start: datetime,
+    horizon: int = HORIZON,
+) -> np.ndarray:
+    """Precomputes the rows appended to the window at every rollout step.
+
+    Label columns are left at 0, the rollout fills them with the predictions.
+
+    Args:
+        columns (list[str]): window columns, in model order
+        fut_val (list[dict]): forecast from `get_fut_val`
+        first_entry (Entry): first entry of the request, source of the
+            mode and reset values
+        start (datetime): instant of the first predicted step
+        horizon (int): number of 15 minute steps
+
+    Returns:
+        np.ndarray: exogenous rows (horizon, features)
+    """
+    # Cada pas fa servir la fila de la previsió del seu instant; passat el
+    # final de la previsió es repeteix l'última fila. (El bucle original
+    # sobreescrivia `i` amb l'índex de les etiquetes i tots els passos feien
+    # servir fut_val[1].)
+    rows = [fut_val[min(i, len(fut_val) - 1)] for i in range(horizon)]
+
+    # year_sin/year_cos amb el dia de l'any (abans es feia servir l'any)
+    dates = np.datetime64(start, "s") + np.arange(horizon) * np.timedelta64(15, "m")
+    return features.build_matrix(
+        dates,
+        {
+            "solar_rad_w_m2": [row["solar_radiation"] for row in rows],
+            "ir_rad_w_m2": [row["radiation_infrared"] for row in rows],
+            "wind_vel_m_s": [row["wind_speed"] for row in rows],
+            "mode": first_entry.mode,
+            "reset_cold": first_entry.reset_cold,
+            "reset_hot": first_entry.reset_hot,
+        },
+        columns=columns,
+        fill=0,
+        dtype=np.float32,
+    )
+
 
 def load(json_path):
     import json
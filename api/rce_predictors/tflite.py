@@ -0,0 +1,250 @@
+"""TFLite inference backend for the temperature and demand models.
+
+The `.keras` files are converted offline into TFLite flatbuffers next to them:
+
+    python -m api.rce_predictors.tflite modelo.keras modelo_dem_fin.keras [--quantize float16|dynamic]
+
+and the run configuration chooses the backend of each model
+(`"backend": "tflite"` in the `temperature` or `demand` section). A
+`TFLiteModel` is called like a Keras model (`model(x, training=False)`), so
+`DemandPredictor` uses it as is, and `TFLiteRollout` replaces the
+`RolloutEngine` graph with a loop of interpreter calls.
+
+The interpreter comes from `ai_edge_litert` or `tflite_runtime` when they are
+installed, so serving does not need to import TensorFlow; otherwise
+`tf.lite.Interpreter` is used.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from api.rce_predictors.scaling import Affine
+
+logger = logging.getLogger(__name__)
+
+KERAS_BACKEND = "keras"
+TFLITE_BACKEND = "tflite"
+BACKENDS = (KERAS_BACKEND, TFLITE_BACKEND)
+
+QUANTIZATIONS = ("float16", "dynamic")
+
+
+def tflite_name(model_name: str, quantize: str = None) -> str:
+    """File name of the converted model: modelo.keras -> modelo.tflite,
+    modelo.f16.tflite or modelo.dyn.tflite"""
+    stem = os.path.splitext(model_name)[0]
+    suffix = {None: "", "float16": ".f16", "dynamic": ".dyn"}[quantize]
+    return f"{stem}{suffix}.tflite"
+
+
+def interpreter_class():
+    """Lightest TFLite interpreter available"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+
+        return Interpreter
+    except ImportError:
+        pass
+
+    import tensorflow as tf
+
+    return tf.lite.Interpreter
+
+
+def convert(model, quantize: str = None) -> bytes:
+    """Converts a Keras model into a TFLite flatbuffer
+
+    Recurrent models only convert with a static batch, so models whose input
+    has more than two dimensions are exported with batch 1 (`TFLiteModel`
+    runs bigger batches in chunks); dense models keep a dynamic batch.
+
+    Args:
+        model (keras.Model): model to convert
+        quantize (str, optional): None, "float16" (float16 weights) or
+            "dynamic" (int8 weights, dynamic range). Defaults to None.
+
+    Returns:
+        bytes: TFLite flatbuffer
+    """
+    import tensorflow as tf
+
+    if quantize is not None and quantize not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization {quantize}, expected one of {QUANTIZATIONS}")
+
+    input_shape = list(model.input_shape)
+    input_shape[0] = 1 if len(input_shape) > 2 else None
+
+    export_dir = tempfile.mkdtemp()
+    try:
+        model.export(
+            export_dir,
+            format="tf_saved_model",
+            input_signature=[tf.TensorSpec(input_shape, tf.float32)],
+            verbose=False,
+        )
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        if quantize is not None:
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantize == "float16":
+            converter.target_spec.supported_types = [tf.float16]
+        return converter.convert()
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+def convert_file(keras_path: str, out_path: str = None, quantize: str = None) -> str:
+    """Converts a `.keras` file, by default next to it
+
+    Returns:
+        str: path of the written `.tflite` file
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_path, compile=False)
+    if out_path is None:
+        out_path = os.path.join(
+            os.path.dirname(keras_path), tflite_name(os.path.basename(keras_path), quantize)
+        )
+    content = convert(model, quantize)
+    with open(out_path, "wb") as f:
+        f.write(content)
+    logger.info(f"Converted {keras_path} -> {out_path} ({len(content) / 2**10:.1f} KiB)")
+    return out_path
+
+
+class TFLiteModel:
+    """TFLite interpreter with the call convention of a Keras model.
+
+    An interpreter is not thread safe: calls are serialised with a lock.
+    """
+
+    def __init__(self, model_path: str = None, model_content: bytes = None, num_threads: int = None):
+        if (model_path is None) == (model_content is None):
+            raise ValueError("Give either model_path or model_content")
+        self.model_path = model_path
+        self._interpreter = interpreter_class()(
+            model_path=model_path, model_content=model_content, num_threads=num_threads
+        )
+        self._interpreter.allocate_tensors()
+
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        signature = self._input["shape_signature"]
+        # Lot fix (models recurrents): les entrades es parteixen en trossos
+        self._fixed_batch = int(signature[0]) if signature[0] > 0 else None
+        self._batch = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+        self.input_shape = tuple(None if i == 0 else int(d) for i, d in enumerate(signature))
+        self.output_shape = tuple(
+            None if i == 0 else int(d) for i, d in enumerate(self._output["shape_signature"])
+        )
+
+    def __repr__(self) -> str:
+        return "\n\t".join(
+            [
+                f"Class: {self.__class__.__name__}",
+                f"Path: {self.model_path}",
+                f"Input: {self.input_shape}",
+                f"Fixed batch: {self._fixed_batch}",
+            ]
+        )
+
+    def _invoke(self, x: np.ndarray) -> np.ndarray:
+        if x.shape[0] != self._batch:
+            self._interpreter.resize_tensor_input(self._input["index"], x.shape)
+            self._interpreter.allocate_tensors()
+            self._batch = x.shape[0]
+        self._interpreter.set_tensor(self._input["index"], x)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output["index"]).copy()
+
+    def __call__(self, x, training: bool = False) -> np.ndarray:
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        with self._lock:
+            if self._fixed_batch is None:
+                return self._invoke(x)
+            chunks = [
+                self._invoke(x[i:i + self._fixed_batch])
+                for i in range(0, len(x), self._fixed_batch)
+            ]
+        return np.concatenate(chunks, axis=0)
+
+    def predict(self, x, verbose: int = 0) -> np.ndarray:
+        return self(x)
+
+
+class TFLiteRollout:
+    """Same rollout as `RolloutEngine`, as a loop of interpreter calls on
+    numpy arrays (TFLite has no graph to fuse the loop into)"""
+
+    def __init__(
+        self,
+        model: TFLiteModel,
+        label_indices: list[int],
+        n_features: int,
+        x_affine: Affine = None,
+        y_affine: Affine = None,
+    ):
+        self._model = model
+        self._label_indices = list(label_indices)
+        self._n_features = n_features
+
+        self._x_affine = x_affine or Affine.identity(n_features)
+        self._y_affine = y_affine or Affine.identity(len(self._label_indices))
+        self._feedback = self._x_affine.select(self._label_indices).after_inverse(self._y_affine)
+
+    def __repr__(self) -> str:
+        return "\n\t".join(
+            [
+                f"Class: {self.__class__.__name__}",
+                f"Label indices: {self._label_indices}",
+                f"Features: {self._n_features}",
+            ]
+        )
+
+    def predict(self, window: np.ndarray, exogenous: np.ndarray) -> np.ndarray:
+        """Same arguments and result as `RolloutEngine.predict`"""
+        window = self._x_affine.forward(window)
+        exogenous = self._x_affine.forward(exogenous)
+        batch, horizon = exogenous.shape[:2]
+
+        predictions = np.empty((batch, horizon, len(self._label_indices)), dtype=np.float32)
+        for i in range(horizon):
+            pred = self._model(window)
+            predictions[:, i] = pred
+            window[:, :-1] = window[:, 1:]
+            window[:, -1] = exogenous[:, i]
+            window[:, -1, self._label_indices] = self._feedback.forward(pred)
+        return self._y_affine.inverse(predictions)
+
+
+def main():
+    from api.rce_predictors.registry import KERAS_DIR
+
+    parser = argparse.ArgumentParser(description="Converts Keras models into TFLite flatbuffers")
+    parser.add_argument("models", nargs="+", help="model file names in the keras folder, or paths")
+    parser.add_argument("--quantize", choices=QUANTIZATIONS, default=None)
+    parser.add_argument("--keras-dir", default=KERAS_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for model in args.models:
+        path = model if os.path.exists(model) else os.path.join(args.keras_dir, model)
+        print(convert_file(path, quantize=args.quantize))
+
+
+if __name__ == "__main__":
+    main()
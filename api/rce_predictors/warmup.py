@@ -0,0 +1,134 @@
+"""Warm-up of the prediction pipeline and readiness of the API.
+
+Loading the artefacts is not enough for a fast first request: the rollout
+graph is traced and the Keras models build their call functions on their
+first call. `warm_up` runs a synthetic 24 row window through temperature,
+demand and production without touching the network, and `Readiness` lets
+/health and /predict know when that is done.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from api.rce_predictors.config.rce.specs import RceSpecs
+from api.rce_predictors.future.open import FEATURES_24H
+from api.rce_predictors.production_predictor import ProductionPredictor
+from api.utils.schemas import Entry, EntryList
+
+logger = logging.getLogger(__name__)
+
+# Temps màxim que /predict espera que l'API estigui a punt (segons)
+READY_TIMEOUT = 120
+
+
+def synthetic_entries(x_scaler, n_rows: int) -> EntryList:
+    """Window of `n_rows` entries at the mean of the training data"""
+    columns = list(Entry.model_fields)
+    means = getattr(x_scaler, "mean_", np.zeros(len(columns)))
+    row = dict(zip(columns, map(float, means)))
+    return EntryList(data=[Entry(**row) for _ in range(n_rows)])
+
+
+def synthetic_fut_val(steps: int = 8) -> list[dict]:
+    now = datetime.now()
+    return [
+        {
+            "time": (now + timedelta(minutes=15 * i)).strftime("%Y-%m-%d %H:%M"),
+            "wind_speed": 0.0,
+            "solar_radiation": 0.0,
+            "radiation_infrared": 300.0,
+        }
+        for i in range(steps)
+    ]
+
+
+def synthetic_forecast_24h() -> pd.DataFrame:
+    # Índex fora de qualsevol previsió real perquè no ocupi la memòria de demanda
+    index = pd.date_range("2000-01-01", periods=24, freq="h", name="time")
+    return pd.DataFrame(np.zeros((24, len(FEATURES_24H))), columns=FEATURES_24H, index=index)
+
+
+def warm_up(registry, run_config) -> dict[str, float]:
+    """Runs every prediction stage once with synthetic data
+
+    Args:
+        registry (ModelRegistry): registry with the artefacts to warm up
+        run_config (dict): run configuration
+
+    Returns:
+        dict[str, float]: seconds spent on each stage
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    temperature = registry.temperature(run_config["temperature"])
+    entries = synthetic_entries(temperature.x_scaler, int(run_config["temperature"]["input"]))
+    t_pred = temperature.predict(entries, fut_val=synthetic_fut_val())
+    timings["temperature"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    registry.demand(run_config.get("demand")).predict(synthetic_forecast_24h())
+    timings["demand"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = list(run_config["temperature"]["labels"])
+    current = pd.DataFrame([[getattr(entries.data[-1], label) for label in labels]], columns=labels)
+    ProductionPredictor(RceSpecs(**run_config["rce-specs"])).predict(
+        pd.concat([current, t_pred[labels]], ignore_index=True)
+    )
+    timings["production"] = time.perf_counter() - start
+
+    return timings
+
+
+class Readiness:
+    """Startup state of the API: starting -> ready | failed"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.error: str = None
+        self.profile: dict = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._event.is_set() and self.error is None
+
+    @property
+    def status(self) -> str:
+        if not self._event.is_set():
+            return "starting"
+        return "failed" if self.error else "ready"
+
+    def wait(self, timeout: float = READY_TIMEOUT) -> bool:
+        self._event.wait(timeout)
+        return self.ready
+
+    def run(self, startup) -> threading.Thread:
+        """Runs `startup()` on a background thread, it returns the startup
+        profile"""
+
+        def target():
+            try:
+                self.profile = startup()
+            except Exception as e:
+                logger.exception("Error en l'arrencada de l'API")
+                self.error = repr(e)
+            finally:
+                self._event.set()
+
+        thread = threading.Thread(target=target, name="startup", daemon=True)
+        thread.start()
+        return thread
+
+    def reset(self) -> None:
+        self._event.clear()
+        self.error = None
+        self.profile = {}
+
+
+readiness = Readiness()
@@ -0,0 +1,112 @@
+"""Model input features shared by the SC and the API.
+
+The window the SC posts to /predict, the rows the API appends at every rollout
+step and the demand forecast all encode time the same way: the time of day and
+the day of the year as sine/cosine pairs, plus the operating mode and the tank
+reset setpoints. This module builds those features for a whole array of
+timestamps at once, so every caller produces exactly the same values.
+
+Only numpy and pandas are needed, the SC imports it without the API
+dependencies.
+"""
+
+import numpy as np
+import pandas as pd
+
+SECONDS_IN_DAY = 24 * 60 * 60
+DAYS_IN_YEAR = 365
+
+# Hores (inici inclòs, final exclòs) del mode de dia; la resta és mode de nit
+DAY_MODE_HOURS = (8, 19)
+DAY_MODE = 1.0
+NIGHT_MODE = 2.0
+
+# Consignes de reset dels dipòsits per defecte (hora)
+RESET_COLD = 7
+RESET_HOT = 16
+
+# Columnes de l'entrada del model, en l'ordre del model (schemas.FEATURES)
+COLUMNS = (
+    "cold",
+    "hot",
+    "reset_cold",
+    "reset_hot",
+    "mode",
+    "wind_vel_m_s",
+    "solar_rad_w_m2",
+    "ir_rad_w_m2",
+    "day_sin",
+    "day_cos",
+    "year_sin",
+    "year_cos",
+)
+SENSOR_COLUMNS = ("cold", "hot", "wind_vel_m_s", "solar_rad_w_m2", "ir_rad_w_m2")
+CYCLIC_COLUMNS = ("day_sin", "day_cos", "year_sin", "year_cos")
+
+
+def as_datetime64(times, format: str = None) -> np.ndarray:
+    """Timestamps (datetimes, pandas Timestamps, strings or datetime64) as a
+    datetime64[s] array. Naive local times are expected; aware ones must be
+    converted to local time by the caller."""
+    if isinstance(times, np.ndarray) and np.issubdtype(times.dtype, np.datetime64):
+        return times.astype("datetime64[s]")
+    return pd.to_datetime(pd.Index(list(times)), format=format).to_numpy("datetime64[s]")
+
+
+def cyclic(times) -> dict[str, np.ndarray]:
+    """day_sin, day_cos, year_sin and year_cos of every timestamp"""
+    times = as_datetime64(times)
+    days = times.astype("datetime64[D]")
+    seconds = (times - days).astype(np.float64)
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(np.float64) + 1
+    day = 2 * np.pi * seconds / SECONDS_IN_DAY
+    year = 2 * np.pi * day_of_year / DAYS_IN_YEAR
+    return {
+        "day_sin": np.sin(day),
+        "day_cos": np.cos(day),
+        "year_sin": np.sin(year),
+        "year_cos": np.cos(year),
+    }
+
+
+def mode(times) -> np.ndarray:
+    """Operating mode of every timestamp: DAY_MODE inside DAY_MODE_HOURS,
+    NIGHT_MODE otherwise"""
+    times = as_datetime64(times)
+    hours = (times - times.astype("datetime64[D]")).astype("timedelta64[h]").astype(np.int64)
+    start, end = DAY_MODE_HOURS
+    return np.where((hours >= start) & (hours < end), DAY_MODE, NIGHT_MODE)
+
+
+def build_matrix(times, values: dict, columns=COLUMNS, fill: float = np.nan,
+                 dtype=np.float64) -> np.ndarray:
+    """Model input matrix (rows, columns) for `times` in one pass.
+
+    Args:
+        times: one timestamp per row (see `as_datetime64`)
+        values (dict): column -> scalar or one value per row; sensor values,
+            and mode or reset setpoints that override the defaults
+        columns: output columns, in order
+        fill (float): value of the columns that are neither in `values` nor
+            derived from the time
+        dtype: dtype of the matrix
+
+    Returns:
+        np.ndarray: features (len(times), len(columns))
+    """
+    times = as_datetime64(times)
+    derived = {"reset_cold": RESET_COLD, "reset_hot": RESET_HOT, "mode": mode(times), **cyclic(times)}
+    derived.update(values)
+
+    matrix = np.full((len(times), len(columns)), fill, dtype=dtype)
+    for idx, col in enumerate(columns):
+        if col in derived:
+            matrix[:, idx] = derived[col]
+    return matrix
+
+
+def build_rows(times, values: dict, columns=COLUMNS) -> list[dict]:
+    """`build_matrix` as a list of {column: float}, one per timestamp (the
+    JSON rows of the /predict window)"""
+    matrix = build_matrix(times, values, columns)
+    return [dict(zip(columns, row)) for row in matrix.tolist()]
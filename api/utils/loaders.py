@@ -1,8 +1,123 @@
 import json
+import logging
 import os
+import threading
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+RUN_INFO_PATH = os.path.join(os.path.dirname(__file__), r'run-info.json')
+
+# Cada quant es comprova si el fitxer de configuració ha canviat (segons)
+POLL_SECONDS = 2.0
 
 
 def load_json() -> dict:
-    json_path = os.path.join(os.path.dirname(__file__), r'run-info.json')
-    with open(json_path, "r") as f:
+    with open(RUN_INFO_PATH, "r") as f:
         return json.load(f)
+
+
+def freeze(value):
+    """Read-only view of a parsed JSON object (nested dicts become
+    MappingProxyType, lists are kept so they can index DataFrames)"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [freeze(v) for v in value]
+    return value
+
+
+class ConfigWatcher:
+    """Immutable snapshot of a JSON configuration file, swapped atomically
+    when the file changes on disk (mtime polling).
+
+    `prepare(old, new)` runs on the watcher thread before a new snapshot is
+    published, so slow work (loading a new model) never happens inside a
+    request. If it raises, the previous snapshot is kept.
+    """
+
+    def __init__(self, path: str = RUN_INFO_PATH, poll_seconds: float = POLL_SECONDS, prepare=None):
+        self._path = path
+        self._poll_seconds = poll_seconds
+        self._prepare = prepare
+        self._snapshot = None
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+    def _file_stamp(self):
+        stat = os.stat(self._path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read(self):
+        stamp = self._file_stamp()
+        with open(self._path, "r") as f:
+            return stamp, freeze(json.load(f))
+
+    def current(self):
+        """Current snapshot, read from disk the first time"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self._stamp, self._snapshot = self._read()
+            return self._snapshot
+
+    def set_prepare(self, prepare) -> None:
+        self._prepare = prepare
+
+    def poll(self) -> bool:
+        """Reloads the file if it changed since the last read
+
+        Returns:
+            bool: True if a new snapshot was published
+        """
+        try:
+            if self._file_stamp() == self._stamp:
+                return False
+            stamp, new = self._read()
+        except (OSError, ValueError) as e:
+            # Fitxer a mig escriure o invàlid: es manté la configuració actual
+            logger.warning(f"No s'ha pogut llegir {self._path}: {e}")
+            return False
+
+        old = self.current()
+        with self._lock:
+            self._stamp = stamp
+        if new == old:
+            return False
+
+        try:
+            if self._prepare is not None:
+                self._prepare(old, new)
+        except Exception as e:
+            logger.error(f"Configuració nova descartada, error preparant-la: {e}")
+            return False
+
+        with self._lock:
+            self._snapshot = new
+        logger.info(f"Configuració recarregada de {self._path}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._poll_seconds):
+            self.poll()
+
+    def start(self) -> None:
+        self.current()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+config_watcher = ConfigWatcher()
@@ -0,0 +1,24 @@
+"""JSON encoding of the API responses"""
+
+import json
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson és opcional, json de la llibreria estàndard si no hi és
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(content, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def json_response(content) -> Response:
+    """Response encoded with the fastest available JSON encoder, skipping
+    FastAPI's jsonable_encoder pass"""
+    return Response(content=dumps(content), media_type="application/json")
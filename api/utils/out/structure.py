@@ -50,3 +50,37 @@ def prod(
 
 def dema(d_pred, future: list[str]) -> dict:
     return d_pred.to_dict()
+
+
+# Format columnar: un sol vector de temps compartit i vectors de floats per sèrie
+
+def temp_columnar(
+    temp_pred,
+    future: list[str],
+    column_info: dict,
+    temperature_label_columns: list[str],
+) -> dict:
+    return {
+        k: temp_pred.iloc[: len(future), int(column_info[k])].to_numpy(dtype=float).tolist()
+        for k in ["hot", "cold"]
+    }
+
+
+def prod_columnar(
+    prod_pred,
+    future: list[str],
+    temperature_label_columns: list[str],
+) -> dict:
+    return {
+        k: prod_pred[k].iloc[: len(future)].to_numpy(dtype=float).tolist()
+        for k in temperature_label_columns
+    }
+
+
+def frame_columnar(pred) -> dict:
+    """Prediction with its own index (rain, demand) as timestamps + one
+    vector per column"""
+    return {
+        "timestamps": [str(index) for index in pred.index],
+        **{col: pred[col].to_numpy(dtype=float).tolist() for col in pred.columns},
+    }
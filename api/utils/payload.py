@@ -0,0 +1,103 @@
+"""Request payloads of /predict.
+
+Besides the EntryList JSON (one object per row), the window can be sent as:
+
+- columnar JSON (`application/vnd.rce.columnar+json`): `{"data": {"cold": [...],
+  "hot": [...], ...}}`, one array per feature;
+- float32 matrix (`application/vnd.rce.float32`): a first line with the
+  comma separated column names, then the rows as little-endian float32.
+
+Both are parsed straight into an `EntryArray` (rows, features) without
+building one object per row, and validated by shape and dtype; EntryList
+bodies are validated by pydantic as before and converted once. Columns may
+come in any order and extra columns are ignored, as with EntryList. The
+content types and the float32 encoder come from `api.utils.wire`, shared with
+the SC.
+"""
+
+import json
+
+import numpy as np
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from api.utils.schemas import Entry, EntryArray, EntryList, PayloadError, window_values
+from api.utils.wire import COLUMNAR_JSON, FLOAT32, JSON, encode_float32  # noqa: F401
+
+def parse_columnar_json(body: bytes) -> EntryArray:
+    try:
+        data = json.loads(body)["data"]
+        columns = list(data)
+        matrix = np.array([data[c] for c in columns], dtype=np.float64).T
+    except (ValueError, KeyError, TypeError) as e:
+        raise PayloadError(f"Invalid columnar payload: {e}") from e
+    return EntryArray.from_columns(columns, matrix)
+
+
+def parse_float32(body: bytes) -> EntryArray:
+    header, sep, raw = body.partition(b"\n")
+    if not sep:
+        raise PayloadError("Missing column header")
+    columns = header.decode("utf-8").strip().split(",")
+    row_size = 4 * len(columns)
+    if len(raw) % row_size:
+        raise PayloadError(f"Body of {len(raw)} bytes is not a whole number of {len(columns)} float32 rows")
+    matrix = np.frombuffer(raw, dtype="<f4").reshape(-1, len(columns))
+    return EntryArray.from_columns(columns, matrix)
+
+
+async def read_window(request: Request):
+    """Window of a /predict request, by content type
+
+    Returns:
+        EntryArray: the window, whatever its content type
+
+    Raises:
+        RequestValidationError: invalid body (answered with a 422)
+    """
+    content_type = request.headers.get("content-type", JSON).split(";")[0].strip()
+    body = await request.body()
+    try:
+        if content_type == COLUMNAR_JSON:
+            return parse_columnar_json(body)
+        if content_type == FLOAT32:
+            return parse_float32(body)
+        return EntryArray(window_values(EntryList.model_validate_json(body)))
+    except ValidationError as e:
+        errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=body) from e
+    except PayloadError as e:
+        raise RequestValidationError(
+            [{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}]
+        ) from e
+
+
+# Esquema de /predict per a la documentació OpenAPI
+OPENAPI_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            JSON: {
+                "schema": {
+                    "type": "object",
+                    "properties": {"data": {"type": "array", "items": Entry.model_json_schema()}},
+                    "required": ["data"],
+                }
+            },
+            COLUMNAR_JSON: {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "data": {
+                            "type": "object",
+                            "additionalProperties": {"type": "array", "items": {"type": "number"}},
+                        }
+                    },
+                    "required": ["data"],
+                }
+            },
+            FLOAT32: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
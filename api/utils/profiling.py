@@ -0,0 +1,71 @@
+"""Startup profile of the API: time spent importing each module.
+
+`import_profiler.install()` wraps `builtins.__import__` and records, for every
+module imported for the first time, the wall time of that import (including
+the modules it pulls in). `api.main` installs it before its own imports and
+removes it right after them, so every boot logs the IMPORT_SUMMARY slowest
+imports and importing `api.main` (tests, tools) leaves `builtins.__import__`
+as it was. PROFILE_IMPORTS=1 reports every module instead of the summary.
+"""
+
+import builtins
+import os
+import sys
+import time
+
+# Perfil d'importació detallat, amb tots els mòduls (PROFILE_IMPORTS=1)
+PROFILE_IMPORTS = os.getenv("PROFILE_IMPORTS", "0") == "1"
+
+# Importacions més lentes del resum de cada arrencada
+IMPORT_SUMMARY = 5
+
+
+class ImportProfiler:
+    """Records the first-import time of every module"""
+
+    def __init__(self):
+        self.times: dict[str, float] = {}
+        self._original = None
+        self._started = None
+        self.total = 0.0
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level != 0 or name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            self.times.setdefault(name, time.perf_counter() - start)
+
+    def install(self) -> None:
+        if self._original is not None:
+            return
+        self._started = time.perf_counter()
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original is None:
+            return
+        builtins.__import__ = self._original
+        self._original = None
+        self.total = time.perf_counter() - self._started
+
+    def slowest(self, n: int = 15) -> dict[str, float]:
+        """The `n` slowest imports, in seconds (inclusive of their own imports);
+        every import when `n` is None"""
+        ranked = sorted(self.times.items(), key=lambda item: item[1], reverse=True)
+        return {name: round(seconds, 4) for name, seconds in ranked[:n]}
+
+    def summary(self, verbose: bool = PROFILE_IMPORTS) -> dict:
+        """Total import time and the IMPORT_SUMMARY slowest imports, or all of
+        them when `verbose`"""
+        return {
+            "total": round(self.total, 3),
+            "slowest": self.slowest(None if verbose else IMPORT_SUMMARY),
+        }
+
+
+import_profiler = ImportProfiler()
@@ -0,0 +1,134 @@
+"""Cache of /predict results with request coalescing.
+
+Several SC processes (or the SC and a dashboard) post the same window in the
+same 15 minute slot. The result of the prediction stages is kept in a bounded
+LRU keyed by a hash of the normalised window, the forecast snapshot version,
+the run configuration and the slot; identical requests that arrive while the
+first one is still computing wait for it instead of starting another rollout
+(single flight).
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from api.utils.schemas import window_values
+
+# Nombre màxim de resultats guardats
+MAX_ENTRIES = 64
+
+# Durada de la franja en què un resultat és vàlid (minuts)
+SLOT_MINUTES = 15
+
+# Decimals amb què es normalitzen les entrades abans de calcular la clau
+DECIMALS = 6
+
+
+def time_slot(now: datetime = None, minutes: int = SLOT_MINUTES) -> str:
+    """Start of the `minutes` slot that contains `now`"""
+    now = now or datetime.now()
+    return now.replace(minute=now.minute - now.minute % minutes, second=0, microsecond=0).isoformat()
+
+
+def entries_fingerprint(entries, decimals: int = DECIMALS) -> str:
+    """Hash of an EntryList or EntryArray independent of float noise below
+    `decimals`"""
+    values = np.round(window_values(entries), decimals) + 0.0  # -0.0 -> 0.0
+    return hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+
+def result_key(*parts) -> str:
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU of computed results with single-flight computation"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, object] = OrderedDict()
+        self._inflight: dict[str, concurrent.futures.Future] = {}
+        self._tasks: set = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.errors = 0
+
+    async def get_or_compute(self, key: str, compute):
+        """Cached result of `key`, computed with `await compute()` once even
+        if several callers ask for it at the same time
+
+        An exception of `compute` reaches every waiting caller and is not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = concurrent.futures.Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if leader:
+            # El càlcul continua encara que qui l'ha iniciat es cancel·li
+            task = asyncio.ensure_future(self._fill(key, future, compute))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def _fill(self, key: str, future: concurrent.futures.Future, compute) -> None:
+        try:
+            value = await compute()
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+
+result_cache = ResultCache()
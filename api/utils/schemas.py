@@ -1,6 +1,11 @@
-from typing import List
+from typing import List, Literal, Optional, Union
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, Field
+
+
+# Format de la resposta: "legacy" (diccionaris de strings) o "columnar" (vectors de floats)
+OutputFormat = Literal["legacy", "columnar"]
 
 
 class Entry(BaseModel):
@@ -19,4 +24,74 @@ class Entry(BaseModel):
 
 
 class EntryList(BaseModel):
-    data: List[Entry]
\ No newline at end of file
+    data: List[Entry]
+
+
+class Scenario(BaseModel):
+    """Operating plan over the prediction horizon. Each field is a single
+    value for every step or a list with one value per step."""
+
+    mode: Optional[Union[float, List[float]]] = None
+    reset_cold: Optional[Union[float, List[float]]] = None
+    reset_hot: Optional[Union[float, List[float]]] = None
+
+
+# Escenaris per petició: cada un és una fila més del lot del rollout
+MAX_SCENARIOS = 64
+
+
+class ScenarioList(BaseModel):
+    data: List[Entry]
+    scenarios: List[Scenario] = Field(min_length=1, max_length=MAX_SCENARIOS)
+
+
+# Columnes de la finestra, en l'ordre del model
+FEATURES = tuple(Entry.model_fields)
+
+
+class PayloadError(ValueError):
+    """Request window with a wrong shape, type or columns"""
+
+
+class EntryArray:
+    """Request window as a float array (rows, features), columns in FEATURES
+    order. Stands in for an EntryList in the predictors."""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    @classmethod
+    def from_columns(cls, columns, matrix: np.ndarray) -> "EntryArray":
+        """Window from a matrix whose columns are `columns`
+
+        Raises:
+            PayloadError: if a feature is missing or repeated, or the values
+                are not finite numbers
+        """
+        columns = list(columns)
+        if matrix.ndim != 2 or matrix.shape[1] != len(columns):
+            raise PayloadError(f"Expected {len(columns)} columns, got shape {matrix.shape}")
+        if len(set(columns)) != len(columns):
+            raise PayloadError("Repeated columns")
+        missing = [f for f in FEATURES if f not in columns]
+        if missing:
+            raise PayloadError(f"Missing columns {missing}")
+        values = matrix[:, [columns.index(f) for f in FEATURES]].astype(np.float64)
+        if not np.isfinite(values).all():
+            raise PayloadError("Values must be finite numbers")
+        return cls(values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return f"EntryArray({dict(zip(FEATURES, self.values.T.tolist()))})"
+
+
+def window_values(window) -> np.ndarray:
+    """Values (rows, features) of an EntryArray, EntryList or ScenarioList"""
+    if isinstance(window, EntryArray):
+        return window.values
+    return np.array(
+        [[getattr(entry, f) for f in FEATURES] for entry in window.data], dtype=np.float64
+    )
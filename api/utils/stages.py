@@ -0,0 +1,70 @@
+"""Small dependency graph of prediction stages.
+
+Each stage is a function that receives the results of the stages it runs
+after. Stages without pending dependencies run at the same time: blocking
+functions on worker threads, coroutine functions on the event loop.
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: object
+    after: tuple
+
+
+class StageGraph:
+    """Runs stages concurrently while respecting their dependencies"""
+
+    def __init__(self):
+        self._stages: dict[str, Stage] = {}
+        self.timings: dict[str, float] = {}
+
+    def add(self, name: str, fn, after: tuple = ()) -> "StageGraph":
+        """Adds a stage
+
+        Args:
+            name (str): stage name, key of its result
+            fn (callable): called with the results of `after`, in order
+            after (tuple, optional): stages that must finish first, they must
+                be added before. Defaults to ().
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage {name} already added")
+        missing = [dep for dep in after if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages {missing}")
+        self._stages[name] = Stage(name=name, fn=fn, after=tuple(after))
+        return self
+
+    async def _run_stage(self, stage: Stage, tasks: dict):
+        deps = [await tasks[dep] for dep in stage.after]
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(stage.fn):
+                return await stage.fn(*deps)
+            return await asyncio.to_thread(stage.fn, *deps)
+        finally:
+            self.timings[stage.name] = time.perf_counter() - start
+
+    async def run(self) -> dict:
+        """Runs every stage
+
+        Returns:
+            dict: result of each stage by name
+        """
+        tasks = {}
+        for stage in self._stages.values():
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, tasks))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return dict(zip(tasks, results))
@@ -0,0 +1,20 @@
+"""Wire formats of the /predict window, shared by the SC and the API.
+
+The content types of the columnar JSON and float32 bodies and the float32
+encoder live here so the SC (which sends them) and `api.utils.payload` (which
+parses them) cannot drift apart. `api.utils.payload` re-exports them.
+
+Only numpy is needed, the SC imports it without FastAPI or pydantic.
+"""
+
+import numpy as np
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.rce.columnar+json"
+FLOAT32 = "application/vnd.rce.float32"
+
+
+def encode_float32(columns, rows) -> bytes:
+    """Float32 payload of `rows` (one sequence of values per row)"""
+    matrix = np.asarray(rows, dtype="<f4").reshape(-1, len(columns))
+    return ",".join(columns).encode("utf-8") + b"\n" + matrix.tobytes()
@@ -0,0 +1,130 @@
+"""Memory and latency of the inference backends: Keras versus TFLite (float32
+and quantised) for the demand model, one temperature step and the 192 step
+temperature rollout. Each backend runs in a fresh interpreter so the RSS
+figures are not mixed.
+
+    python -m benchmarks.bench_backends [--repeat 20] [--quantize float16 dynamic]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from api.rce_predictors.registry import DEMAND_MODEL, KERAS_DIR, process_rss
+
+TEMPERATURE_MODEL = "modelo.keras"
+HORIZON = 192
+LABEL_INDICES = [0, 1]
+
+
+def timed(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def worker(backend: str, temperature_path: str, demand_path: str, repeat: int) -> dict:
+    """Loads both models with `backend` and times them (runs in a subprocess)"""
+    rss_start = process_rss()
+    start = time.perf_counter()
+    if backend == "keras":
+        import tensorflow as tf
+
+        from api.rce_predictors.rollout import RolloutEngine as engine
+
+        temperature = tf.keras.models.load_model(temperature_path, compile=False)
+        demand = tf.keras.models.load_model(demand_path, compile=False)
+        runtime = "keras"
+    else:
+        from api.rce_predictors.tflite import TFLiteModel, TFLiteRollout as engine, interpreter_class
+
+        temperature = TFLiteModel(temperature_path)
+        demand = TFLiteModel(demand_path)
+        runtime = interpreter_class().__module__
+    load_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    n_features = temperature.input_shape[-1]
+    window = rng.normal(size=(1,) + tuple(temperature.input_shape[1:])).astype(np.float32)
+    exogenous = rng.normal(size=(1, HORIZON, n_features)).astype(np.float32)
+    demand_x = rng.normal(size=(24, demand.input_shape[-1])).astype(np.float32)
+    rollout = engine(temperature, label_indices=LABEL_INDICES, n_features=n_features)
+
+    # Primera crida fora del temps (traça i reserva de tensors)
+    demand(demand_x, training=False)
+    temperature(window, training=False)
+    rollout.predict(window, exogenous)
+
+    return {
+        "runtime": runtime,
+        "load_seconds": round(load_seconds, 3),
+        "rss_mb": round(process_rss() / 2**20, 1),
+        "rss_growth_mb": round((process_rss() - rss_start) / 2**20, 1),
+        "demand_ms": statistics.median(timed(lambda: demand(demand_x, training=False), repeat)) * 1000,
+        "step_ms": statistics.median(timed(lambda: temperature(window, training=False), repeat)) * 1000,
+        "rollout_ms": statistics.median(
+            timed(lambda: rollout.predict(window, exogenous), max(repeat // 4, 3))
+        ) * 1000,
+    }
+
+
+def run_worker(backend: str, temperature_path: str, demand_path: str, repeat: int) -> dict:
+    proc = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_backends", "--worker", backend,
+            "--temperature", temperature_path, "--demand", demand_path, "--repeat", str(repeat),
+        ],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--quantize", nargs="*", default=["float16", "dynamic"])
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--temperature", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--demand", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.temperature, args.demand, args.repeat)))
+        return
+
+    from api.rce_predictors.tflite import convert_file, tflite_name
+
+    keras_paths = [os.path.join(KERAS_DIR, m) for m in (TEMPERATURE_MODEL, DEMAND_MODEL)]
+    results = {"keras": run_worker("keras", *keras_paths, args.repeat)}
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for quantize in [None] + list(args.quantize):
+            paths = [
+                convert_file(path, os.path.join(out_dir, tflite_name(os.path.basename(path), quantize)), quantize)
+                for path in keras_paths
+            ]
+            name = "tflite" + (f"-{quantize}" if quantize else "")
+            results[name] = run_worker("tflite", *paths, args.repeat)
+            results[name]["size_kb"] = round(sum(os.path.getsize(p) for p in paths) / 2**10, 1)
+
+    print(f"{'backend':>15} {'RSS MB':>8} {'load s':>7} {'demand ms':>10} {'step ms':>8} {'rollout ms':>11}  runtime")
+    for name, r in results.items():
+        print(
+            f"{name:>15} {r['rss_mb']:8.1f} {r['load_seconds']:7.2f} {r['demand_ms']:10.3f} "
+            f"{r['step_ms']:8.3f} {r['rollout_ms']:11.1f}  {r['runtime']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Latency of the demand path (24h forecast -> scaler -> model -> inverse
+scaler -> indexed frame): the original row-by-row version versus the array one.
+
+    python -m benchmarks.bench_demand [--repeat 20]
+"""
+
+import argparse
+import datetime
+import math
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from api.rce_predictors.demand_predictor import DemandPredictor, columns, load_artifacts
+from api.rce_predictors.future.open import estimate_longwave_ir, forecast_24h_frame
+
+
+def meteo() -> dict:
+    rng = np.random.default_rng(0)
+    start = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    return {
+        "hourly": {
+            "time": [
+                (start + datetime.timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M")
+                for h in range(48)
+            ],
+            "temperature_2m": rng.uniform(0, 35, 48).tolist(),
+            "relative_humidity_2m": rng.uniform(20, 90, 48).tolist(),
+            "surface_pressure": rng.uniform(980, 1020, 48).tolist(),
+            "windspeed_10m": rng.uniform(0, 10, 48).tolist(),
+            "shortwave_radiation": rng.uniform(0, 800, 48).tolist(),
+        }
+    }
+
+
+def features_to_datetime(row, year=datetime.datetime.now().year):
+    """Original index of the demand frame, rebuilt from the cyclic features
+    of each row"""
+    # Dia de l'any a partir de year_sin, year_cos
+    year_angle = np.arctan2(row['year_sin'], row['year_cos'])
+    day_of_year = int((year_angle % (2*np.pi)) / (2*np.pi) * 365) + 1
+
+    # Hora del dia a partir de day_sin, day_cos
+    day_angle = np.arctan2(row['day_sin'], row['day_cos'])
+    hour_of_day = int((day_angle % (2*np.pi)) / (2*np.pi) * 24)
+    minute_of_hour = int((((day_angle % (2*np.pi)) / (2*np.pi) * 24 - hour_of_day) * 60))
+
+    return datetime.datetime(year, 1, 1) + datetime.timedelta(
+        days=day_of_year - 1, hours=hour_of_day, minutes=minute_of_hour
+    )
+
+
+def legacy_demand(model, x_scaler, y_scaler, data) -> pd.DataFrame:
+    """Original path: per-hour dicts, model.predict, clipping double loop and
+    iterrows + features_to_datetime to rebuild the index"""
+    hourly = data["hourly"]
+    times = [datetime.datetime.strptime(t, "%Y-%m-%dT%H:%M") for t in hourly["time"]]
+    next_hour = (datetime.datetime.utcnow() + datetime.timedelta(hours=1)).replace(
+        minute=0, second=0, microsecond=0
+    )
+    start = next(i for i, t in enumerate(times) if t >= next_hour)
+    rows = []
+    for i in range(start, start + 24):
+        dt, temp, rh = times[i], hourly["temperature_2m"][i], hourly["relative_humidity_2m"][i]
+        day_frac = (dt.hour * 3600 + dt.minute * 60) / 86400
+        year_frac = dt.timetuple().tm_yday / 365.0
+        rows.append({
+            "temperature": round(temp, 1),
+            "humidity": round(rh, 1),
+            "pressure": round(hourly["surface_pressure"][i], 1),
+            "solar_rad": round(hourly["shortwave_radiation"][i], 1),
+            "ir_rad": round(estimate_longwave_ir(temp, rh), 1),
+            "v_wind": round(hourly["windspeed_10m"][i], 1),
+            "day_sin": round(math.sin(2 * math.pi * day_frac), 6),
+            "day_cos": round(math.cos(2 * math.pi * day_frac), 6),
+            "year_sin": round(math.sin(2 * math.pi * year_frac), 6),
+            "year_cos": round(math.cos(2 * math.pi * year_frac), 6),
+        })
+
+    parameters = pd.DataFrame(rows)
+    y_pred = y_scaler.inverse_transform(
+        model.predict(x_scaler.transform(parameters), verbose=0)
+    )
+    for i in range(len(y_pred)):
+        for j in range(len(y_pred[i])):
+            if y_pred[i][j] < 0:
+                y_pred[i][j] = 0
+    df_y = pd.DataFrame(y_pred, columns=columns)
+    df_y.index = [
+        features_to_datetime(row, year=datetime.datetime.now().year)
+        for _, row in parameters.iterrows()
+    ]
+    return df_y
+
+
+def timed(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    model, x_scaler, y_scaler = load_artifacts()
+    predictor = DemandPredictor(
+        demand_path=None, date_format=None, model=model, x_scaler=x_scaler, y_scaler=y_scaler
+    )
+    data = meteo()
+
+    # Primera crida fora del temps (traça del model)
+    legacy_demand(model, x_scaler, y_scaler, data)
+    predictor.predict(forecast_24h_frame(ir_list=[], data=data))
+
+    results = {
+        "legacy": timed(lambda: legacy_demand(model, x_scaler, y_scaler, data), args.repeat),
+        "arrays": timed(
+            lambda: predictor.predict(forecast_24h_frame(ir_list=[], data=data)), args.repeat
+        ),
+    }
+
+    for name, times in results.items():
+        print(
+            f"{name:>8}: median {statistics.median(times) * 1000:8.2f} ms "
+            f"(min {min(times) * 1000:.2f} ms, {args.repeat} runs)"
+        )
+    speedup = statistics.median(results["legacy"]) / statistics.median(results["arrays"])
+    print(f"{'speedup':>8}: x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Offline benchmark of the prediction pipeline: latency of each predictor, of
+the output builders and of the whole /predict through FastAPI's test client,
+/predict throughput at N concurrent clients and memory. Every Open-Meteo and
+NASA POWER request is answered with the recorded fixtures of
+benchmarks/offline.py, so runs are reproducible and need no network.
+
+    python -m benchmarks.bench_pipeline [--repeat 20] [--clients 1 4 8] [--output bench-pipeline.json]
+    python -m benchmarks.bench_pipeline --baseline pipeline.json [--tolerance 0.25] [--update]
+
+The results are written as JSON. With `--baseline` the run is compared with a
+stored one and fails (exit status 1) when a case is slower (p50 or p95, by more
+than `--tolerance` and 1 ms) or the throughput lower by more than
+`--tolerance`, or when a case that worked in the baseline fails now.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from api.rce_predictors.registry import process_rss
+from benchmarks.offline import WINDOW, load, offline
+
+PARTS = ("components", "api")
+
+# Temps màxim d'espera de la primera instantània de previsions (segons)
+SNAPSHOT_TIMEOUT = 30
+
+# Diferència mínima per considerar una regressió (ms): per sota és soroll
+MIN_DELTA_MS = 1.0
+
+
+def timed(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def peak_rss() -> int:
+    """Peak resident set size of the process in bytes (0 if unknown)"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # Linux dona ru_maxrss en kB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def summary(times: list[float]) -> dict:
+    ms = np.asarray(times) * 1000
+    return {
+        "runs": len(times),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "min_ms": round(float(ms.min()), 3),
+    }
+
+
+def memory() -> dict:
+    return {"rss_mb": round(process_rss() / 2**20, 1), "peak_rss_mb": round(peak_rss() / 2**20, 1)}
+
+
+def components(repeat: int) -> dict:
+    """Latency of the predictors and output builders called directly"""
+    import pandas as pd
+
+    from api.main import compare_row, prod_predictor
+    from api.rce_predictors.future.client import ForecastClient
+    from api.rce_predictors.rain_predictor import WeatherPredictor
+    from api.rce_predictors.registry import registry
+    from api.rce_predictors.temperature_predictor import HORIZON
+    from api.utils import loaders
+    from api.utils.out import structure
+    from api.utils.schemas import EntryList
+
+    run_config = loaders.config_watcher.current()
+    temperature_config = run_config["temperature"]
+    labels = temperature_config["labels"]
+    window = EntryList.model_validate(load(WINDOW))
+    forecasts = ForecastClient().fetch_all()
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    future = structure.future_times(now, temperature_config["output"])
+    large_future = structure.future_times(now, HORIZON)
+
+    def demand():
+        predictor = registry.demand(run_config["demand"])
+        # Sense la previsió memoritzada, perquè es mesuri el model
+        predictor._memo.clear()
+        return predictor.predict(forecasts.forecast_24h, fetch_forecast=True)
+
+    cases = [
+        ("rain", lambda o: WeatherPredictor().predict(forecasts.rain), ()),
+        (
+            "temperature",
+            lambda o: registry.temperature(temperature_config).predict(
+                window, do_plot=False, fut_val=forecasts.fut_val, fetch_forecast=True
+            ),
+            (),
+        ),
+        ("demand", lambda o: demand(), ()),
+        (
+            "production",
+            lambda o: prod_predictor(run_config["rce-specs"]).predict(
+                pd.concat([compare_row(window, labels), o["temperature"]], ignore_index=True)
+            ).round(decimals=2),
+            ("temperature",),
+        ),
+        ("structure.rain", lambda o: structure.rain(o["rain"]), ("rain",)),
+        ("structure.dema", lambda o: structure.dema(o["demand"], future), ("demand",)),
+        (
+            "structure.temp",
+            lambda o: structure.temp(
+                o["temperature"], large_future, temperature_config["column-indices"], labels
+            ),
+            ("temperature",),
+        ),
+        ("structure.prod", lambda o: structure.prod(o["production"], large_future, labels), ("production",)),
+        ("structure.frame_columnar", lambda o: structure.frame_columnar(o["demand"]), ("demand",)),
+        (
+            "structure.temp_columnar",
+            lambda o: structure.temp_columnar(
+                o["temperature"], large_future, temperature_config["column-indices"], labels
+            ),
+            ("temperature",),
+        ),
+        (
+            "structure.prod_columnar",
+            lambda o: structure.prod_columnar(o["production"], large_future, labels),
+            ("production",),
+        ),
+    ]
+
+    results, outputs = {}, {}
+    for name, fn, needs in cases:
+        missing = [n for n in needs if n not in outputs]
+        if missing:
+            results[name] = {"error": f"needs {', '.join(missing)}"}
+            continue
+        try:
+            # La primera crida (càrrega i traça del model) no es compta
+            outputs[name] = fn(outputs)
+            times = timed(lambda: fn(outputs), repeat)
+        except Exception as e:
+            results[name] = {"error": repr(e)}
+            continue
+        results[name] = {**summary(times), **memory()}
+    return results
+
+
+def api(repeat: int, clients: list[int]) -> tuple[dict, dict]:
+    """Latency of /predict and its throughput with `clients` concurrent callers"""
+    from fastapi.testclient import TestClient
+
+    from api import main
+    from api.rce_predictors.future.prefetcher import forecast_prefetcher
+    from api.rce_predictors.warmup import READY_TIMEOUT, readiness
+
+    rows = load(WINDOW)["data"]
+
+    def payload(i: int) -> dict:
+        # Finestres diferents perquè no les respongui la memòria cau de resultats
+        return {"data": [{**row, "cold": row["cold"] + i * 1e-3} for row in rows]}
+
+    results, throughput = {}, {}
+    with TestClient(main.app) as client:
+        if not readiness.wait(READY_TIMEOUT):
+            error = f"service not ready ({readiness.status}): {readiness.error}"
+            return {"predict": {"error": error}}, {str(n): {"error": error} for n in clients}
+        deadline = time.monotonic() + SNAPSHOT_TIMEOUT
+        while forecast_prefetcher.current() is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        def post(i: int) -> float:
+            start = time.perf_counter()
+            response = client.post("/predict", json=payload(i))
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            explanation = response.json()["info"].get("explanation")
+            if explanation:
+                raise RuntimeError(explanation)
+            return elapsed
+
+        counter = itertools.count()
+        try:
+            post(next(counter))
+            results["predict"] = {
+                **summary([post(next(counter)) for _ in range(repeat)]),
+                **memory(),
+            }
+            # La mateixa finestra: resposta de la memòria cau de resultats
+            results["predict (cached)"] = {**summary([post(0) for _ in range(repeat)]), **memory()}
+
+            for n in clients:
+                indices = list(itertools.islice(counter, max(repeat, 2 * n)))
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=n) as pool:
+                    times = list(pool.map(post, indices))
+                wall = time.perf_counter() - start
+                throughput[str(n)] = {
+                    "clients": n,
+                    "requests": len(indices),
+                    "rps": round(len(indices) / wall, 3),
+                    **summary(times),
+                    **memory(),
+                }
+        except Exception as e:
+            results.setdefault("predict", {"error": repr(e)})
+            for n in clients:
+                throughput.setdefault(str(n), {"error": repr(e)})
+    return results, throughput
+
+
+def run(repeat: int, clients: list[int], parts=PARTS) -> dict:
+    cases, throughput = {}, {}
+    with offline():
+        if "components" in parts:
+            cases.update(components(repeat))
+        if "api" in parts:
+            api_cases, throughput = api(repeat, clients)
+            cases.update(api_cases)
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "cases": cases,
+        "throughput": throughput,
+        "peak_rss_mb": round(peak_rss() / 2**20, 1),
+    }
+
+
+def check(results: dict, baseline: dict, tolerance: float = 0.25,
+          min_delta_ms: float = MIN_DELTA_MS) -> list[str]:
+    """Regressions of `results` against `baseline`, empty if the gate passes"""
+    failures = []
+    for name, base in baseline.get("cases", {}).items():
+        current = results["cases"].get(name)
+        if current is None or "error" in base:
+            continue
+        if "error" in current:
+            failures.append(f"{name}: {current['error']}")
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            limit = max(base[key] * (1 + tolerance), base[key] + min_delta_ms)
+            if current[key] > limit:
+                failures.append(
+                    f"{name} {key}: {current[key]:.2f} ms > {limit:.2f} ms "
+                    f"(referència {base[key]:.2f} ms)"
+                )
+
+    for clients, base in baseline.get("throughput", {}).items():
+        current = results["throughput"].get(clients)
+        if current is None or "error" in base:
+            continue
+        if "error" in current:
+            failures.append(f"{clients} clients: {current['error']}")
+            continue
+        limit = base["rps"] * (1 - tolerance)
+        if current["rps"] < limit:
+            failures.append(
+                f"{clients} clients: {current['rps']:.2f} peticions/s < {limit:.2f} "
+                f"(referència {base['rps']:.2f} -{tolerance:.0%})"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--parts", nargs="+", choices=PARTS, default=list(PARTS))
+    parser.add_argument("--output", default="bench-pipeline.json", help="JSON file for the results")
+    parser.add_argument("--baseline", default=None, help="JSON file of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update", action="store_true", help="rewrite the baseline with this run")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.clients, args.parts)
+
+    for name, result in results["cases"].items():
+        if "error" in result:
+            print(f"{name:>26}: ERROR {result['error']}")
+        else:
+            print(
+                f"{name:>26}: p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                f"(RSS {result['rss_mb']:.0f} MB)"
+            )
+    for clients, result in results["throughput"].items():
+        if "error" in result:
+            print(f"{clients:>18} clients: ERROR {result['error']}")
+        else:
+            print(
+                f"{clients:>18} clients: {result['rps']:7.2f} peticions/s  "
+                f"p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms"
+            )
+    print(f"{'pic de RSS':>26}: {results['peak_rss_mb']:.0f} MB")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Resultats desats a {args.output}")
+
+    if args.baseline and args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Referència desada a {args.baseline}")
+        return
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = check(results, baseline, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSIÓ: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Latency of the 192 step temperature rollout: one `model.predict` per step
+versus the single-graph RolloutEngine, alone and batched over K scenarios.
+
+    python -m benchmarks.bench_rollout [--repeat 5] [--model modelo.keras] [--scenarios 32]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+from api.rce_predictors.registry import KERAS_DIR
+from api.rce_predictors.rollout import RolloutEngine, stepwise_rollout
+
+N_FEATURES = 12
+INPUT_WIDTH = 24
+HORIZON = 192
+LABEL_INDICES = [0, 1]
+
+
+def timed(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="modelo.keras")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenarios", type=int, default=32)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(os.path.join(KERAS_DIR, args.model), compile=False)
+
+    rng = np.random.default_rng(0)
+    window = rng.normal(size=(1, INPUT_WIDTH, N_FEATURES)).astype(np.float32)
+    exogenous = rng.normal(size=(1, HORIZON, N_FEATURES)).astype(np.float32)
+
+    batch_window = np.repeat(window, args.scenarios, axis=0)
+    batch_exogenous = np.repeat(exogenous, args.scenarios, axis=0)
+
+    engine = RolloutEngine(model, LABEL_INDICES, N_FEATURES)
+    # La primera crida traça el graf, no es compta
+    engine.predict(window, exogenous)
+    engine.predict(batch_window, batch_exogenous)
+
+    results = {
+        "stepwise": timed(
+            lambda: stepwise_rollout(model, window, exogenous, LABEL_INDICES), args.repeat
+        ),
+        "engine": timed(lambda: engine.predict(window, exogenous), args.repeat),
+        f"engine x{args.scenarios}": timed(
+            lambda: engine.predict(batch_window, batch_exogenous), args.repeat
+        ),
+    }
+
+    for name, times in results.items():
+        print(
+            f"{name:>12}: median {statistics.median(times) * 1000:9.1f} ms "
+            f"(min {min(times) * 1000:.1f} ms, {args.repeat} runs)"
+        )
+    speedup = statistics.median(results["stepwise"]) / statistics.median(results["engine"])
+    print(f"{'speedup':>12}: x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Import time of the API and the SC, measured in fresh interpreters with
+`python -X importtime`, and a regression gate for it.
+
+    python -m benchmarks.bench_startup [--repeat 5] [--top 10]
+    python -m benchmarks.bench_startup --max-seconds 2.5
+    python -m benchmarks.bench_startup --baseline startup.json [--tolerance 0.25] [--update]
+
+The gate fails (exit status 1) when a module takes longer than `--max-seconds`,
+when it is slower than the baseline by more than `--tolerance`, or when it
+pulls in a module that must stay lazy (plots, TensorFlow in the API...).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mòduls que no s'han de carregar en importar cada punt d'entrada
+FORBIDDEN = {
+    "api.main": ("matplotlib", "tensorflow", "sklearn"),
+    "sc.main": ("fastapi", "matplotlib", "tensorflow"),
+}
+
+
+def run_import(module: str) -> tuple[float, list[tuple[str, int]], set[str]]:
+    """Imports `module` in a new interpreter
+
+    Returns:
+        tuple: wall seconds, (module, cumulative us) of every import and the
+            top level packages left in sys.modules
+    """
+    code = (
+        f"import sys; import {module}; "
+        "print(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    seconds = time.perf_counter() - start
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(cumulative)))
+    loaded = set(proc.stdout.split())
+    return seconds, imports, loaded
+
+
+def measure(module: str, repeat: int, top: int) -> dict:
+    times, slowest, loaded = [], {}, set()
+    for _ in range(repeat):
+        seconds, imports, loaded = run_import(module)
+        times.append(seconds)
+        for name, cumulative in imports:
+            slowest[name] = max(slowest.get(name, 0), cumulative)
+
+    ranked = sorted(slowest.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "median": round(statistics.median(times), 4),
+        "min": round(min(times), 4),
+        "slowest": {name: round(us / 1e6, 4) for name, us in ranked[:top]},
+        "forbidden": sorted(set(FORBIDDEN.get(module, ())) & loaded),
+    }
+
+
+def check(results: dict, max_seconds: float = None, baseline: dict = None,
+          tolerance: float = 0.25) -> list[str]:
+    """Regressions found in `results`, empty if the gate passes"""
+    failures = []
+    for module, result in results.items():
+        if result["forbidden"]:
+            failures.append(f"{module} carrega {', '.join(result['forbidden'])}")
+        if max_seconds is not None and result["median"] > max_seconds:
+            failures.append(f"{module}: {result['median']:.2f} s > {max_seconds:.2f} s")
+        if baseline and module in baseline:
+            limit = baseline[module]["median"] * (1 + tolerance)
+            if result["median"] > limit:
+                failures.append(
+                    f"{module}: {result['median']:.2f} s > {limit:.2f} s "
+                    f"(referència {baseline[module]['median']:.2f} s +{tolerance:.0%})"
+                )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=list(FORBIDDEN))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--baseline", default=None, help="JSON file with the reference times")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update", action="store_true", help="rewrite the baseline with these times")
+    args = parser.parse_args()
+
+    results = {module: measure(module, args.repeat, args.top) for module in args.modules}
+
+    for module, result in results.items():
+        print(f"{module}: median {result['median']:.3f} s (min {result['min']:.3f} s, {args.repeat} runs)")
+        for name, seconds in result["slowest"].items():
+            print(f"    {seconds * 1000:8.1f} ms  {name}")
+
+    if args.baseline and args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Referència desada a {args.baseline}")
+        return
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failures = check(results, args.max_seconds, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSIÓ: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Recorded upstream responses (Open-Meteo, NASA POWER) for offline benchmarks.
+
+`offline()` answers every forecast request of the API with the fixtures in
+benchmarks/fixtures, with their dates moved so that they cover from the day
+before the current time, read with the same clock as the API code, and the
+predictors see a current forecast at any hour. It also gives the forecast cache an empty
+temporary directory and makes any other HTTP request fail, so a benchmark
+never touches the network and never reuses a forecast cached on disk.
+
+    python -m benchmarks.offline            # dates the fixtures answer with today
+    python -m benchmarks.offline --record   # refresh the fixtures from the live APIs
+"""
+
+import argparse
+import copy
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+import requests
+
+from api.rce_predictors.future.cache import forecast_cache, http_get_json
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+RAIN = "open_meteo_rain"
+WIND_SOLAR = "open_meteo_wind_solar"
+METEO_24H = "open_meteo_24h"
+NASA = "nasa_power"
+
+# Finestra de 24 lectures que envia el SC a /predict
+WINDOW = "window"
+
+OPEN_METEO_FORMAT = "%Y-%m-%dT%H:%M"
+HOURS_PER_DAY = 24
+
+# Dies gravats que es repeteixen abans del primer: la previsió cobreix des
+# d'ahir, i les hores al voltant de mitjanit sempre hi són
+DAYS_BEFORE = 1
+NASA_FORMAT = "%Y%m%d"
+
+
+def fixture_name(url: str, params: dict = None) -> str:
+    """Fixture that answers a forecast request"""
+    if "power.larc.nasa.gov" in url:
+        return NASA
+    hourly = (params or {}).get("hourly") or url
+    if "precipitation_probability" in hourly:
+        return RAIN
+    if "relative_humidity_2m" in hourly:
+        return METEO_24H
+    if "shortwave_radiation" in hourly:
+        return WIND_SOLAR
+    raise KeyError(f"No recorded response for {url} {params or ''}")
+
+
+@lru_cache(maxsize=None)
+def _read(name: str) -> dict:
+    with open(os.path.join(FIXTURES_DIR, f"{name}.json"), "r") as f:
+        return json.load(f)
+
+
+def load(name: str) -> dict:
+    """Fixture as recorded (a copy)"""
+    return copy.deepcopy(_read(name))
+
+
+def clock(timezone_name: str = None) -> datetime:
+    """Current naive time as the API code reads it for a response in
+    `timezone_name`: UTC responses are compared with the UTC time
+    (`forecast_24h_frame`), local ones with the host's local time
+    (`get_forecast_from_now_local`, the rain predictor)"""
+    if timezone_name in (None, "UTC", "GMT"):
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    return datetime.now()
+
+
+def rebase(name: str, data: dict, now: datetime = None) -> dict:
+    """Moves the dates of a recorded response by whole days so that it covers
+    from the day before `now` (by default, `clock()` of the response) to the
+    end of the recording (NASA POWER: one year ago, as `nasa_url` asks)"""
+    if name == NASA:
+        values = data["properties"]["parameter"]["ALLSKY_SFC_LW_DWN"]
+        now = now or datetime.now(ZoneInfo("Europe/Madrid"))
+        first = datetime.strptime(min(values), NASA_FORMAT).date()
+        shift = (now.date() - timedelta(days=365)) - first
+        data["properties"]["parameter"]["ALLSKY_SFC_LW_DWN"] = {
+            (datetime.strptime(k, NASA_FORMAT) + shift).strftime(NASA_FORMAT): v
+            for k, v in values.items()
+        }
+        return data
+
+    hourly = data["hourly"]
+    now = now or clock(data.get("timezone"))
+    times = [datetime.strptime(t, OPEN_METEO_FORMAT) for t in hourly["time"]]
+    # El primer dia gravat es repeteix DAYS_BEFORE vegades al davant
+    before = HOURS_PER_DAY * DAYS_BEFORE
+    times = [t - timedelta(days=DAYS_BEFORE) for t in times[:before]] + times
+    for key, values in hourly.items():
+        if key != "time" and isinstance(values, list):
+            hourly[key] = values[:before] + values
+    shift = (now.date() - timedelta(days=DAYS_BEFORE)) - times[0].date()
+    hourly["time"] = [(t + shift).strftime(OPEN_METEO_FORMAT) for t in times]
+    return data
+
+
+def fetch(url: str, params: dict = None, timeout=None) -> dict:
+    """Replaces the HTTP request of the forecast cache"""
+    name = fixture_name(url, params)
+    return rebase(name, load(name))
+
+
+def _blocked(self, method, url, *args, **kwargs):
+    raise requests.exceptions.ConnectionError(f"Offline benchmark: {method} {url} has no fixture")
+
+
+@contextmanager
+def offline():
+    """Serves the forecasts from the fixtures while the block runs"""
+    with tempfile.TemporaryDirectory(prefix="forecast-cache-") as cache_dir, \
+            mock.patch.object(forecast_cache, "_fetch", fetch), \
+            mock.patch.object(forecast_cache, "_cache_dir", cache_dir), \
+            mock.patch.object(forecast_cache, "_memory", {}), \
+            mock.patch.object(requests.Session, "request", _blocked):
+        yield
+
+
+def record() -> list[str]:
+    """Fetches the forecasts from the live APIs and saves them as fixtures"""
+    from api.rce_predictors.future.client import ForecastClient
+
+    recorded = {}
+
+    def recording(url, params=None, timeout=None):
+        value = http_get_json(url, params=params, timeout=timeout)
+        recorded[fixture_name(url, params)] = value
+        return value
+
+    with tempfile.TemporaryDirectory(prefix="forecast-cache-") as cache_dir, \
+            mock.patch.object(forecast_cache, "_fetch", recording), \
+            mock.patch.object(forecast_cache, "_cache_dir", cache_dir), \
+            mock.patch.object(forecast_cache, "_memory", {}):
+        bundle = ForecastClient().fetch_all()
+    if bundle.errors:
+        raise RuntimeError(f"Could not record every source: {bundle.errors}")
+
+    for name, value in recorded.items():
+        with open(os.path.join(FIXTURES_DIR, f"{name}.json"), "w") as f:
+            json.dump(value, f, indent=1)
+    return sorted(recorded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", action="store_true", help="refresh the fixtures from the live APIs")
+    args = parser.parse_args()
+
+    if args.record:
+        print(f"Desades: {', '.join(record())}")
+        return
+    for name in (RAIN, WIND_SOLAR, METEO_24H, NASA):
+        data = rebase(name, load(name))
+        if name == NASA:
+            dates = sorted(data["properties"]["parameter"]["ALLSKY_SFC_LW_DWN"])
+        else:
+            dates = data["hourly"]["time"]
+        print(f"{name}: {dates[0]} .. {dates[-1]}")
+
+
+if __name__ == "__main__":
+    main()
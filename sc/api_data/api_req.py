@@ -7,19 +7,52 @@ import numpy as np
 from datetime import datetime
 import pandas as pd
 
+from api.utils import features
+from api.utils.wire import COLUMNAR_JSON, FLOAT32, encode_float32
+
 headers = {
     "Content-Type": "application/json"
 }
 
+# Formatos de la ventana que acepta /predict (tipos de contenido en api.utils.wire)
+PAYLOAD_FORMATS = ("json", "columnar", "float32")
+
+
+def build_payload(data: dict, payload_format: str = "json") -> dict:
+    """
+    Argumentos de requests.post para enviar la ventana en el formato indicado:
+    "json" (una fila por objeto), "columnar" (un vector por variable) o
+    "float32" (cabecera con las columnas + matriz float32 little-endian).
+    """
+    if payload_format == "json":
+        return {"json": data, "headers": headers}
+
+    rows = data["data"]
+    columns = list(rows[0])
+    if payload_format == "columnar":
+        body = json.dumps({"data": {c: [float(row[c]) for row in rows] for c in columns}})
+        return {"data": body, "headers": {"Content-Type": COLUMNAR_JSON}}
+    if payload_format == "float32":
+        body = encode_float32(columns, [[row[c] for c in columns] for row in rows])
+        return {"data": body, "headers": {"Content-Type": FLOAT32}}
+    raise ValueError(f"Formato desconocido {payload_format}, se esperaba uno de {PAYLOAD_FORMATS}")
+
 # def get_req2(url, data):
 #     response = requests.post(url, json=data, headers=headers)
 #     print(response.status_code)
 #     return response.json()
 
-def get_req(url, data, retries=3, timeout=30):
+def get_req(url, data, retries=3, timeout=30, payload_format="json"):
+    try:
+        payload = build_payload(data, payload_format)
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        # Datos que no caben en una matriz: se envían como JSON y valida la API
+        print(f"No se pudo codificar en formato {payload_format}: {e}")
+        payload = build_payload(data, "json")
+
     for attempt in range(1, retries + 1):
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=timeout)
+            response = requests.post(url, timeout=timeout, **payload)
 
             # Imprimir código de estado
             print(f"[HTTP {response.status_code}] intento {attempt}/{retries}")
@@ -62,51 +95,34 @@ def drop_columns_from_dicts(data: list) -> list:
                 del elem[key]
     return data
 
-def rearrange_dict(data: list) -> list:
-    new_l = []
-    desired_order = [
-        "cold",
-        "hot",
-        "wind_vel_m_s",
-        "solar_rad_w_m2",
-        "ir_rad_w_m2",
-        "day_sin",
-        "day_cos",
-        "year_sin",
-        "year_cos"
-    ]
-    for elem in data:
-        ordered_data = {key: elem[key] for key in desired_order}
-        new_l.append(ordered_data)
-    return new_l
-def process_data(data: list) -> list:
-    min_year = min([elem['datetime'].year for elem in data])
-
-    for elem in data:
-        elem.pop("", None)
+# Columnas de las filas que devuelve process_data
+PROCESSED_COLUMNS = features.SENSOR_COLUMNS + features.CYCLIC_COLUMNS
 
-        seconds_in_day = 24 * 60 * 60
-        time_seconds = elem['datetime'].hour * 3600 + elem['datetime'].minute * 60 + elem['datetime'].second
-        elem['day_sin'] = np.sin(2 * np.pi * time_seconds / seconds_in_day)
-        elem['day_cos'] = np.cos(2 * np.pi * time_seconds / seconds_in_day)
+# Columna del histórico (cleansed.csv) de cada sensor
+RAW_SENSORS = {
+    "hot": "Hot_tank_temp_C",
+    "cold": "Cold_tank_temp_C",
+    "wind_vel_m_s": "Wind_vel_m_s",
+    "solar_rad_w_m2": "Solar_rad_W_m2",
+    "ir_rad_w_m2": "IR_rad_W_m2",
+}
 
-        elem['day_of_year'] = elem['datetime'].dayofyear
-        elem['year_sin'] = np.sin(2 * np.pi * elem['day_of_year'] / 365)
-        elem['year_cos'] = np.cos(2 * np.pi * elem['day_of_year'] / 365)
 
-        elem['hot'] = float(elem.get('Hot_tank_temp_C', 0))  # Asegurarse de que el valor sea float
-        elem['cold'] = float(elem.get('Cold_tank_temp_C', 0))  # Asegurarse de que el valor sea float
-        elem['wind_vel_m_s'] = float(elem.get('Wind_vel_m_s', 0))  # Asegurarse de que el valor sea float
-        elem['solar_rad_w_m2'] = float(elem.get('Solar_rad_W_m2', 0))  # Asegurarse de que el valor sea float
-        elem['ir_rad_w_m2'] = float(elem.get('IR_rad_W_m2', 0))  # Asegurarse de que el valor sea float
+def rearrange_dict(data: list) -> list:
+    return [{key: elem[key] for key in PROCESSED_COLUMNS} for elem in data]
 
-        for key in ['Hot_tank_temp_C', 'Cold_tank_temp_C', 'Wind_vel_m_s', 'Solar_rad_W_m2', 'IR_rad_W_m2']:
-            if key in elem:
-                del elem[key]
 
-    data = drop_columns_from_dicts(data)
-    data = rearrange_dict(data)
-    return data
+def process_data(data: list) -> list:
+    """
+    Filas del histórico (con 'datetime') como filas de entrada del modelo:
+    sensores y variables cíclicas calculadas de golpe con api.utils.features.
+    """
+    times = [elem["datetime"] for elem in data]
+    sensors = {
+        column: np.asarray([elem.get(raw, 0) for elem in data], dtype=np.float64)
+        for column, raw in RAW_SENSORS.items()
+    }
+    return features.build_rows(times, sensors, columns=PROCESSED_COLUMNS)
 
 
 def read_csv():
@@ -17,6 +17,8 @@ with CONFIG_FILE.open("r", encoding="utf-8") as f:
     _raw = json.load(f)
 
 PREDICT_URL = _raw["predict_url"]
+# Formato de la ventana enviada a /predict: "json", "columnar" o "float32"
+PREDICT_FORMAT = _raw.get("predict_format", "json")
 
 PLC_IP = _raw["plc"]["ip"]
 PLC_RACK = _raw["plc"]["rack"]
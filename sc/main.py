@@ -12,12 +12,13 @@ logger = get_logger(__name__)
 
 from sc.api_data.api_req import get_req, get_data
 from sc.utils.getters import get_prod, get_dem, get_rain
-from fastapi import FastAPI
 from sc.utils.read_data import get_last_data_from_db
+from sc.utils.demand_index import DemandIndex
+from sc.utils.schedule import SlotSchedule
 from .plc_controller import PLCController
 
 from sc.config import (
-    PREDICT_URL, P_BOMBA_WATTS, MIN_TIME_STEP,
+    PREDICT_URL, PREDICT_FORMAT, P_BOMBA_WATTS, MIN_TIME_STEP,
     PLC_IP, PLC_RACK, PLC_SLOT, OUTPUT_CSV, ITER_TIME_SEC
 )
 
@@ -40,14 +41,16 @@ COP_MIN = 1.0 # Umbral mínimo de COP para encender la bomba
 
 prod_data = {}
 dem_data = {}
+dem_index = {}  # DemandIndex de cada serie de dem_data
 rain_data = {}
-temp_mode = {}
+temp_mode = SlotSchedule(min_time_step)  # modo planificado por franja (inicio real)
 
 system_data = {}
 
 last_prediction_update_day = None
 
 current_dem_target = 0.0
+current_dem_mode = None  # modo (1 calor, 0 frío) del plan de current_dem_target
 selected_time_frames = []
 total_predicted_production = 0.0
 
@@ -73,14 +76,15 @@ def calculate_dem_for_period(df_demand, start_dt, end_dt):
     """
     Calcula la demanda total (en unidades del dataset) dentro de un intervalo temporal.
 
-    Recorre minuto a minuto desde `start_dt` hasta `end_dt` (excloent `end_dt`),
-    busca cada instante en el diccionario/serie `df_demand` usando formato ISO 
-    (YYYY-MM-DDTHH:MM:SS) sin segundos ni microsegundos, y acumula su valor.
+    Suma los valores de los minutos desde `start_dt` hasta `end_dt` (excloent
+    `end_dt`) con un DemandIndex: dos búsquedas binarias sobre la suma
+    acumulada en lugar de buscar cada minuto en formato ISO.
 
     Parámetros:
-        df_demand (dict o pandas.Series): 
-            Diccionario o serie donde las claves son timestamps en formato ISO 
-            "YYYY-MM-DDTHH:MM:SS" y los valores son demandas numéricas.
+        df_demand (DemandIndex, dict o pandas.Series): 
+            Índice ya construido, o diccionario o serie donde las claves son
+            timestamps en formato ISO "YYYY-MM-DDTHH:MM:SS" y los valores son
+            demandas numéricas.
         start_dt (datetime): 
             Fecha y hora de inicio del intervalo (incluida).
         end_dt (datetime): 
@@ -89,27 +93,8 @@ def calculate_dem_for_period(df_demand, start_dt, end_dt):
     Retorna:
         float: Demanda total acumulada en el período.
     """
-
-    dem = 0.0
-    current_dt = start_dt
-
-    logger.debug(
-        f"Calculando demanda desde {start_dt.isoformat()} hasta {end_dt.isoformat()} "
-        f"(recorriendo minuto a minuto)."
-    )
-
-    while current_dt < end_dt:
-        # Normalizar timestamp al formato esperado (segundos exactos, sin microsegundos)
-        dt_str = current_dt.replace(second=0, microsecond=0).isoformat(timespec='seconds')
-
-        if dt_str in df_demand:
-            value = float(df_demand[dt_str])
-            dem += value
-            logger.debug(f"  + {value} en {dt_str} (acumulado: {dem})")
-        # else:
-        #     logger.debug(f"  - No hay dato de demanda para {dt_str}")
-
-        current_dt += timedelta(minutes=1)
+    index = df_demand if isinstance(df_demand, DemandIndex) else DemandIndex.from_series(df_demand)
+    dem = index.total(start_dt, end_dt)
 
     logger.info(
         f"Demanda total calculada para el intervalo: {dem} "
@@ -195,8 +180,8 @@ def calculate_optimal_production_plan(available_prod, target_demand, type):
 
     # Asignación de modos
     logger.debug("\n--- Asignación de modos en temp_mode ---")
+    temp_mode.add(selected_frames_dt, type)
     for time in selected_frames_dt:
-        temp_mode[time] = type
         logger.debug(f"  {time.isoformat()}  → modo = {type}")
 
     logger.debug("\n=== Fin del cálculo de plan óptimo ===")
@@ -243,6 +228,21 @@ def get_now_val_2(curr: dict):
             return curr[(frame + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S") ]
     return 0
 
+def choose_mode(modes: list[int], demand_mode) -> int:
+    """
+    Modo a ejecutar en una franja planificada, dados sus modos del más
+    antiguo al más reciente (SlotSchedule.active).
+
+    Si los planes de calor y de frío se solapan en la franja, gana el del
+    plan dueño de la demanda objetivo actual (`demand_mode`): es la demanda
+    que la producción de la franja va a descontar. Si ese modo no está en la
+    franja, el plan más reciente.
+    """
+    if demand_mode in modes:
+        return demand_mode
+    return modes[-1]
+
+
 def update_predictions(now, system_data, context: str) -> bool:
     """
     Actualiza dem_data, prod_data y rain_data a partir del backend de predicciones.
@@ -251,14 +251,15 @@ def update_predictions(now, system_data, context: str) -> bool:
         True  si se han podido actualizar las predicciones.
         False si ha fallado la petición (req is None).
     """
-    global dem_data, prod_data, rain_data, last_prediction_update_day
+    global dem_data, dem_index, prod_data, rain_data, last_prediction_update_day
 
-    req = get_req(url, system_data)
+    req = get_req(url, system_data, payload_format=PREDICT_FORMAT)
     if req is None:
         logger.error(f"{now}: No s'han pogut obtenir prediccions ({context}): req=None.")
         return False
 
     dem_data = get_dem(req)
+    dem_index = {key: DemandIndex.from_series(series) for key, series in dem_data.items()}
     prod_data = get_prod(req)
     rain_data = get_rain(req)
     last_prediction_update_day = now.day
@@ -285,10 +286,13 @@ def plan_mode(
     - selected_time_frames
     - total_predicted_production
     - current_dem_target
+    - current_dem_mode
     """
-    global current_dem_target, selected_time_frames, total_predicted_production
+    global current_dem_target, current_dem_mode, selected_time_frames, total_predicted_production
 
-    dem_value = calculate_dem_for_period(dem_data[dem_series_key], start_dem, end_dem)
+    # Índice construido en update_predictions (o la serie, si no hay índice)
+    demand = dem_index.get(dem_series_key, dem_data[dem_series_key])
+    dem_value = calculate_dem_for_period(demand, start_dem, end_dem)
 
     selected_time_frames, total_predicted_production = calculate_optimal_production_plan(
         prod_data[prod_series_key],
@@ -296,6 +300,7 @@ def plan_mode(
         mode_type_int
     )
     current_dem_target = dem_value
+    current_dem_mode = mode_type_int
 
     logger.info(
         f"{now}: Mode establert a {mode_label}. "
@@ -415,75 +420,82 @@ def get_decision():
                 f"a {current_time_frame_end.isoformat(timespec='seconds')}"
             )
 
-            # Recorrem les franges planificades (temp_mode) per veure si la franja actual és activa
-            for time_frame_dt in temp_mode.keys():
-                frame_end_dt = time_frame_dt + timedelta(minutes=min_time_step)
-                if time_frame_dt <= now < frame_end_dt:
-                    found_active_time_frame = True
+            # Pla vigent ara (temp_mode descarta les franges passades). La
+            # franja planificada pot no començar en un quart d'hora: la
+            # producció es busca pel seu inici real
+            planned = temp_mode.active(now)
+            if planned is not None:
+                time_frame_dt, planned_modes = planned
+                planned_mode = choose_mode(planned_modes, current_dem_mode)
+                found_active_time_frame = True
+                if len(planned_modes) > 1:
                     logger.info(
-                        f"{now}: Franja horària actual ({now.isoformat(timespec='seconds')}) "
-                        f"activa per a l’operació."
+                        f"{now}: Plans de calor i fred solapats en la franja; "
+                        f"s'executa el de la demanda objectiu actual ({planned_mode})."
                     )
+                logger.info(
+                    f"{now}: Franja horària actual ({now.isoformat(timespec='seconds')}) "
+                    f"activa per a l’operació."
+                )
+
+                current_frame_prod_value = 0.0
+                current_frame_str = time_frame_dt.isoformat(timespec='seconds')
+                curr_mode = "hot" if planned_mode else "cold"
 
-                    current_frame_prod_value = 0.0
-                    current_frame_str = time_frame_dt.isoformat(timespec='seconds')
-                    curr_mode = "hot" if temp_mode[time_frame_dt] else "cold"
-
-                    if curr_mode == "hot" and current_frame_str in prod_data['hot']:
-                        current_frame_prod_value = float(prod_data['hot'][current_frame_str])
-                        logger.info(
-                            f"{now}: Producció calor prevista en aquesta franja: "
-                            f"{fmt_joules(current_frame_prod_value)} [Joules]."
-                        )
-                    elif curr_mode == "cold" and current_frame_str in prod_data['cold']:
-                        current_frame_prod_value = float(prod_data['cold'][current_frame_str])
-                        logger.info(
-                            f"{now}: Producció fred prevista en aquesta franja: "
-                            f"{fmt_joules(current_frame_prod_value)} [Joules]."
-                        )
-                    else:
-                        logger.info(
-                            f"{now}: Sense dades de producció per a la franja actual en mode {curr_mode}."
-                        )
-
-                    energy_consumed_pump_wh = P_bomba_watts * time_step_hours
+                if curr_mode == "hot" and current_frame_str in prod_data['hot']:
+                    current_frame_prod_value = float(prod_data['hot'][current_frame_str])
+                    logger.info(
+                        f"{now}: Producció calor prevista en aquesta franja: "
+                        f"{fmt_joules(current_frame_prod_value)} [Joules]."
+                    )
+                elif curr_mode == "cold" and current_frame_str in prod_data['cold']:
+                    current_frame_prod_value = float(prod_data['cold'][current_frame_str])
+                    logger.info(
+                        f"{now}: Producció fred prevista en aquesta franja: "
+                        f"{fmt_joules(current_frame_prod_value)} [Joules]."
+                    )
+                else:
                     logger.info(
-                        f"{now}: Energia consumida per la bomba en aquesta franja: "
-                        f"{fmt_joules(energy_consumed_pump_wh)} [Wh]."
+                        f"{now}: Sense dades de producció per a la franja actual en mode {curr_mode}."
                     )
 
+                energy_consumed_pump_wh = P_bomba_watts * time_step_hours
+                logger.info(
+                    f"{now}: Energia consumida per la bomba en aquesta franja: "
+                    f"{fmt_joules(energy_consumed_pump_wh)} [Wh]."
+                )
+
+                COP = 0
+                if energy_consumed_pump_wh > 0:
+                    COP = current_frame_prod_value / energy_consumed_pump_wh
+                    logger.info(f"{now}: COP calculat: {COP:.2f}.")
+                else:
                     COP = 0
-                    if energy_consumed_pump_wh > 0:
-                        COP = current_frame_prod_value / energy_consumed_pump_wh
-                        logger.info(f"{now}: COP calculat: {COP:.2f}.")
-                    else:
-                        COP = 0
-                        logger.info(
-                            f"{now}: Energia consumida per la bomba és zero, COP=0."
-                        )
-
-                    # --- DECISIÓN REAL CON COP ---
-                    logger.info(f"curr_mode: {curr_mode}")
-
-                    if COP >= COP_MIN and current_dem_target > 0:
-                        # Buen rendimiento y aún hay demanda → accion = YES
-                        action = 1   # 'yes'
-                        Ttank = 1
-                        logger.info(
-                            f"{now}: COP >= {COP_MIN} i hi ha demanda. "
-                            f"Bomba ON (action=1). Ttank = {Ttank}."
-                        )
-                    else:
-                        # COP bajo o no hay demanda → accion = NO (pero no Parada dura)
-                        action = 0   # 'no'
-                        logger.info(
-                            f"{now}: COP < {COP_MIN} o no hi ha demanda. "
-                            f"Bomba OFF (action=0)."
-                        )
-
-                    # Actualizamos el mode solo para log (no para decidir YES/NO)
-                    mode = curr_mode
-                    break
+                    logger.info(
+                        f"{now}: Energia consumida per la bomba és zero, COP=0."
+                    )
+
+                # --- DECISIÓN REAL CON COP ---
+                logger.info(f"curr_mode: {curr_mode}")
+
+                if COP >= COP_MIN and current_dem_target > 0:
+                    # Buen rendimiento y aún hay demanda → accion = YES
+                    action = 1   # 'yes'
+                    Ttank = 1
+                    logger.info(
+                        f"{now}: COP >= {COP_MIN} i hi ha demanda. "
+                        f"Bomba ON (action=1). Ttank = {Ttank}."
+                    )
+                else:
+                    # COP bajo o no hay demanda → accion = NO (pero no Parada dura)
+                    action = 0   # 'no'
+                    logger.info(
+                        f"{now}: COP < {COP_MIN} o no hi ha demanda. "
+                        f"Bomba OFF (action=0)."
+                    )
+
+                # Actualizamos el mode solo para log (no para decidir YES/NO)
+                mode = curr_mode
 
             l.append(found_active_time_frame)
 
@@ -627,7 +639,7 @@ if __name__ == '__main__':
     )
     logger.info(f"Ventana de planificacion frio: {start_dem_cool} <-> {end_dem_cool}")
 
-    dem_f = calculate_dem_for_period(dem_data["cold_dem"], start_dem_cool, end_dem_cool)
+    dem_f = calculate_dem_for_period(dem_index["cold_dem"], start_dem_cool, end_dem_cool)
     logger.info(f"{now}: Demanda de frio estimada para el periodo: {fmt_joules(dem_f)} [Joules].")
 
     selected_time_frames_cold, total_predicted_production_cold = (
@@ -0,0 +1,93 @@
+"""
+Índice de sumas acumuladas de la previsión de demanda de /predict.
+
+La serie {timestamp ISO -> demanda} se convierte una sola vez en un array
+ordenado de minutos y la suma acumulada de sus valores. La demanda de
+cualquier periodo es entonces dos búsquedas binarias y una resta, en lugar de
+recorrer el periodo minuto a minuto, y total_many() calcula de golpe los
+totales de muchas ventanas (para comparar planes).
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Formato de las claves de la serie de demanda (como las busca el SC)
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+_MINUTE = np.timedelta64(1, "m")
+
+
+def _minutes(when) -> np.ndarray:
+    """
+    Minuto (datetime64[m], truncado) de uno o varios datetime.
+    """
+    return np.asarray(when, dtype="datetime64[us]").astype("datetime64[m]")
+
+
+class DemandIndex:
+    """
+    Demanda por minuto, ordenada, con su suma acumulada.
+    """
+
+    def __init__(self, minutes: np.ndarray, values: np.ndarray):
+        order = np.argsort(minutes, kind="stable")
+        self.minutes = minutes[order]
+        # cumsum[i] = suma de los i primeros valores
+        self.cumsum = np.concatenate(([0.0], np.cumsum(values[order], dtype=np.float64)))
+
+    @classmethod
+    def from_series(cls, df_demand) -> "DemandIndex":
+        """
+        Índice de un diccionario o serie {"YYYY-MM-DDTHH:MM:SS" -> demanda}.
+
+        Solo cuentan las claves en ese formato y en minutos exactos (segundos
+        a 0), las mismas que encontraba el recorrido minuto a minuto.
+        """
+        series = pd.Series(df_demand, dtype=object)
+        times = pd.to_datetime(series.index.astype(str), format=ISO_FORMAT, errors="coerce")
+        valid = np.asarray(~times.isna() & (times.second == 0))
+
+        values = series.to_numpy()[valid].astype(np.float64)
+        return cls(times[valid].to_numpy().astype("datetime64[m]"), values)
+
+    def __len__(self) -> int:
+        return len(self.minutes)
+
+    def _bounds(self, start, end) -> tuple[np.ndarray, np.ndarray]:
+        # Minutos [floor(start), floor(start) + ceil((end - start) / 1 min)):
+        # los que visita un recorrido de 1 minuto desde start mientras < end
+        start = np.asarray(start, dtype="datetime64[us]")
+        end = np.asarray(end, dtype="datetime64[us]")
+        span = np.maximum(end - start, np.timedelta64(0, "us"))
+        steps = -(-span.astype(np.int64) // 60_000_000)
+        first = _minutes(start)
+        return first, first + steps * _MINUTE
+
+    def total(self, start_dt: datetime, end_dt: datetime) -> float:
+        """
+        Demanda total de los minutos en [start_dt, end_dt).
+        """
+        first, stop = self._bounds(start_dt, end_dt)
+        lo, hi = np.searchsorted(self.minutes, [first, stop])
+        return float(self.cumsum[hi] - self.cumsum[lo])
+
+    def total_many(self, starts, ends) -> np.ndarray:
+        """
+        Demanda total de cada ventana [starts[i], ends[i]).
+        """
+        first, stop = self._bounds(list(starts), list(ends))
+        lo = np.searchsorted(self.minutes, first)
+        hi = np.searchsorted(self.minutes, stop)
+        return self.cumsum[hi] - self.cumsum[lo]
+
+    def windows(self, start_dt: datetime, length: timedelta, count: int,
+                every: timedelta = None) -> np.ndarray:
+        """
+        Totales de `count` ventanas de duración `length` que empiezan en
+        start_dt y se desplazan `every` (por defecto, `length`) cada vez.
+        """
+        every = length if every is None else every
+        starts = [start_dt + k * every for k in range(count)]
+        return self.total_many(starts, [s + length for s in starts])
@@ -4,7 +4,10 @@ import pandas as pd
 import numpy as np
 import json
 
+from api.utils import features
 from sc.logger import get_logger
+from sc.utils.tail_reader import tail_reader
+from sc.utils.var_store import parse_decimal
 logger = get_logger(__name__)
 
 # lect_dir = r"C:\Users\Usuari\Documents\RCE\lecturas0.csv"
@@ -19,14 +22,6 @@ def get_indices(dfn, n, size):
     last = len(dfn) - 1
     return [last - 3* k * size - n for k in range(24) if last - k * size - n >= 0]
 
-def get_mode(t):
-    from datetime import time
-
-    hora_inicio = time(8, 0)  # 7:00
-    hora_fin = time(19, 0)
-
-    return "1" if hora_inicio.hour <= t.hour < hora_fin.hour else "2"
-
 # def get_dict(df, n, size):
 #     val = get_indices(df, n, size)
 #     subset = df.iloc[val].sort_index()
@@ -77,6 +72,39 @@ def safe_float(value, default=np.nan):
     except Exception:
         return default
     
+# Variable lógica de cada columna de sensor de la ventana
+WINDOW_SENSORS = {
+    "cold": "cold",
+    "hot": "hot",
+    "wind_vel_m_s": "v_vent",
+    "solar_rad_w_m2": "solar",
+    "ir_rad_w_m2": "ir",
+}
+
+TIME_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+
+def build_window(general: dict) -> dict:
+    """
+    Ventana para /predict a partir de los diccionarios {TimeString -> valor}
+    de cada variable lógica, con las marcas de tiempo de 'cold'. Las
+    variables cíclicas, el modo y los resets se calculan de golpe con
+    api.utils.features, igual que en la API.
+    """
+    keys = list(general["cold"])
+    logger.debug(f"build_window: número de claves en 'cold'={len(keys)}")
+    times = pd.to_datetime(keys, format=TIME_FORMAT)
+    sensors = {
+        column: parse_decimal([general[name].get(h) for h in keys])
+        for column, name in WINDOW_SENSORS.items()
+    }
+    rows = features.build_rows(times, sensors)
+    if rows:
+        logger.debug(f"build_window: último registro {keys[-1]}: {rows[-1]}")
+    logger.debug(f"build_window: total registros={len(rows)}")
+    return {"data": rows}
+
+
 def get_last_data_from_db_ramon():
     df = pd.read_csv(lect_dir, sep=";",low_memory=False)
     df2 = pd.read_csv(solar_dir, sep=";",low_memory=False)
@@ -96,38 +124,7 @@ def get_last_data_from_db_ramon():
         "ir": diccionario_5
     }
 
-    seconds_in_day = 24 * 60 * 60
-
-    ret = {}
-    l = []
-    for h in general["cold"].keys():
-        curr = {}
-        hd = datetime.strptime(h, "%d/%m/%Y %H:%M:%S")
-        time_seconds = hd.hour * 3600 + hd.minute * 60 + hd.second
-        doy = hd.timetuple().tm_yday
-
-        # curr["cold"] = float(general["cold"][h].replace(",", "."))
-        # curr["hot"] = float(general["hot"][h].replace(",", "."))
-        # curr["wind_vel_m_s"] = float(general["v_vent"][h].replace(",", "."))
-        # curr["solar_rad_w_m2"] = float(general["solar"][h].replace(",", "."))
-        # curr["ir_rad_w_m2"] = float(general["ir"][h].replace(",", "."))
-
-        curr["cold"] = safe_float(general["cold"].get(h))
-        curr["hot"] = safe_float(general["hot"].get(h))
-        curr["wind_vel_m_s"] = safe_float(general["v_vent"].get(h))
-        curr["solar_rad_w_m2"] = safe_float(general["solar"].get(h))
-        curr["ir_rad_w_m2"] = safe_float(general["ir"].get(h))
-
-        curr["reset_cold"] = 7
-        curr["reset_hot"] = 16
-        curr["mode"] = get_mode(hd)
-        curr["day_sin"] = np.sin(2 * np.pi * time_seconds / seconds_in_day)
-        curr["day_cos"] = np.cos(2 * np.pi * time_seconds / seconds_in_day)
-        curr["year_sin"] = np.sin(2 * np.pi * doy / 365)
-        curr["year_cos"] = np.cos(2 * np.pi * doy / 365)
-        l.append(curr)
-    ret["data"] = l
-    return ret
+    return build_window(general)
 
 def get_last_data_from_db_legacy():
     logger.debug("get_last_data_from_db: leyendo CSVs")
@@ -159,67 +156,7 @@ def get_last_data_from_db_legacy():
         "ir": diccionario_5
     }
 
-    seconds_in_day = 86400
-    ret = {}
-    l = []
-
-    logger.debug(f"get_last_data_from_db: número de claves en 'cold'={len(general['cold'])}")
-
-    for i, h in enumerate(general["cold"].keys()):
-        curr = {}
-        logger.debug(f"Iteración {i}, timestamp={h}")
-
-        hd = datetime.strptime(h, "%d/%m/%Y %H:%M:%S")
-        time_seconds = hd.hour * 3600 + hd.minute * 60 + hd.second
-        doy = hd.timetuple().tm_yday
-
-        # Valores de entrada originales
-        raw_cold  = general["cold"].get(h)
-        raw_hot   = general["hot"].get(h)
-        raw_vv    = general["v_vent"].get(h)
-        raw_solar = general["solar"].get(h)
-        raw_ir    = general["ir"].get(h)
-
-        logger.debug(
-            "Valores crudos en h=%s: cold=%r, hot=%r, v_vent=%r, solar=%r, ir=%r",
-            h, raw_cold, raw_hot, raw_vv, raw_solar, raw_ir
-        )
-
-        curr["cold"]           = safe_float(raw_cold)
-        curr["hot"]            = safe_float(raw_hot)
-        curr["wind_vel_m_s"]   = safe_float(raw_vv)
-        curr["solar_rad_w_m2"] = safe_float(raw_solar)
-        curr["ir_rad_w_m2"]    = safe_float(raw_ir)
-
-        curr["reset_cold"] = 7
-        curr["reset_hot"] = 16
-        curr["mode"] = get_mode(hd)
-        curr["day_sin"] = np.sin(2 * np.pi * time_seconds / seconds_in_day)
-        curr["day_cos"] = np.cos(2 * np.pi * time_seconds / seconds_in_day)
-        curr["year_sin"] = np.sin(2 * np.pi * doy / 365)
-        curr["year_cos"] = np.cos(2 * np.pi * doy / 365)
-
-        logger.debug(
-            "Curr en h=%s: cold=%s, hot=%s, wind=%s, solar=%s, ir=%s, mode=%s",
-            h,
-            curr["cold"],
-            curr["hot"],
-            curr["wind_vel_m_s"],
-            curr["solar_rad_w_m2"],
-            curr["ir_rad_w_m2"],
-            curr["mode"],
-        )
-
-        l.append(curr)
-
-        # Para no explotar el log, puedes cortar tras X iteraciones de debug:
-        # if i > 20:
-        #     logger.debug("... más filas omitidas en log ...")
-        #     break
-
-    ret["data"] = l
-    logger.debug(f"get_last_data_from_db: total registros en ret['data']={len(l)}")
-    return ret
+    return build_window(general)
 
 
 
@@ -252,21 +189,19 @@ VARIABLE_SOURCES = {
 }
 
 def get_last_data_from_db():
-    logger.info("get_last_data_from_db: leyendo CSVs")
-    df = pd.read_csv(lect_dir, sep=";",encoding="latin-1", low_memory=False)
-    df2 = pd.read_csv(solar_dir, sep=";",encoding="latin-1", low_memory=False)
-    df3 = pd.read_csv(ir_dir, encoding="latin-1", sep=";", low_memory=False)
+    logger.info("get_last_data_from_db: leyendo las filas nuevas de los CSVs")
 
-    logger.debug(f"get_last_data_from_db: df.shape={df.shape}")
-    logger.debug(f"get_last_data_from_db: df2.shape={df2.shape}")
-    logger.debug(f"get_last_data_from_db: df3.shape={df3.shape}")
-
-    # Cache de dataframes por ruta (source en VARIABLE_SOURCES)
-    df_cache = {
-        lect_dir: df,
-        solar_dir: df2,
-        ir_dir: df3,
-    }
+    # Un lector incremental por fichero: solo se procesan las filas añadidas
+    # desde el ciclo anterior. Sus muestras, pivotadas por VarName en un
+    # VarStore, se comparten entre todas las entradas de VARIABLE_SOURCES.
+    stores = {}
+    for cfg in VARIABLE_SOURCES.values():
+        src_path = cfg["source"]
+        if src_path not in stores:
+            reader = tail_reader(src_path)
+            added = reader.poll()
+            logger.debug(f"get_last_data_from_db: {added} filas nuevas en {src_path}")
+            stores[src_path] = reader.store()
 
     # Construir diccionarios por VarName usando VARIABLE_SOURCES
     general = {}
@@ -274,120 +209,20 @@ def get_last_data_from_db():
         src_path = cfg["source"]
         varnames = cfg["varnames"]
 
-        df_src = df_cache[src_path]
-
         logger.debug(
             "Construyendo diccionario para '%s' desde CSV='%s' con varnames=%s",
             logical_name,
             src_path,
             varnames,
         )
-        general[logical_name] = build_var_dict_from_names(df_src, varnames, n_samples=24)
+        general[logical_name] = stores[src_path].last(varnames, n_samples=24)
         logger.debug(
             "Diccionario '%s': len=%d",
             logical_name,
             len(general[logical_name]),
         )
 
-    seconds_in_day = 24 * 60 * 60
-    ret = {}
-    l = []
-
-    # Usamos las claves de 'cold' como referencia temporal
-    cold_keys = list(general["cold"].keys())
-    logger.debug(f"get_last_data_from_db: número de claves en 'cold'={len(cold_keys)}")
-
-    for i, h in enumerate(cold_keys):
-        curr = {}
-        logger.debug(f"Iteración {i}, timestamp={h}")
-
-        hd = datetime.strptime(h, "%d/%m/%Y %H:%M:%S")
-        time_seconds = hd.hour * 3600 + hd.minute * 60 + hd.second
-        doy = hd.timetuple().tm_yday
-
-        raw_cold = general["cold"].get(h)
-        raw_hot = general["hot"].get(h)
-        raw_vv = general["v_vent"].get(h)
-        raw_solar = general["solar"].get(h)
-        raw_ir = general["ir"].get(h)
-
-        logger.debug(
-            "Valores crudos en h=%s: cold=%r, hot=%r, v_vent=%r, solar=%r, ir=%r",
-            h,
-            raw_cold,
-            raw_hot,
-            raw_vv,
-            raw_solar,
-            raw_ir,
-        )
-
-        curr["cold"] = safe_float(raw_cold)
-        curr["hot"] = safe_float(raw_hot)
-        curr["wind_vel_m_s"] = safe_float(raw_vv)
-        curr["solar_rad_w_m2"] = safe_float(raw_solar)
-        curr["ir_rad_w_m2"] = safe_float(raw_ir)
-
-        curr["reset_cold"] = 7
-        curr["reset_hot"] = 16
-        curr["mode"] = get_mode(hd)
-        curr["day_sin"] = np.sin(2 * np.pi * time_seconds / seconds_in_day)
-        curr["day_cos"] = np.cos(2 * np.pi * time_seconds / seconds_in_day)
-        curr["year_sin"] = np.sin(2 * np.pi * doy / 365)
-        curr["year_cos"] = np.cos(2 * np.pi * doy / 365)
-
-        logger.debug(
-            "Curr en h=%s: cold=%s, hot=%s, wind=%s, solar=%s, ir=%s, mode=%s",
-            h,
-            curr["cold"],
-            curr["hot"],
-            curr["wind_vel_m_s"],
-            curr["solar_rad_w_m2"],
-            curr["ir_rad_w_m2"],
-            curr["mode"],
-        )
-
-        l.append(curr)
-
-    ret["data"] = l
-    logger.debug(f"get_last_data_from_db: total registros en ret['data']={len(l)}")
-    return ret
-
-def build_var_dict_from_names(df: pd.DataFrame, varnames, n_samples: int = 24):
-    if isinstance(varnames, str):
-        varnames = [varnames]
-
-    logger.debug(f"build_var_dict_from_names: varnames={varnames}, n_samples={n_samples}")
-
-    if "VarName" not in df.columns:
-        logger.warning("build_var_dict_from_names: columna 'VarName' no encontrada en df")
-        return {}
-
-    mask = df["VarName"].isin(varnames)
-    subset = df[mask]
-
-    # 🔹 Ordenar por tiempo creciente
-    if "Time_ms" in subset.columns:
-        subset = subset.sort_values("Time_ms")
-    else:
-        subset = subset.sort_index()
-
-    # 🔹 QUEDARSE CON LOS ÚLTIMOS n_samples (LOS MÁS RECIENTES)
-    subset = subset.tail(n_samples)
-
-    # logger.debug(
-    #     "build_var_dict_from_names: subset final shape=%s, últimas filas:\n%s",
-    #     subset.shape,
-    #     subset.tail(5).to_string()
-    # )
-
-    logger.debug(
-        "build_var_dict_from_names: subset final shape=%s, todas filas:\n%s",
-        subset.shape,
-        subset.to_string()
-    )
-
-    result = dict(zip(subset["TimeString"], subset["VarValue"]))
-    return result
+    return build_window(general)
 
 def build_var_dict_from_names(
     df: pd.DataFrame,
@@ -0,0 +1,128 @@
+"""
+Horario de franjas planificadas del SC, indexado por franja de 15 minutos.
+
+calculate_optimal_production_plan asigna un modo (1 calor, 0 frío) a cada
+franja elegida y get_decision pregunta en cada ciclo qué plan cubre el instante
+actual. Las franjas de la previsión no tienen por qué empezar en un cuarto de
+hora (10:07, 10:22...), así que se guarda su inicio real y cubren
+[inicio, inicio + paso). El índice agrupa los inicios por el cuarto de hora en
+que caen: una franja que cubre `now` empieza en el cuarto de `now` o en el
+anterior, y la consulta solo mira esos dos. Las franjas ya pasadas se
+descartan al consultar y los planes de calor y de frío de una misma franja
+conviven sin pisarse: active() los devuelve todos y get_decision elige cuál se
+ejecuta.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+
+from sc.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Duración de la franja (minutos)
+SLOT_MINUTES = 15
+
+
+class SlotSchedule:
+    """
+    Modos planificados por franja: {inicio de franja -> modos}, en el orden
+    en que se han planificado.
+    """
+
+    def __init__(self, slot_minutes: int = SLOT_MINUTES):
+        self.slot_minutes = int(slot_minutes)
+        self.slot = timedelta(minutes=self.slot_minutes)
+        self._frames: dict[datetime, dict[int, None]] = {}
+        self._slots: dict[datetime, list[datetime]] = {}  # cuarto de hora -> inicios
+        self._starts: list[datetime] = []  # montículo de inicios, para descartar las pasadas
+
+    def slot_start(self, when: datetime) -> datetime:
+        """
+        Inicio del cuarto de hora (de slot_minutes) que contiene `when`.
+        """
+        return when.replace(
+            minute=when.minute - when.minute % self.slot_minutes, second=0, microsecond=0
+        )
+
+    def add(self, frames, mode: int) -> None:
+        """
+        Planifica `mode` en las franjas que empiezan en cada instante de
+        `frames`. Si la franja ya tenía ese modo, pasa a ser el más reciente.
+        """
+        for frame in frames:
+            modes = self._frames.get(frame)
+            if modes is None:
+                modes = self._frames[frame] = {}
+                self._slots.setdefault(self.slot_start(frame), []).append(frame)
+                heapq.heappush(self._starts, frame)
+            modes.pop(mode, None)
+            modes[mode] = None
+
+    def evict(self, now: datetime) -> int:
+        """
+        Descarta las franjas que terminan en o antes de `now`.
+
+        :return: número de franjas descartadas
+        """
+        evicted = 0
+        while self._starts and self._starts[0] + self.slot <= now:
+            start = heapq.heappop(self._starts)
+            del self._frames[start]
+            slot = self.slot_start(start)
+            self._slots[slot].remove(start)
+            if not self._slots[slot]:
+                del self._slots[slot]
+            evicted += 1
+        if evicted:
+            logger.debug(f"SlotSchedule: {evicted} franjas pasadas descartadas")
+        return evicted
+
+    def frame_at(self, when: datetime):
+        """
+        Inicio de la franja planificada que cubre `when` (la primera que se
+        planificó, si se solapan varias), o None.
+        """
+        current = self.slot_start(when)
+        for slot in (current - self.slot, current):
+            for start in self._slots.get(slot, ()):
+                if start <= when < start + self.slot:
+                    return start
+        return None
+
+    def modes_at(self, when: datetime) -> list[int]:
+        """
+        Modos planificados en la franja que cubre `when`, del más antiguo al
+        más reciente.
+        """
+        start = self.frame_at(when)
+        return [] if start is None else list(self._frames[start])
+
+    def active(self, now: datetime):
+        """
+        Franja vigente en `now` como (inicio, modos), con todos los modos
+        planificados en ella del más antiguo al más reciente, o None si ningún
+        plan la cubre. Antes descarta las franjas pasadas.
+        """
+        self.evict(now)
+        start = self.frame_at(now)
+        if start is None:
+            return None
+        return start, list(self._frames[start])
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self._slots.clear()
+        self._starts.clear()
+
+    def __getitem__(self, when: datetime) -> int:
+        start = self.frame_at(when)
+        if start is None:
+            raise KeyError(when)
+        return next(reversed(self._frames[start]))
+
+    def __contains__(self, when: datetime) -> bool:
+        return self.frame_at(when) is not None
+
+    def __len__(self) -> int:
+        return len(self._frames)
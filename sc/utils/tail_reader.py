@@ -0,0 +1,242 @@
+"""
+Lectura incremental de los CSV de WinCC (Lecturas0, Solarimeter0, Pyrgeometer0).
+
+Los ficheros solo crecen, así que en cada ciclo se leen únicamente los bytes
+añadidos desde la lectura anterior: se recuerda el desplazamiento y la última
+línea incompleta de cada fichero, y las muestras recientes de cada VarName se
+guardan en un buffer circular acotado. El coste por ciclo depende de lo que se
+ha añadido, no del tamaño del fichero.
+
+La última línea sin salto de línea se incorpora si ya tiene todas las
+columnas, como provisional: si en la siguiente lectura la línea ha crecido, la
+muestra provisional se sustituye.
+
+Si el fichero se rota (otro inode) o se trunca (tamaño menor que el
+desplazamiento), se vuelve a leer desde el principio; las muestras que no son
+más recientes que las ya guardadas se descartan.
+"""
+
+import csv
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+from sc.logger import get_logger
+from sc.utils.var_store import VarSeries, VarStore, parse_decimal
+
+logger = get_logger(__name__)
+
+# Muestras guardadas por VarName: 24 muestras de 1 cada 3 necesitan 70, con margen
+DEFAULT_MAXLEN = 512
+
+DEFAULT_ENCODING = "latin-1"
+DEFAULT_SEP = ";"
+
+# Bytes leídos por llamada a read() (la primera lectura puede ser grande)
+CHUNK_SIZE = 1 << 20
+
+COLUMNS = ("VarName", "TimeString", "VarValue", "Time_ms")
+
+
+class CsvTailReader:
+    """
+    Lector persistente de un CSV de WinCC en formato largo
+    (VarName;TimeString;VarValue;Validity;Time_ms).
+
+    poll() incorpora las filas nuevas, con Time_ms y VarValue convertidos a
+    float de golpe; samples() devuelve las muestras recientes como
+    (Time_ms, TimeString, valor) y store() las da como VarStore.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        maxlen: int = DEFAULT_MAXLEN,
+        encoding: str = DEFAULT_ENCODING,
+        sep: str = DEFAULT_SEP,
+    ):
+        self.path = path
+        self.maxlen = maxlen
+        self.encoding = encoding
+        self.sep = sep
+
+        self._offset = 0
+        self._partial = b""
+        self._identity = None
+        self._columns = None  # posición de cada columna de COLUMNS en la cabecera
+        self._provisional = None  # (VarName, muestra) de la última línea incompleta
+        self._buffers: dict[str, deque] = {}
+        self._store: VarStore = None  # se reconstruye si hay muestras nuevas
+        self._lock = threading.Lock()
+
+        self.rows_read = 0
+        self.bytes_read = 0
+        self.resets = 0
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def _reset(self, reason: str) -> None:
+        logger.info(f"CsvTailReader: {self.path} {reason}, se vuelve a leer desde el principio")
+        self._offset = 0
+        self._partial = b""
+        self._columns = None
+        self._provisional = None
+        self.resets += 1
+
+    def poll(self) -> int:
+        """
+        Lee lo que se ha añadido al fichero desde la última llamada.
+
+        :return: número de filas nuevas incorporadas
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                logger.warning(f"CsvTailReader: no existe {self.path}")
+                return 0
+
+            identity = (stat.st_dev, stat.st_ino)
+            if self._identity is not None and identity != self._identity:
+                self._reset("rotado")
+            elif stat.st_size < self._offset:
+                self._reset("truncado")
+            self._identity = identity
+
+            if stat.st_size == self._offset:
+                return 0
+
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                chunks = [self._partial]
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    self._offset += len(chunk)
+                    self.bytes_read += len(chunk)
+
+            self._drop_provisional()
+            data = b"".join(chunks)
+            # La última línea puede estar a medio escribir: se guarda para releerla
+            end = data.rfind(b"\n") + 1
+            self._partial = data[end:]
+            lines = data[:end].decode(self.encoding).splitlines()
+            if self._partial.strip():
+                lines.append(self._partial.decode(self.encoding))
+            return self._ingest(lines, provisional_tail=bool(self._partial.strip()))
+
+    def _drop_provisional(self) -> None:
+        if self._provisional is None:
+            return
+        var_name, sample = self._provisional
+        buffer = self._buffers.get(var_name)
+        if buffer and buffer[-1] is sample:
+            buffer.pop()
+            self.rows_read -= 1
+            self._store = None
+        self._provisional = None
+
+    def _ingest(self, lines: list[str], provisional_tail: bool = False) -> int:
+        rows = []
+        for row in csv.reader(lines, delimiter=self.sep):
+            if not row:
+                continue
+            if self._columns is None:
+                # BOM de UTF-8 leído como latin-1
+                header = [c.strip().lstrip("\ufeffï»¿") for c in row]
+                if not set(COLUMNS) <= set(header):
+                    logger.warning(f"CsvTailReader: cabecera inesperada en {self.path}: {header}")
+                    return 0
+                self._columns = [header.index(c) for c in COLUMNS]
+                continue
+            if len(row) > max(self._columns):
+                rows.append([row[i] for i in self._columns])
+        if not rows:
+            return 0
+
+        var_names, time_strings, var_values, times_ms = zip(*rows)
+        # Decimales con coma convertidos de golpe
+        times = parse_decimal(times_ms).tolist()
+        values = parse_decimal(var_values).tolist()
+
+        added = 0
+        last_row = len(rows) - 1
+        for n, (var_name, time_string, t, value) in enumerate(zip(var_names, time_strings, times, values)):
+            sample = (t, time_string, value)
+            buffer = self._buffers.get(var_name)
+            if buffer is None:
+                buffer = self._buffers[var_name] = deque(maxlen=self.maxlen)
+            # Tras una rotación o un truncado no se repiten muestras ya guardadas
+            elif buffer and t <= buffer[-1][0]:
+                continue
+            buffer.append(sample)
+            added += 1
+            if provisional_tail and n == last_row:
+                self._provisional = (var_name, sample)
+
+        if added:
+            self._store = None
+        self.rows_read += added
+        return added
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def varnames(self) -> list[str]:
+        with self._lock:
+            return list(self._buffers)
+
+    def samples(self, varnames) -> list[tuple[float, str, float]]:
+        """
+        Muestras guardadas de una o varias VarName, en orden de Time_ms.
+        """
+        if isinstance(varnames, str):
+            varnames = [varnames]
+        with self._lock:
+            merged = [s for v in varnames for s in self._buffers.get(v, ())]
+        if len(varnames) > 1:
+            merged.sort(key=lambda s: s[0])
+        return merged
+
+    def store(self) -> VarStore:
+        """
+        Muestras guardadas como VarStore (arrays por VarName); se reutiliza
+        mientras no llegan muestras nuevas.
+        """
+        with self._lock:
+            if self._store is None:
+                self._store = VarStore({
+                    name: VarSeries(
+                        np.fromiter((s[0] for s in buffer), np.float64, len(buffer)),
+                        np.fromiter((s[2] for s in buffer), np.float64, len(buffer)),
+                        np.array([s[1] for s in buffer], dtype=object),
+                    )
+                    for name, buffer in self._buffers.items()
+                })
+            return self._store
+
+    def last(self, varnames, n_samples: int = 24, step_every: int = 3) -> dict:
+        """
+        Atajo de VarStore.last sobre las muestras guardadas.
+        """
+        return self.store().last(varnames, n_samples, step_every)
+
+
+_readers: dict[str, CsvTailReader] = {}
+_readers_lock = threading.Lock()
+
+
+def tail_reader(path: str, **kwargs) -> CsvTailReader:
+    """
+    Lector del proceso para `path` (se crea la primera vez).
+    """
+    with _readers_lock:
+        reader = _readers.get(path)
+        if reader is None:
+            reader = _readers[path] = CsvTailReader(path, **kwargs)
+        return reader
@@ -0,0 +1,147 @@
+"""
+Almacén columnar por variable de los CSV de WinCC.
+
+El formato largo (una fila por VarName y instante) se pivota una sola vez: para
+cada VarName se guardan, ordenados por Time_ms, un array float64 de tiempos, un
+array float64 de valores y los TimeString. Los decimales con coma se convierten
+de golpe, no fila a fila. Consultas como "las últimas 24 muestras, 1 de cada 3"
+o "valor en el instante t" son cortes de arrays y búsquedas binarias, y el
+mismo almacén sirve a todas las entradas de VARIABLE_SOURCES de un fichero.
+
+Time_ms de WinCC es la fecha OLE (días desde 30/12/1899) multiplicada por 1e6.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Origen de las fechas OLE que usa WinCC en Time_ms
+WINCC_EPOCH = datetime(1899, 12, 30)
+TIME_MS_PER_DAY = 1e6
+
+
+def parse_decimal(values) -> np.ndarray:
+    """
+    Convierte de golpe valores de WinCC ("8,362811", "-4,34E-04", 0, "") a
+    float64; lo que no es un número queda como NaN.
+    """
+    series = pd.Series(values, dtype=object).astype(str).str.replace(",", ".", regex=False)
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def wincc_time(when: datetime) -> float:
+    """
+    Time_ms de WinCC de un datetime (sin zona horaria, hora local de la planta).
+    """
+    return (when - WINCC_EPOCH).total_seconds() / 86400 * TIME_MS_PER_DAY
+
+
+@dataclass(frozen=True)
+class VarSeries:
+    """
+    Serie de una variable ordenada por tiempo.
+    """
+
+    times: np.ndarray
+    values: np.ndarray
+    labels: np.ndarray  # TimeString de cada muestra
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+
+EMPTY = VarSeries(np.empty(0), np.empty(0), np.empty(0, dtype=object))
+
+
+class VarStore:
+    """
+    Series por VarName, construidas de una sola pasada.
+    """
+
+    def __init__(self, series: dict[str, VarSeries]):
+        self._series = series
+
+    @classmethod
+    def from_columns(cls, var_names, labels, values, times) -> "VarStore":
+        """
+        Pivota columnas en formato largo (una entrada por fila del CSV).
+
+        :param var_names: VarName de cada fila
+        :param labels: TimeString de cada fila
+        :param values: VarValue de cada fila (texto o número)
+        :param times: Time_ms de cada fila (texto o número)
+        """
+        codes, names = pd.factorize(np.asarray(var_names, dtype=object))
+        if not len(names):
+            return cls({})
+        times = parse_decimal(times)
+        values = parse_decimal(values)
+        labels = np.asarray(labels, dtype=object)
+
+        # Por variable y, dentro de cada una, por tiempo (estable)
+        order = np.lexsort((times, codes))
+        sorted_codes = codes[order]
+        bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+        starts = np.concatenate(([0], bounds))
+        return cls({
+            names[sorted_codes[start]]: VarSeries(times[chunk], values[chunk], labels[chunk])
+            for start, chunk in zip(starts, np.split(order, bounds))
+        })
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "VarStore":
+        """
+        Almacén de un DataFrame leído de un CSV de WinCC.
+        """
+        times = df["Time_ms"] if "Time_ms" in df.columns else np.arange(len(df), dtype=np.float64)
+        return cls.from_columns(df["VarName"], df["TimeString"], df["VarValue"], times)
+
+    def varnames(self) -> list[str]:
+        return list(self._series)
+
+    def series(self, varnames) -> VarSeries:
+        """
+        Serie de una VarName, o de varias mezcladas en orden de tiempo.
+        """
+        if isinstance(varnames, str):
+            return self._series.get(varnames, EMPTY)
+        parts = [self._series[v] for v in varnames if v in self._series]
+        if not parts:
+            return EMPTY
+        if len(parts) == 1:
+            return parts[0]
+        times = np.concatenate([p.times for p in parts])
+        order = np.argsort(times, kind="stable")
+        return VarSeries(
+            times[order],
+            np.concatenate([p.values for p in parts])[order],
+            np.concatenate([p.labels for p in parts])[order],
+        )
+
+    def last(self, varnames, n_samples: int = 24, step_every: int = 3) -> dict:
+        """
+        Las n_samples muestras más recientes tomando 1 de cada step_every desde
+        el final, en orden cronológico, como {TimeString -> valor} (la misma
+        selección que read_data.build_var_dict_from_names).
+        """
+        series = self.series(varnames)
+        total = len(series)
+        if not total:
+            return {}
+        # Índices total-1, total-1-step, ... (los n_samples más recientes), crecientes
+        first = max(total - 1 - (n_samples - 1) * step_every, (total - 1) % step_every)
+        chosen = slice(first, total, step_every)
+        return dict(zip(series.labels[chosen].tolist(), series.values[chosen].tolist()))
+
+    def value_at(self, varname, when) -> float:
+        """
+        Valor de la última muestra en o antes de `when` (datetime o Time_ms);
+        NaN si no hay ninguna.
+        """
+        series = self.series(varname)
+        t = wincc_time(when) if isinstance(when, datetime) else float(when)
+        i = np.searchsorted(series.times, t, side="right") - 1
+        return float(series.values[i]) if i >= 0 else float("nan")
+
@@ -0,0 +1,90 @@
+# test_benchmarks.py
+#
+# Tests del banco de pruebas sin red:
+#  - Las previsiones grabadas se sirven con la fecha de hoy y sin errores, a
+#    cualquier hora (también cerca de medianoche con el reloj en UTC).
+#  - Cualquier otra petición HTTP falla dentro de offline().
+#  - La comparación con la referencia detecta las regresiones (y no el ruido).
+
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from api.rce_predictors.config.rce import open as open_local
+from api.rce_predictors.future import open as open_24h
+from api.rce_predictors.future.client import ForecastClient
+from benchmarks import offline as offline_module
+from benchmarks.bench_pipeline import check
+from benchmarks.offline import METEO_24H, NASA, WIND_SOLAR, load, offline, rebase
+
+
+def test_previsiones_grabadas_sin_red():
+    with offline():
+        bundle = ForecastClient().fetch_all()
+        with pytest.raises(requests.exceptions.ConnectionError):
+            requests.get("https://api.open-meteo.com/v1/forecast")
+
+    assert bundle.errors == {}
+    assert len(bundle.forecast_24h) == 24
+    assert len(bundle.fut_val) == 8
+
+
+def test_fechas_movidas_a_hoy():
+    now = datetime(2030, 1, 15, 9, 30)
+
+    meteo = rebase(METEO_24H, load(METEO_24H), now)
+    nasa = rebase(NASA, load(NASA), now)
+
+    # Desde el día anterior, con el primer día grabado repetido
+    recorded = load(METEO_24H)["hourly"]
+    assert meteo["hourly"]["time"][0] == "2030-01-14T00:00"
+    assert "2030-01-15T09:00" in meteo["hourly"]["time"]
+    assert len(meteo["hourly"]["time"]) == len(recorded["time"]) + 24
+    assert meteo["hourly"]["temperature_2m"] == recorded["temperature_2m"][:24] + recorded["temperature_2m"]
+    assert min(nasa["properties"]["parameter"]["ALLSKY_SFC_LW_DWN"]) == "20290115"
+
+
+@pytest.mark.parametrize("hour, minute", [(0, 5), (12, 0), (22, 3), (23, 55)])
+def test_previsiones_grabadas_a_cualquier_hora(monkeypatch, hour, minute):
+    """
+    Con el reloj del equipo en UTC, la previsión de viento y radiación (hora
+    local) y la de 24h (UTC) cubren siempre las próximas horas.
+    """
+    fixed = datetime(2030, 1, 15, hour, minute)
+
+    class FixedDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return fixed if tz is None else fixed.replace(tzinfo=timezone.utc).astimezone(tz)
+
+        @classmethod
+        def utcnow(cls):
+            return fixed
+
+    for module in (offline_module, open_local, open_24h):
+        monkeypatch.setattr(module, "datetime", FixedDateTime)
+
+    with offline():
+        bundle = ForecastClient().fetch_all()
+
+    assert bundle.errors == {}
+    assert len(bundle.fut_val) == 8
+    assert bundle.fut_val[0]["time"] == fixed.strftime("%Y-%m-%d %H:%M")
+    assert len(bundle.forecast_24h) == 24
+    assert len(rebase(WIND_SOLAR, load(WIND_SOLAR), fixed)["hourly"]["time"]) == 72
+
+
+def test_check_detecta_regresiones():
+    def results(p50, rps, error=None):
+        case = {"error": error} if error else {"p50_ms": p50, "p95_ms": p50 * 1.2}
+        return {"cases": {"temperature": case}, "throughput": {"4": {"rps": rps}}}
+
+    baseline = results(100.0, 10.0)
+
+    assert check(results(110.0, 9.0), baseline, tolerance=0.25) == []
+    assert len(check(results(130.0, 10.0), baseline, tolerance=0.25)) == 2  # p50 y p95
+    assert len(check(results(100.0, 7.0), baseline, tolerance=0.25)) == 1
+    assert len(check(results(0, 10.0, error="FileNotFoundError"), baseline)) == 1
+    # Por debajo de MIN_DELTA_MS no es una regresión
+    assert check(results(0.4, 10.0), results(0.2, 10.0), tolerance=0.25) == []
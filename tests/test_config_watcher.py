@@ -0,0 +1,76 @@
+# test_config_watcher.py
+#
+# Tests de la configuración con recarga en caliente:
+#  - La instantánea se lee una vez y es de solo lectura.
+#  - Un cambio en disco publica una instantánea nueva.
+#  - Un fichero inválido o un error al preparar mantienen la anterior.
+
+import json
+import os
+
+import pytest
+
+from api.utils.loaders import ConfigWatcher
+
+CONFIG = {"temperature": {"model-name": "a.keras", "labels": ["cold", "hot"]}}
+
+
+def write(path, content):
+    path.write_text(json.dumps(content) if isinstance(content, dict) else content)
+    # Forzamos un mtime distinto aunque el sistema de ficheros tenga poca resolución
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "run-info.json"
+    path.write_text(json.dumps(CONFIG))
+    return path
+
+
+def test_instantanea_de_solo_lectura(config_path):
+    watcher = ConfigWatcher(path=str(config_path))
+
+    snapshot = watcher.current()
+
+    assert snapshot is watcher.current()
+    assert snapshot["temperature"]["labels"] == ["cold", "hot"]
+    with pytest.raises(TypeError):
+        snapshot["temperature"]["model-name"] = "b.keras"
+    assert not watcher.poll()
+
+
+def test_cambio_en_disco_publica_nueva_instantanea(config_path):
+    prepared = []
+    watcher = ConfigWatcher(path=str(config_path), prepare=lambda old, new: prepared.append((old, new)))
+    old = watcher.current()
+
+    write(config_path, {"temperature": {"model-name": "b.keras", "labels": ["cold", "hot"]}})
+
+    assert watcher.poll()
+    assert watcher.current()["temperature"]["model-name"] == "b.keras"
+    assert prepared[0][0] is old
+
+
+def test_fichero_invalido_mantiene_la_configuracion(config_path):
+    watcher = ConfigWatcher(path=str(config_path))
+    old = watcher.current()
+
+    write(config_path, '{"temperature": ')
+
+    assert not watcher.poll()
+    assert watcher.current() is old
+
+
+def test_error_preparando_mantiene_la_configuracion(config_path):
+    def prepare(old, new):
+        raise OSError("modelo no encontrado")
+
+    watcher = ConfigWatcher(path=str(config_path), prepare=prepare)
+    old = watcher.current()
+
+    write(config_path, {"temperature": {"model-name": "c.keras", "labels": ["cold", "hot"]}})
+
+    assert not watcher.poll()
+    assert watcher.current() is old
@@ -0,0 +1,79 @@
+# test_demand_index.py
+#
+# Tests del índice de sumas acumuladas de la demanda:
+#  - total() da lo mismo que el recorrido minuto a minuto original, también
+#    con inicios y finales que no caen en minutos exactos.
+#  - Las claves que no están en formato ISO o no caen en un minuto exacto no cuentan.
+#  - total_many() y windows() dan los totales de muchas ventanas de golpe.
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sc.main import calculate_dem_for_period
+from sc.utils.demand_index import DemandIndex
+
+BASE = datetime(2025, 1, 1)
+
+
+def minute_by_minute(df_demand, start_dt, end_dt):
+    """
+    Recorrido original de calculate_dem_for_period.
+    """
+    dem = 0.0
+    current_dt = start_dt
+    while current_dt < end_dt:
+        dt_str = current_dt.replace(second=0, microsecond=0).isoformat(timespec="seconds")
+        if dt_str in df_demand:
+            dem += float(df_demand[dt_str])
+        current_dt += timedelta(minutes=1)
+    return dem
+
+
+@pytest.fixture
+def demand():
+    rng = random.Random(1)
+    return {
+        (BASE + timedelta(minutes=i)).isoformat(timespec="seconds"): rng.uniform(0, 100)
+        for i in range(3 * 24 * 60)
+        if rng.random() < 0.7
+    }
+
+
+def test_igual_que_minuto_a_minuto(demand):
+    rng = random.Random(2)
+    index = DemandIndex.from_series(demand)
+
+    for _ in range(100):
+        start = BASE + timedelta(seconds=rng.randint(-3600, 2 * 86400), microseconds=rng.randint(0, 999999))
+        end = start + timedelta(seconds=rng.randint(-600, 86400), microseconds=rng.randint(0, 999999))
+        assert index.total(start, end) == pytest.approx(minute_by_minute(demand, start, end), rel=1e-9)
+
+
+def test_claves_no_validas_no_cuentan():
+    df_demand = {
+        "2025-01-01T00:00:00": 1.0,
+        "2025-01-01T00:01:30": 5.0,  # no es un minuto exacto
+        "2025-01-01 00:02": 7.0,  # otro formato
+        "2025-01-01T00:03:00": "2.5",
+    }
+    index = DemandIndex.from_series(df_demand)
+
+    assert len(index) == 2
+    assert calculate_dem_for_period(index, BASE, BASE + timedelta(hours=1)) == 3.5
+    assert calculate_dem_for_period(pd.Series(df_demand), BASE, BASE + timedelta(hours=1)) == 3.5
+    assert DemandIndex.from_series({}).total(BASE, BASE + timedelta(hours=1)) == 0.0
+
+
+def test_muchas_ventanas(demand):
+    index = DemandIndex.from_series(demand)
+    starts = [BASE + timedelta(hours=h) for h in range(48)]
+    ends = [s + timedelta(hours=24) for s in starts]
+
+    totals = index.total_many(starts, ends)
+
+    np.testing.assert_allclose(totals, [minute_by_minute(demand, s, e) for s, e in zip(starts, ends)])
+    np.testing.assert_allclose(index.windows(BASE, timedelta(hours=24), 48, every=timedelta(hours=1)), totals)
@@ -0,0 +1,151 @@
+# test_demand_predictor.py
+#
+# Tests del camino vectorizado de la demanda:
+#  - forecast_24h_frame da los mismos valores que el bucle hora a hora original.
+#  - DemandPredictor da lo mismo que model.predict + recorte de negativos, e
+#    indexa por la hora real más un día (lo que espera get_now_val_2 del SC).
+
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+tf = pytest.importorskip("tensorflow")
+
+from api.rce_predictors.demand_predictor import DemandPredictor, columns
+from api.rce_predictors.future.open import FEATURES_24H, estimate_longwave_ir, forecast_24h_frame
+
+
+def meteo(rng):
+    """
+    Respuesta horaria de Open-Meteo (2 días) desde la hora actual.
+    """
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    return {
+        "hourly": {
+            "time": [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(48)],
+            "temperature_2m": rng.uniform(0, 35, 48).tolist(),
+            "relative_humidity_2m": rng.uniform(20, 90, 48).tolist(),
+            "surface_pressure": rng.uniform(980, 1020, 48).tolist(),
+            "windspeed_10m": rng.uniform(0, 10, 48).tolist(),
+            "shortwave_radiation": rng.uniform(0, 800, 48).tolist(),
+        }
+    }
+
+
+def legacy_rows(data, ir_by_date):
+    """
+    Cálculo original, hora a hora, de get_forecast_24h.
+    """
+    hourly = data["hourly"]
+    times = [datetime.strptime(t, "%Y-%m-%dT%H:%M") for t in hourly["time"]]
+    next_hour = (datetime.utcnow() + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+    start = next(i for i, t in enumerate(times) if t >= next_hour)
+
+    rows = []
+    for i in range(start, start + 24):
+        dt, temp, rh = times[i], hourly["temperature_2m"][i], hourly["relative_humidity_2m"][i]
+        ir = ir_by_date.get(dt.date().isoformat(), estimate_longwave_ir(temp, rh))
+        day_frac = (dt.hour * 3600 + dt.minute * 60) / 86400
+        year_frac = dt.timetuple().tm_yday / 365.0
+        rows.append([
+            temp, rh, hourly["surface_pressure"][i], hourly["shortwave_radiation"][i], ir,
+            hourly["windspeed_10m"][i],
+            math.sin(2 * math.pi * day_frac), math.cos(2 * math.pi * day_frac),
+            math.sin(2 * math.pi * year_frac), math.cos(2 * math.pi * year_frac),
+        ])
+    return times[start:start + 24], np.array(rows)
+
+
+def test_forecast_24h_frame_igual_que_bucle_original():
+    data = meteo(np.random.default_rng(0))
+    today = datetime.utcnow().date().isoformat()
+    ir_list = [{"date": today, "radiation_infrared": 310.0}]
+
+    frame = forecast_24h_frame(ir_list=ir_list, data=data)
+    times, expected = legacy_rows(data, {today: 310.0})
+
+    assert list(frame.columns) == FEATURES_24H
+    assert list(frame.index) == times
+    # Los valores se redondean a 1 decimal (6 en las cíclicas)
+    np.testing.assert_allclose(frame.to_numpy(), expected, atol=0.051)
+
+
+@pytest.fixture
+def predictor():
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential([tf.keras.Input(shape=(10,)), tf.keras.layers.Dense(2)])
+    rng = np.random.default_rng(1)
+    return DemandPredictor(
+        demand_path="unused",
+        date_format="%Y-%m-%d %H:%M",
+        model=model,
+        x_scaler=StandardScaler().fit(rng.normal(size=(50, 10))),
+        y_scaler=StandardScaler().fit(rng.normal(size=(50, 2))),
+    )
+
+
+def test_demand_predictor_vectorizado(predictor):
+    forecast = forecast_24h_frame(ir_list=[], data=meteo(np.random.default_rng(2)))
+
+    result = predictor.predict(forecast)
+
+    X_scaled = predictor._x_scaler.transform(forecast[FEATURES_24H].values)
+    expected = predictor._y_scaler.inverse_transform(predictor._model.predict(X_scaled, verbose=0))
+    expected[expected < 0] = 0
+
+    assert list(result.columns) == columns
+    assert (result.to_numpy() >= 0).all()
+    np.testing.assert_allclose(result.to_numpy(), expected, rtol=1e-5, atol=1e-5)
+    assert list(result.index) == list(forecast.index + pd.Timedelta(days=1))
+
+
+class CountingModel:
+    """
+    Envuelve el modelo y cuenta las llamadas.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.model(*args, **kwargs)
+
+
+def test_demanda_memorizada_por_hora_de_prevision(predictor):
+    predictor._model = CountingModel(predictor._model)
+    forecast = forecast_24h_frame(ir_list=[], data=meteo(np.random.default_rng(3)))
+
+    first = predictor.predict(forecast)
+    second = predictor.predict(forecast.copy())
+
+    assert predictor._model.calls == 1
+    assert predictor.memo_hits == 1
+    pd.testing.assert_frame_equal(first, second)
+
+    # Si la previsión cambia dentro de la misma hora se recalcula
+    changed = forecast.copy()
+    changed.iloc[0, 0] += 1.0
+    predictor.predict(changed)
+    assert predictor._model.calls == 2
+
+    # Y también al pasar a la hora siguiente
+    next_hour = forecast.copy()
+    next_hour.index = next_hour.index + pd.Timedelta(hours=1)
+    predictor.predict(next_hour)
+    assert predictor._model.calls == 3
+    assert len(predictor._memo) == 1
+
+
+def test_la_demanda_memorizada_no_se_modifica(predictor):
+    forecast = forecast_24h_frame(ir_list=[], data=meteo(np.random.default_rng(4)))
+
+    first = predictor.predict(forecast)
+    first.iloc[:, :] = -1
+
+    assert (predictor.predict(forecast).to_numpy() >= 0).all()
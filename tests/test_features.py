@@ -0,0 +1,160 @@
+# test_features.py
+#
+# Tests del módulo de variables de entrada compartido por el SC y la API:
+#  - Las columnas están en el orden del modelo (schemas.FEATURES).
+#  - Las variables cíclicas y el modo son los del bucle original fila a fila.
+#  - La ventana del SC, process_data y las filas del rollout de la API dan las
+#    mismas variables para los mismos instantes.
+#  - Cada paso del rollout usa la fila de la previsión de su instante.
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.rce_predictors.temperature_predictor import build_exogenous
+from api.utils import features
+from api.utils.schemas import FEATURES, Entry, EntryList, window_values
+from sc.api_data.api_req import process_data
+from sc.utils import read_data as rd
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+TIMES = [
+    datetime(2025, 1, 1, 0, 0, 0),
+    datetime(2025, 6, 1, 7, 59, 59),
+    datetime(2025, 6, 1, 8, 0, 0),
+    datetime(2025, 11, 11, 12, 42, 57),
+    datetime(2025, 11, 11, 18, 59, 0),
+    datetime(2025, 11, 11, 19, 0, 0),
+    datetime(2024, 12, 31, 23, 45, 0),
+]
+
+
+def reference(t: datetime) -> dict:
+    """
+    Bucle original de sc/utils/read_data.py para una fila.
+    """
+    time_seconds = t.hour * 3600 + t.minute * 60 + t.second
+    doy = t.timetuple().tm_yday
+    return {
+        "mode": 1.0 if 8 <= t.hour < 19 else 2.0,
+        "day_sin": np.sin(2 * np.pi * time_seconds / 86400),
+        "day_cos": np.cos(2 * np.pi * time_seconds / 86400),
+        "year_sin": np.sin(2 * np.pi * doy / 365),
+        "year_cos": np.cos(2 * np.pi * doy / 365),
+    }
+
+
+@pytest.fixture
+def sc_window(monkeypatch):
+    lect = os.path.join(DATA, "lect_test.csv")
+    sources = {
+        "hot": {"varnames": ["TempT6_RCEa", "TempT6_RCEa_v2"], "source": lect},
+        "cold": {"varnames": ["TempT9_RCEa", "TempT9_RCEa_v2"], "source": lect},
+        "v_vent": {"varnames": ["VelVent_RCEa", "VelVent_RCEa_v2"], "source": lect},
+        "solar": {"varnames": ["IO_SENSOR1_DATA_RCEa"], "source": os.path.join(DATA, "solar_test.csv")},
+        "ir": {"varnames": ["E_FIR, neto, [W/m2]_RCEb"], "source": os.path.join(DATA, "ir_test.csv")},
+    }
+    monkeypatch.setattr(rd, "VARIABLE_SOURCES", sources)
+    return rd.get_last_data_from_db()["data"]
+
+
+def test_columnas_en_el_orden_del_modelo():
+    assert features.COLUMNS == FEATURES
+
+
+def test_igual_que_el_bucle_original():
+    matrix = features.build_matrix(TIMES, {})
+
+    for t, row in zip(TIMES, matrix):
+        values = dict(zip(features.COLUMNS, row))
+        for col, expected in reference(t).items():
+            assert values[col] == pytest.approx(expected, abs=1e-12), (t, col)
+        assert values["reset_cold"] == features.RESET_COLD
+        assert values["reset_hot"] == features.RESET_HOT
+        assert np.isnan(values["cold"])
+
+
+def test_ventana_del_sc_valida_para_la_api(sc_window):
+    values = window_values(EntryList.model_validate({"data": sc_window}))
+
+    assert values.shape == (len(sc_window), len(FEATURES))
+    assert np.isfinite(values).all()
+    assert set(values[:, FEATURES.index("mode")]) <= {features.DAY_MODE, features.NIGHT_MODE}
+
+
+def test_sc_y_api_dan_las_mismas_variables():
+    # Pasos de 15 minutos que cruzan el cambio a modo de noche
+    times = [datetime(2025, 11, 11, 18, 30) + i * timedelta(minutes=15) for i in range(4)]
+    raw = {
+        "cold": ["8,362811", "8,4", "8,5", "8,6"],
+        "hot": ["22,27286", "22,1", "22", "21,9"],
+        "v_vent": ["0,2669271", "0,3", "0,2", "0,1"],
+        "solar": ["0", "0", "0", "0"],
+        "ir": ["33", "32", "31", "30"],
+    }
+
+    # SC: diccionarios {TimeString -> valor} de los CSV de WinCC
+    general = {
+        name: {t.strftime(rd.TIME_FORMAT): v for t, v in zip(times, values)}
+        for name, values in raw.items()
+    }
+    sc_rows = rd.build_window(general)["data"]
+
+    # SC (histórico): filas con 'datetime'
+    history = [
+        {
+            "datetime": pd.Timestamp(t),
+            **{
+                raw_col: float(raw[name][i].replace(",", "."))
+                for raw_col, name in [
+                    ("Cold_tank_temp_C", "cold"),
+                    ("Hot_tank_temp_C", "hot"),
+                    ("Wind_vel_m_s", "v_vent"),
+                    ("Solar_rad_W_m2", "solar"),
+                    ("IR_rad_W_m2", "ir"),
+                ]
+            },
+        }
+        for i, t in enumerate(times)
+    ]
+    processed = process_data(history)
+
+    # API: filas que el rollout añade desde el primer instante
+    exogenous = build_exogenous(
+        columns=list(FEATURES),
+        fut_val=[{"wind_speed": 0, "solar_radiation": 0, "radiation_infrared": 0}],
+        first_entry=Entry(**sc_rows[0]),
+        start=times[0],
+        horizon=len(times),
+    )
+
+    assert [row["mode"] for row in sc_rows] == [1.0, 1.0, 2.0, 2.0]
+    for t, sc_row, row in zip(times, sc_rows, processed):
+        for col, expected in reference(t).items():
+            assert sc_row[col] == pytest.approx(expected, abs=1e-12)
+        assert row == {col: sc_row[col] for col in row}
+    for col in features.CYCLIC_COLUMNS:
+        np.testing.assert_allclose(
+            exogenous[:, FEATURES.index(col)], [row[col] for row in sc_rows], atol=1e-6
+        )
+
+
+def test_cada_paso_usa_su_fila_de_la_prevision():
+    fut_val = [
+        {"wind_speed": float(i), "solar_radiation": 10.0 * i, "radiation_infrared": 100.0 + i}
+        for i in range(3)
+    ]
+    first = Entry(**dict.fromkeys(FEATURES, 1.0))
+
+    exogenous = build_exogenous(
+        columns=list(FEATURES), fut_val=fut_val, first_entry=first, start=TIMES[0], horizon=5
+    )
+
+    # Pasado el final de la previsión se repite la última fila
+    np.testing.assert_array_equal(exogenous[:, FEATURES.index("wind_vel_m_s")], [0, 1, 2, 2, 2])
+    np.testing.assert_array_equal(exogenous[:, FEATURES.index("solar_rad_w_m2")], [0, 10, 20, 20, 20])
+    np.testing.assert_array_equal(exogenous[:, FEATURES.index("ir_rad_w_m2")], [100, 101, 102, 102, 102])
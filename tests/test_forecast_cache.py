@@ -0,0 +1,166 @@
+# test_forecast_cache.py
+#
+# Tests de la caché de previsiones externas:
+#  - Dentro del TTL no se repite la petición HTTP.
+#  - La caché en disco sobrevive a un reinicio (nueva instancia).
+#  - Pasado el TTL se devuelve el dato antiguo y se refresca en segundo plano.
+#  - Si la red falla se devuelve la última previsión disponible.
+#  - Al escribir se borran de memoria y de disco las entradas que ya han pasado
+#    el margen stale (las claves llevan la fecha, no se vuelven a pedir), como
+#    mucho una vez por intervalo de purga.
+
+import threading
+import time
+
+import pytest
+import requests
+
+from api.rce_predictors.future.cache import ForecastCache, OPEN_METEO
+
+URL = "https://api.open-meteo.com/v1/forecast"
+
+
+class FakeFetch:
+    """
+    Sustituye a la petición HTTP y cuenta las llamadas.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.called = threading.Event()
+
+    def __call__(self, url, params=None, timeout=None):
+        self.calls += 1
+        self.called.set()
+        if self.fail:
+            raise requests.exceptions.ConnectionError("sin red")
+        return {"call": self.calls, "params": params}
+
+
+def make_cache(tmp_path, fetch, ttl=60, stale=60, prune_seconds=0):
+    return ForecastCache(
+        cache_dir=str(tmp_path),
+        ttls={OPEN_METEO: ttl},
+        stale={OPEN_METEO: stale},
+        fetch=fetch,
+        prune_seconds=prune_seconds,
+    )
+
+
+def test_dentro_del_ttl_no_se_repite_la_peticion(tmp_path):
+    fetch = FakeFetch()
+    cache = make_cache(tmp_path, fetch)
+
+    first = cache.get_json(OPEN_METEO, URL, {"a": 1})
+    second = cache.get_json(OPEN_METEO, URL, {"a": 1})
+
+    assert first == second
+    assert fetch.calls == 1
+    assert cache.stats()[OPEN_METEO]["misses"] == 1
+    assert cache.stats()[OPEN_METEO]["hits"] == 1
+
+
+def test_parametros_distintos_son_entradas_distintas(tmp_path):
+    fetch = FakeFetch()
+    cache = make_cache(tmp_path, fetch)
+
+    cache.get_json(OPEN_METEO, URL, {"a": 1})
+    cache.get_json(OPEN_METEO, URL, {"a": 2})
+
+    assert fetch.calls == 2
+
+
+def test_la_cache_en_disco_sobrevive_al_reinicio(tmp_path):
+    fetch = FakeFetch()
+    make_cache(tmp_path, fetch).get_json(OPEN_METEO, URL)
+
+    restarted = make_cache(tmp_path, fetch)
+    value = restarted.get_json(OPEN_METEO, URL)
+
+    assert value["call"] == 1
+    assert fetch.calls == 1
+
+
+def test_stale_while_revalidate(tmp_path, monkeypatch):
+    fetch = FakeFetch()
+    cache = make_cache(tmp_path, fetch, ttl=10, stale=100)
+    cache.get_json(OPEN_METEO, URL)
+    fetch.called.clear()
+
+    # Avanzamos el reloj más allá del TTL pero dentro del margen stale
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+
+    value = cache.get_json(OPEN_METEO, URL)
+
+    assert value["call"] == 1  # se devuelve el dato antiguo al momento
+    assert fetch.called.wait(timeout=5)  # y se refresca en segundo plano
+    assert cache.stats()[OPEN_METEO]["stale"] == 1
+
+
+def test_sin_red_devuelve_la_ultima_prevision(tmp_path, monkeypatch):
+    fetch = FakeFetch()
+    cache = make_cache(tmp_path, fetch, ttl=10, stale=0)
+    cache.get_json(OPEN_METEO, URL)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 500)
+    fetch.fail = True
+
+    assert cache.get_json(OPEN_METEO, URL)["call"] == 1
+    assert cache.stats()[OPEN_METEO]["errors"] == 1
+
+
+def test_sin_red_y_sin_cache_propaga_el_error(tmp_path):
+    fetch = FakeFetch()
+    fetch.fail = True
+    cache = make_cache(tmp_path, fetch)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cache.get_json(OPEN_METEO, URL)
+
+
+def test_al_escribir_se_borran_las_entradas_caducadas(tmp_path, monkeypatch):
+    fetch = FakeFetch()
+    cache = make_cache(tmp_path, fetch, ttl=10, stale=100)
+    cache.get_json(OPEN_METEO, URL, {"date": "2025-01-01"})
+    old_key = cache.key(OPEN_METEO, URL, {"date": "2025-01-01"})
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 60)
+    cache.get_json(OPEN_METEO, URL, {"date": "2025-01-02"})
+    recent_key = cache.key(OPEN_METEO, URL, {"date": "2025-01-02"})
+    # Dentro del margen stale se conserva
+    assert old_key in cache._memory
+    assert (tmp_path / f"{old_key}.json").exists()
+
+    monkeypatch.setattr(time, "time", lambda: now + 150)
+    cache.get_json(OPEN_METEO, URL, {"date": "2025-01-03"})
+
+    assert old_key not in cache._memory
+    assert not (tmp_path / f"{old_key}.json").exists()
+    assert recent_key in cache._memory
+    assert (tmp_path / f"{recent_key}.json").exists()
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f"{cache.key(OPEN_METEO, URL, {'date': d})}.json" for d in ("2025-01-02", "2025-01-03")
+    )
+
+
+def test_la_purga_se_hace_como_mucho_una_vez_por_intervalo(tmp_path, monkeypatch):
+    fetch = FakeFetch()
+    cache = make_cache(tmp_path, fetch, ttl=10, stale=100, prune_seconds=300)
+    cache.get_json(OPEN_METEO, URL, {"date": "2025-01-01"})
+    old_key = cache.key(OPEN_METEO, URL, {"date": "2025-01-01"})
+
+    # Caducada, pero la última purga fue hace menos del intervalo
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 150)
+    cache.get_json(OPEN_METEO, URL, {"date": "2025-01-02"})
+    assert old_key in cache._memory
+    assert (tmp_path / f"{old_key}.json").exists()
+
+    monkeypatch.setattr(time, "time", lambda: now + 301)
+    cache.get_json(OPEN_METEO, URL, {"date": "2025-01-03"})
+    assert old_key not in cache._memory
+    assert not (tmp_path / f"{old_key}.json").exists()
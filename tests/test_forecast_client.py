@@ -0,0 +1,116 @@
+# test_forecast_client.py
+#
+# Tests del cliente de previsiones concurrente:
+#  - Las fuentes se piden en paralelo, no una detrás de otra.
+#  - Una fuente que falla o supera su plazo se sustituye por su valor por defecto.
+#  - Sin NASA, la IR se estima a partir de la previsión de 24h.
+
+import time
+from datetime import datetime, timedelta
+
+
+from api.rce_predictors.future.open import estimate_longwave_ir
+from api.rce_predictors.future.client import ForecastClient, METEO_24H, NASA_IR, RAIN, WIND_SOLAR
+from api.rce_predictors.rain_predictor import WeatherPredictor
+
+
+def meteo_24h():
+    """
+    Respuesta horaria de Open-Meteo (2 días) con valores constantes.
+    """
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(48)]
+    return {
+        "hourly": {
+            "time": times,
+            "temperature_2m": [20.0] * 48,
+            "relative_humidity_2m": [50.0] * 48,
+            "surface_pressure": [1000.0] * 48,
+            "windspeed_10m": [3.0] * 48,
+            "shortwave_radiation": [400.0] * 48,
+        }
+    }
+
+
+WIND_SOLAR_VALUE = [{"time": "2025-06-01 10:07", "wind_speed": 2.0, "solar_radiation": 300.0}] * 9
+NASA_VALUE = [{"date": datetime.now().strftime("%Y-%m-%d"), "radiation_infrared": 330.0}]
+
+
+def fetches(delay=0.0, failing=(), slow=()):
+    """
+    Fuentes falsas: cada una tarda `delay` segundos; las de `failing` lanzan
+    un error y las de `slow` tardan más que su plazo.
+    """
+    values = {
+        RAIN: {p: 10.0 for p in WeatherPredictor.Period},
+        WIND_SOLAR: WIND_SOLAR_VALUE,
+        METEO_24H: meteo_24h(),
+        NASA_IR: NASA_VALUE,
+    }
+
+    def make(name):
+        def fetch():
+            time.sleep(1.0 if name in slow else delay)
+            if name in failing:
+                raise ConnectionError(f"{name} sin red")
+            return values[name]
+        return fetch
+
+    return {name: make(name) for name in values}
+
+
+def test_las_fuentes_se_piden_en_paralelo():
+    forecast_client = ForecastClient(fetches=fetches(delay=0.3))
+
+    start = time.perf_counter()
+    bundle = forecast_client.fetch_all()
+    elapsed = time.perf_counter() - start
+
+    # En serie serían 4 x 0.3s
+    assert elapsed < 0.9
+    assert bundle.errors == {}
+    assert bundle.rain[WeatherPredictor.Period.TODAY_0200] == 10.0
+    assert len(bundle.forecast_24h) == 24
+    assert bundle.forecast_24h["ir_rad"].iloc[0] == 330.0
+    # get_val da 8 intervalos de IR
+    assert len(bundle.fut_val) == 8
+
+
+def test_fuente_caida_usa_valor_por_defecto():
+    bundle = ForecastClient(fetches=fetches(failing=(RAIN, WIND_SOLAR))).fetch_all()
+
+    assert set(bundle.errors) == {RAIN, WIND_SOLAR}
+    assert all(v == 0.0 for v in bundle.rain.values())
+    # Sin previsión de viento/sol el predictor de temperatura la pide por su cuenta
+    assert bundle.fut_val is None
+    assert bundle.forecast_24h is not None
+
+
+def test_sin_nasa_la_ir_se_estima():
+    bundle = ForecastClient(fetches=fetches(failing=(NASA_IR,))).fetch_all()
+
+    assert NASA_IR in bundle.errors
+    expected = round(estimate_longwave_ir(20.0, 50.0), 1)
+    assert bundle.forecast_24h["ir_rad"].iloc[0] == expected
+    assert bundle.fut_val is not None
+
+
+def test_fuente_lenta_no_bloquea_al_resto():
+    forecast_client = ForecastClient(
+        fetches=fetches(slow=(NASA_IR,)),
+        deadlines={RAIN: 0.5, WIND_SOLAR: 0.5, METEO_24H: 0.5, NASA_IR: 0.2},
+    )
+
+    start = time.perf_counter()
+    bundle = forecast_client.fetch_all()
+
+    assert time.perf_counter() - start < 0.8
+    assert bundle.errors == {NASA_IR: "timeout"}
+    assert bundle.forecast_24h is not None
+
+
+def test_plazo_global():
+    bundle = ForecastClient(fetches=fetches(slow=(RAIN, METEO_24H))).fetch_all(deadline=0.2)
+
+    assert set(bundle.errors) == {RAIN, METEO_24H}
+    assert bundle.forecast_24h is None
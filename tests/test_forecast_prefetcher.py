@@ -0,0 +1,201 @@
+# test_forecast_prefetcher.py
+#
+# Tests del refresco de previsiones en segundo plano:
+#  - La instantánea se publica numerada y su edad se informa por fuente.
+#  - Una fuente caída mantiene su último valor bueno (se ve como antigüedad) y
+#    las previsiones se recomponen con la última respuesta buena de cada fuente.
+#  - current() nunca pide las previsiones: sin una instantánea completa da None.
+#  - /predict y /health responden 503 hasta la primera instantánea completa.
+#  - Con el cliente real, una caída del servicio externo llega a los errores y
+#    la edad se cuenta desde que se obtuvo la respuesta guardada en la caché.
+#  - El hilo refresca sin que nadie lo pida y se para limpiamente.
+
+import time
+
+import requests
+
+from api.rce_predictors.future.cache import NASA_POWER, OPEN_METEO, forecast_cache
+from api.rce_predictors.future.client import (
+    ForecastBundle,
+    ForecastClient,
+    METEO_24H,
+    NASA_IR,
+    RAIN,
+    WIND_SOLAR,
+)
+from api.rce_predictors.future.prefetcher import ForecastPrefetcher
+from benchmarks.offline import offline
+
+
+class FakeClient:
+    """
+    Cliente de previsiones que devuelve lo que se le indique en `next`.
+    """
+
+    sources = [RAIN, WIND_SOLAR, METEO_24H, NASA_IR]
+
+    def __init__(self):
+        self.calls = 0
+        self.next = ForecastBundle(rain={"p": 1.0}, fut_val=["fut"], forecast_24h="24h")
+
+    def fetch_all(self):
+        self.calls += 1
+        return self.next
+
+
+def test_refresh_publica_la_instantanea():
+    client = FakeClient()
+    prefetcher = ForecastPrefetcher(client=client)
+
+    assert prefetcher.snapshot() is None
+    prefetcher.refresh()
+
+    assert prefetcher.snapshot().fut_val == ["fut"]
+    assert prefetcher.snapshot().version == 1
+    ages = prefetcher.ages()
+    assert ages["snapshot"] < 1
+    assert all(age is not None for age in ages["sources"].values())
+
+
+def test_fuente_caida_mantiene_el_ultimo_valor():
+    client = FakeClient()
+    prefetcher = ForecastPrefetcher(client=client)
+    prefetcher.refresh()
+    updated = dict(prefetcher._updated)
+
+    client.next = ForecastBundle(rain={"p": 0.0}, errors={RAIN: "timeout", WIND_SOLAR: "timeout"})
+    snapshot = prefetcher.refresh()
+
+    assert snapshot.rain == {"p": 1.0}
+    assert snapshot.fut_val == ["fut"]
+    assert snapshot.forecast_24h == "24h"
+    assert snapshot.version == 2
+    assert prefetcher._updated[RAIN] == updated[RAIN]
+    assert prefetcher._updated[NASA_IR] > updated[NASA_IR]
+    assert prefetcher.ages()["errors"] == {RAIN: "timeout", WIND_SOLAR: "timeout"}
+
+
+def test_current_no_pide_las_previsiones():
+    client = FakeClient()
+    prefetcher = ForecastPrefetcher(client=client)
+
+    assert prefetcher.current() is None
+    assert client.calls == 0
+
+    client.next = ForecastBundle(rain={"p": 1.0}, fut_val=["fut"], errors={METEO_24H: "timeout"})
+    prefetcher.refresh()
+    assert prefetcher.current() is None
+
+    client.next = ForecastBundle(rain={"p": 1.0}, fut_val=["fut"], forecast_24h="24h")
+    prefetcher.refresh()
+    assert prefetcher.current().version == 2
+    assert client.calls == 2
+
+
+def test_hilo_de_refresco():
+    client = FakeClient()
+    prefetcher = ForecastPrefetcher(client=client, period=0.05)
+
+    prefetcher.start()
+    time.sleep(0.3)
+    prefetcher.stop(timeout=1)
+    calls = client.calls
+
+    assert calls >= 2
+    time.sleep(0.1)
+    assert client.calls == calls
+
+
+def sin_red(url, params=None, timeout=None):
+    raise requests.exceptions.ConnectionError("sin red")
+
+
+def test_caida_sin_cache_llega_a_los_errores(monkeypatch):
+    with offline():
+        monkeypatch.setattr(forecast_cache, "_fetch", sin_red)
+        prefetcher = ForecastPrefetcher(client=ForecastClient())
+        snapshot = prefetcher.refresh()
+
+    # Antes la lluvia daba ceros y NASA una lista vacía sin ningún error
+    assert set(snapshot.errors) == {RAIN, WIND_SOLAR, METEO_24H, NASA_IR}
+    assert all(age is None for age in prefetcher.ages()["sources"].values())
+
+
+def test_caida_con_cache_se_ve_como_antiguedad(monkeypatch):
+    with offline():
+        prefetcher = ForecastPrefetcher(client=ForecastClient())
+        first = prefetcher.refresh()
+        assert first.errors == {}
+        updated = dict(prefetcher._updated)
+        fetched_at = [entry.fetched_at for entry in forecast_cache._memory.values()]
+        assert set(updated.values()) <= set(fetched_at)
+
+        # Todo caducado y sin red: la caché devuelve las respuestas guardadas
+        monkeypatch.setattr(forecast_cache, "_ttls", {OPEN_METEO: 0, NASA_POWER: 0})
+        monkeypatch.setattr(forecast_cache, "_stale", {})
+        monkeypatch.setattr(forecast_cache, "_fetch", sin_red)
+        snapshot = prefetcher.refresh()
+
+    assert set(snapshot.errors) == {RAIN, WIND_SOLAR, METEO_24H, NASA_IR}
+    assert all(error.startswith("stale") for error in snapshot.errors.values())
+    assert snapshot.rain == first.rain
+    assert snapshot.fut_val is not None
+    assert prefetcher._updated == updated
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 600)
+    ages = prefetcher.ages()
+    assert all(age >= 600 for age in ages["sources"].values())
+    assert ages["errors"] == snapshot.errors
+
+
+def caida():
+    raise requests.exceptions.ConnectionError("sin red")
+
+
+def test_se_recompone_con_la_ultima_respuesta_de_cada_fuente():
+    """
+    Sin ninguna instantánea completa antes: el viento y la radiación de la
+    segunda llamada se combinan con la previsión de 24 h y el IR de la primera.
+    """
+    with offline():
+        client = ForecastClient()
+        prefetcher = ForecastPrefetcher(client=client)
+        fetches = dict(client._fetches)
+
+        client._fetches[WIND_SOLAR] = caida
+        first = prefetcher.refresh()
+        assert first.fut_val is None
+        assert prefetcher.current() is None
+
+        client._fetches[WIND_SOLAR] = fetches[WIND_SOLAR]
+        client._fetches[METEO_24H] = caida
+        client._fetches[NASA_IR] = caida
+        snapshot = prefetcher.refresh()
+
+    assert set(snapshot.errors) == {METEO_24H, NASA_IR}
+    assert snapshot.fut_val is not None
+    assert snapshot.forecast_24h.equals(first.forecast_24h)
+    assert prefetcher.current() is snapshot
+
+
+def test_predict_no_esta_listo_sin_instantanea(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import main
+    from api.rce_predictors.warmup import Readiness
+
+    readiness = Readiness()
+    readiness.run(dict).join()
+    fake = FakeClient()
+    monkeypatch.setattr(main, "readiness", readiness)
+    monkeypatch.setattr(main, "forecast_prefetcher", ForecastPrefetcher(client=fake))
+    client = TestClient(main.app)  # sin lifespan: no arranca el refresco
+
+    response = client.post("/predict", json={"data": []})
+    assert response.status_code == 503
+    assert "forecasts" in response.json()["info"]["explanation"]
+    health = client.get("/health")
+    assert health.status_code == 503
+    assert health.json()["forecasts"] == "waiting"
+    assert fake.calls == 0
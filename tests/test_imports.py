@@ -0,0 +1,31 @@
+# test_imports.py
+#
+# Tests del tiempo de arranque:
+#  - Importar la API no carga matplotlib, TensorFlow ni sklearn (se cargan al
+#    construir los modelos).
+#  - Importar el SC no carga FastAPI ni matplotlib.
+#  - La puerta de regresión de benchmarks/bench_startup detecta los fallos.
+
+import pytest
+
+from benchmarks.bench_startup import FORBIDDEN, check, run_import
+
+
+@pytest.mark.parametrize("module", sorted(FORBIDDEN))
+def test_importar_no_carga_modulos_pesados(module):
+    _, imports, loaded = run_import(module)
+
+    assert imports, "importtime no ha devuelto ninguna línea"
+    assert not set(FORBIDDEN[module]) & loaded
+
+
+def test_check_detecta_regresiones():
+    results = {"api.main": {"median": 1.5, "forbidden": []}}
+
+    assert check(results, max_seconds=2.0) == []
+    assert len(check(results, max_seconds=1.0)) == 1
+    assert check(results, baseline={"api.main": {"median": 1.3}}, tolerance=0.25) == []
+    assert len(check(results, baseline={"api.main": {"median": 1.0}}, tolerance=0.25)) == 1
+
+    results["api.main"]["forbidden"] = ["tensorflow"]
+    assert len(check(results)) == 1
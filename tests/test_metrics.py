@@ -0,0 +1,103 @@
+# test_metrics.py
+#
+# Tests de las métricas de /metrics:
+#  - Los histogramas acumulan por cubeta y se exponen en formato Prometheus.
+#  - Los fallos de las previsiones cuentan como fallo y como valor por defecto.
+#  - Actualizar una métrica cuesta muy poco frente a una petición.
+#  - La latencia de /predict se cuenta también cuando la petición falla.
+
+import time
+
+import pytest
+
+from api.rce_predictors.future.client import FALLBACKS, FETCH_FAILURES, FETCH_SECONDS, ForecastClient
+from api.utils.metrics import MetricsRegistry
+
+
+def test_histograma_en_formato_prometheus():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latencia_seconds", "Latencia", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="temperature")
+
+    text = registry.render()
+
+    assert "# TYPE latencia_seconds histogram" in text
+    assert 'latencia_seconds_bucket{stage="temperature",le="0.1"} 1' in text
+    assert 'latencia_seconds_bucket{stage="temperature",le="1.0"} 3' in text
+    assert 'latencia_seconds_bucket{stage="temperature",le="+Inf"} 4' in text
+    assert 'latencia_seconds_sum{stage="temperature"} 4.05' in text
+    assert 'latencia_seconds_count{stage="temperature"} 4' in text
+
+
+def test_etiquetas_y_callbacks():
+    registry = MetricsRegistry()
+    counter = registry.counter("fallos_total", "Fallos", ("source",))
+    counter.inc(source='nasa "ir"')
+    registry.callback("modelo_info", "Modelo", lambda: {("modelo.keras",): 1}, labelnames=("file",))
+    registry.callback("roto", "Callback que falla", lambda: 1 / 0)
+
+    text = registry.render()
+
+    assert 'fallos_total{source="nasa \\"ir\\""} 1.0' in text
+    assert 'modelo_info{file="modelo.keras"} 1' in text
+    assert "# roto unavailable" in text
+    with pytest.raises(ValueError):
+        counter.inc(stage="rain")
+    # Registrar el mismo nombre devuelve la misma métrica
+    assert registry.counter("fallos_total", "Fallos", ("source",)) is counter
+
+
+def test_fallos_de_previsiones():
+    def fail():
+        raise ConnectionError("sin red")
+
+    client = ForecastClient(
+        fetches={"rain": fail, "nasa_ir": lambda: time.sleep(0.5)},
+        deadlines={"rain": 1, "nasa_ir": 0.05},
+    )
+    before = (
+        FETCH_FAILURES.value(source="rain", reason="error"),
+        FETCH_FAILURES.value(source="nasa_ir", reason="timeout"),
+        FALLBACKS.value(source="rain", kind="default"),
+        FETCH_SECONDS.count(source="rain"),
+    )
+
+    bundle = client.fetch_all(deadline=1)
+
+    assert set(bundle.errors) == {"rain", "nasa_ir"}
+    after = (
+        FETCH_FAILURES.value(source="rain", reason="error"),
+        FETCH_FAILURES.value(source="nasa_ir", reason="timeout"),
+        FALLBACKS.value(source="rain", kind="default"),
+        FETCH_SECONDS.count(source="rain"),
+    )
+    assert [a - b for a, b in zip(after, before)] == [1, 1, 1, 1]
+
+
+def test_coste_de_observar():
+    histogram = MetricsRegistry().histogram("coste_seconds", "Coste", ("stage",))
+    n = 20_000
+
+    start = time.perf_counter()
+    for i in range(n):
+        histogram.observe(i * 1e-4, stage="temperature")
+    per_call = (time.perf_counter() - start) / n
+
+    # Una petición observa ~10 valores y tarda cientos de ms: <1% con margen
+    assert per_call < 50e-6
+
+
+def test_latencia_de_predict_en_las_salidas_de_error(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import main
+
+    client = TestClient(main.app)  # sin lifespan: el servicio no está listo
+    monkeypatch.setattr(main, "READY_TIMEOUT", 0)
+    before = main.PREDICT_SECONDS.count()
+
+    assert client.post("/predict", json={"data": [{"cold": 1.0}]}).status_code == 422
+    assert client.post("/predict", json={"data": []}).status_code == 503
+
+    assert main.PREDICT_SECONDS.count() == before + 2
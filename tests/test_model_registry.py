@@ -0,0 +1,179 @@
+# test_model_registry.py
+#
+# Tests para el registro de modelos de la API:
+#  - Cada artefacto se carga una sola vez.
+#  - Los predictores se construyen una vez y se reutilizan.
+#  - Se informa del tiempo de carga y la memoria de cada artefacto.
+#  - Cargar el modelo de una configuración nueva no bloquea las consultas con
+#    la configuración actual.
+#  - Al cambiar la configuración se descargan los modelos de temperatura y de
+#    demanda que ya no usa ninguna de las dos.
+
+import threading
+import time
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+tf = pytest.importorskip("tensorflow")
+
+from api.rce_predictors import registry as reg
+
+
+@pytest.fixture
+def keras_dir(tmp_path):
+    """
+    Carpeta con un modelo de demanda mínimo y sus escaladores.
+    """
+    model = tf.keras.Sequential([tf.keras.Input(shape=(10,)), tf.keras.layers.Dense(2)])
+    model.save(tmp_path / reg.DEMAND_MODEL)
+
+    rng = np.random.default_rng(0)
+    joblib.dump(StandardScaler().fit(rng.normal(size=(20, 10))), tmp_path / "dem_x_scaler.pkl")
+    joblib.dump(StandardScaler().fit(rng.normal(size=(20, 2))), tmp_path / "dem_y_scaler.pkl")
+    return tmp_path
+
+
+@pytest.fixture
+def temperature_dir(keras_dir):
+    """
+    Añade tres modelos de temperatura (a, b, c) y sus escaladores.
+    """
+    rng = np.random.default_rng(1)
+    for name in ["a.keras", "b.keras", "c.keras"]:
+        tf.keras.Sequential(
+            [tf.keras.Input(shape=(24, 12)), tf.keras.layers.Flatten(), tf.keras.layers.Dense(2)]
+        ).save(keras_dir / name)
+    joblib.dump(StandardScaler().fit(rng.normal(size=(20, 12))), keras_dir / "x_scaler.pkl")
+    joblib.dump(StandardScaler().fit(rng.normal(size=(20, 2))), keras_dir / "y_scaler.pkl")
+    return keras_dir
+
+
+def config(model_name):
+    return {
+        "temperature": {
+            "model-name": model_name,
+            "input": 24,
+            "output": 8,
+            "shift": 8,
+            "labels": ["cold", "hot"],
+            "column-indices": {str(i): i for i in range(12)},
+        },
+        "demand": {"filepath": "unused"},
+    }
+
+
+def test_scaler_se_carga_una_sola_vez(keras_dir, monkeypatch):
+    registry = reg.ModelRegistry(keras_dir=str(keras_dir))
+    calls = []
+    original = joblib.load
+
+    def counting_load(path):
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(reg.joblib, "load", counting_load)
+
+    first = registry.scaler("dem_x_scaler.pkl")
+    second = registry.scaler("dem_x_scaler.pkl")
+
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_demand_predictor_reutilizado_y_stats(keras_dir):
+    registry = reg.ModelRegistry(keras_dir=str(keras_dir))
+
+    first = registry.demand({"filepath": "unused"})
+    second = registry.demand({"filepath": "unused"})
+
+    assert first is second
+
+    stats = registry.stats()
+    for name in [reg.DEMAND_MODEL, *reg.DEMAND_SCALERS]:
+        assert name in stats
+        assert stats[name]["load_seconds"] >= 0
+        assert stats[name]["rss_mb"] >= 0
+
+
+def test_prepare_carga_el_modelo_nuevo_y_descarga_los_viejos(temperature_dir):
+    """
+    Al cambiar model-name se carga el modelo nuevo antes de publicar la
+    configuración y se descartan los que ya no usa ninguna de las dos.
+    """
+    registry = reg.ModelRegistry(keras_dir=str(temperature_dir))
+    registry.pipelines = lambda *args: object()
+
+    registry.load(config("a.keras"))
+    registry.prepare(config("a.keras"), config("b.keras"))
+    assert {"a.keras", "b.keras"} <= set(registry.stats())
+
+    registry.prepare(config("b.keras"), config("c.keras"))
+    assert "a.keras" not in registry.stats()
+    assert {"b.keras", "c.keras"} <= set(registry.stats())
+
+
+def test_prepare_descarga_los_modelos_de_demanda_viejos(temperature_dir):
+    """
+    Cambiar el backend de demanda deja de usar el modelo Keras: se descarta
+    igual que un modelo de temperatura.
+    """
+    registry = reg.ModelRegistry(keras_dir=str(temperature_dir))
+    registry.pipelines = lambda *args: object()
+    # Sin convertir a TFLite: basta con que el artefacto quede registrado
+    registry.tflite_model = lambda file_name: registry._get(file_name, object)
+
+    def with_demand(demand):
+        return {**config("a.keras"), "demand": {"filepath": "unused", **demand}}
+
+    keras = with_demand({})
+    first = with_demand({"backend": "tflite", "tflite-model": "d1.tflite"})
+    second = with_demand({"backend": "tflite", "tflite-model": "d2.tflite"})
+
+    registry.load(keras)
+    registry.prepare(keras, first)
+    assert {reg.DEMAND_MODEL, "d1.tflite"} <= set(registry.stats())
+
+    registry.prepare(first, second)
+    assert reg.DEMAND_MODEL not in registry.stats()
+    assert {"d1.tflite", "d2.tflite"} <= set(registry.stats())
+
+    registry.prepare(second, second)
+    assert "d1.tflite" not in registry.stats()
+    assert "a.keras" in registry.stats()
+
+
+def test_carga_lenta_no_bloquea_la_configuracion_actual(temperature_dir):
+    registry = reg.ModelRegistry(keras_dir=str(temperature_dir))
+    registry.pipelines = lambda *args: object()
+    registry.load(config("a.keras"))
+    current = registry.temperature(config("a.keras")["temperature"])
+
+    # La carga de b.keras se queda parada hasta que el test la suelte
+    loading, release = threading.Event(), threading.Event()
+    model = registry.model
+
+    def slow_model(model_name):
+        if model_name == "b.keras":
+            loading.set()
+            release.wait(timeout=10)
+        return model(model_name)
+
+    registry.model = slow_model
+    watcher = threading.Thread(target=registry.prepare, args=(config("a.keras"), config("b.keras")))
+    watcher.start()
+    try:
+        assert loading.wait(timeout=10)
+
+        start = time.perf_counter()
+        assert registry.temperature(config("a.keras")["temperature"]) is current
+        registry.demand(config("a.keras")["demand"])
+        registry.stats()
+        assert time.perf_counter() - start < 1
+    finally:
+        release.set()
+        watcher.join(timeout=30)
+
+    assert "b.keras" in registry.stats()
@@ -0,0 +1,113 @@
+# test_payload.py
+#
+# Tests de los formatos de entrada de /predict:
+#  - JSON por columnas y matriz float32 dan la misma ventana que EntryList.
+#  - Lo que envía el SC (build_payload) lo entiende la API en los tres formatos.
+#  - Columnas que faltan, tamaños incorrectos o valores no finitos dan un 422.
+#  - Una lista de escenarios vacía o demasiado larga da un 422, no un 500.
+
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api.utils.payload import COLUMNAR_JSON, FLOAT32, encode_float32, parse_columnar_json, read_window
+from api.utils.schemas import FEATURES, MAX_SCENARIOS, EntryArray, PayloadError, ScenarioList, window_values
+from sc.api_data.api_req import build_payload
+
+app = FastAPI()
+
+
+@app.post("/window")
+async def window(request: Request):
+    data = await read_window(request)
+    return {"values": data.values.tolist()}
+
+
+@app.post("/scenarios")
+def scenarios(data: ScenarioList):
+    return {"scenarios": len(data.scenarios)}
+
+
+client = TestClient(app)
+
+
+def rows(n=24, seed=0):
+    values = np.random.default_rng(seed).normal(size=(n, len(FEATURES)))
+    return [dict(zip(FEATURES, map(float, row))) for row in values]
+
+
+def test_columnar_igual_que_entrylist():
+    data = rows()
+    # Columnas en otro orden y una columna de más
+    columns = list(reversed(FEATURES)) + ["extra"]
+    body = {"data": {c: [row.get(c, 0.0) for row in data] for c in columns}}
+
+    expected = client.post("/window", json={"data": data}).json()["values"]
+    result = parse_columnar_json(json.dumps(body).encode())
+
+    np.testing.assert_allclose(result.values, expected)
+    assert result.values.shape == (24, len(FEATURES))
+
+
+@pytest.mark.parametrize("payload_format", ["json", "columnar", "float32"])
+def test_formatos_del_sc_en_la_api(payload_format):
+    data = {"data": rows()}
+    payload = build_payload(data, payload_format)
+
+    response = client.post("/window", **payload)
+
+    assert response.status_code == 200
+    np.testing.assert_allclose(
+        response.json()["values"],
+        [[row[f] for f in FEATURES] for row in data["data"]],
+        rtol=1e-6, atol=1e-6,  # float32
+    )
+
+
+def test_float32_codificado_por_la_api():
+    values = np.arange(2 * len(FEATURES), dtype=np.float32).reshape(2, -1)
+
+    response = client.post(
+        "/window", content=encode_float32(FEATURES, values), headers={"Content-Type": FLOAT32}
+    )
+
+    assert response.json()["values"] == values.tolist()
+
+
+@pytest.mark.parametrize(
+    "content, content_type",
+    [
+        (json.dumps({"data": {"cold": [1.0]}}), COLUMNAR_JSON),
+        (json.dumps({"data": {c: [1.0, None] for c in FEATURES}}), COLUMNAR_JSON),
+        (json.dumps({"data": {c: [1.0] * (2 if c == "cold" else 1) for c in FEATURES}}), COLUMNAR_JSON),
+        (",".join(FEATURES).encode() + b"\n" + b"\0" * 10, FLOAT32),
+        (b"\0" * 48, FLOAT32),
+        (json.dumps({"data": [{"cold": "fred"}]}), "application/json"),
+    ],
+)
+def test_payload_invalido_da_422(content, content_type):
+    response = client.post("/window", content=content, headers={"Content-Type": content_type})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][0] == "body"
+
+
+def test_window_values_acepta_entrylist_y_entryarray():
+    values = np.ones((3, len(FEATURES)))
+    array = EntryArray.from_columns(FEATURES, values)
+
+    assert window_values(array) is array.values
+    with pytest.raises(PayloadError):
+        EntryArray.from_columns(FEATURES[:-1] + ("cold",), values)
+
+
+@pytest.mark.parametrize("count, status", [(0, 422), (1, 200), (MAX_SCENARIOS, 200), (MAX_SCENARIOS + 1, 422)])
+def test_numero_de_escenarios(count, status):
+    body = {"data": rows(), "scenarios": [{"mode": 1.0}] * count}
+
+    response = client.post("/scenarios", json=body)
+
+    assert response.status_code == status
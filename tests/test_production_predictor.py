@@ -0,0 +1,70 @@
+# test_production_predictor.py
+#
+# Tests del cálculo vectorizado de producción:
+#  - predict da lo mismo que el cálculo original fila a fila con apply.
+#  - predict_batch da lo mismo que predict escenario a escenario.
+
+import numpy as np
+import pandas as pd
+
+from api.rce_predictors.config.rce.prod import Ei
+from api.rce_predictors.config.rce.specs import RceSpecs
+from api.rce_predictors.production_predictor import ProductionPredictor
+
+SPECS = RceSpecs(volume_cold=1.5, volume_hot=0.8)
+
+
+def temperatures(rng, n=193):
+    return pd.DataFrame({"cold": rng.normal(12, 3, n), "hot": rng.normal(40, 5, n)})
+
+
+def legacy_predict(specs, data):
+    """
+    Copia del cálculo original con apply(axis=1).
+    """
+    data = data.copy()
+    data["prod_cold"] = data.iloc[1:].apply(
+        lambda x: Ei(specs, t_0=data.iloc[0]["cold"], t_1=x["cold"], mode="cold"), axis=1
+    )
+    data["prod_hot"] = data.iloc[1:].apply(
+        lambda x: Ei(specs, t_0=data.iloc[0]["hot"], t_1=x["hot"], mode="hot"), axis=1
+    )
+    return (
+        data.iloc[1:]
+        .drop(columns=["cold", "hot"])
+        .rename(columns={"prod_hot": "hot", "prod_cold": "cold"})
+    )
+
+
+def test_ei_acepta_arrays():
+    t_1 = np.array([10.0, 14.0, 12.0])
+    expected = [Ei(SPECS, 12.0, t, mode="cold") for t in t_1]
+
+    np.testing.assert_allclose(Ei(SPECS, 12.0, t_1, mode="cold"), expected)
+
+
+def test_predict_igual_que_apply():
+    data = temperatures(np.random.default_rng(0))
+
+    result = ProductionPredictor(SPECS).predict(data)
+    expected = legacy_predict(SPECS, data)
+
+    assert list(result.columns) == list(expected.columns)
+    assert list(result.index) == list(expected.index)
+    np.testing.assert_allclose(result.values, expected.values)
+
+
+def test_predict_batch_igual_que_predict():
+    rng = np.random.default_rng(1)
+    predictor = ProductionPredictor(SPECS)
+    current = np.array([12.0, 40.0])
+    scenarios = [temperatures(rng, 192) for _ in range(4)]
+
+    batch = predictor.predict_batch(current, np.stack([s.to_numpy() for s in scenarios]))
+
+    assert batch.shape == (4, 192, 2)
+    for energies, scenario in zip(batch, scenarios):
+        data = pd.concat(
+            [pd.DataFrame([current], columns=["cold", "hot"]), scenario], ignore_index=True
+        )
+        np.testing.assert_allclose(energies, predictor.predict(data)[["cold", "hot"]].values)
@@ -0,0 +1,101 @@
+# test_result_cache.py
+#
+# Tests de la caché de resultados de /predict:
+#  - Peticiones idénticas simultáneas comparten un solo cálculo.
+#  - Los resultados se expulsan en orden LRU al superar el límite.
+#  - Un error llega a todos los que esperan y no se guarda.
+#  - La clave no depende del ruido por debajo de los decimales normalizados.
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from api.utils.result_cache import ResultCache, entries_fingerprint, time_slot
+from api.utils.schemas import Entry, EntryList
+
+COLUMNS = list(Entry.model_fields)
+
+
+def counting(value, seconds=0.05):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(seconds)
+        return value
+
+    return compute, calls
+
+
+def test_peticiones_simultaneas_comparten_calculo():
+    cache = ResultCache()
+    compute, calls = counting("resultado")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["resultado"] * 5
+    assert len(calls) == 1
+
+    assert asyncio.run(cache.get_or_compute("k", compute)) == "resultado"
+    assert len(calls) == 1
+
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+    assert stats["inflight"] == 0
+
+
+def test_expulsion_lru():
+    cache = ResultCache(max_entries=2)
+
+    async def run():
+        for key in ("a", "b", "a", "c"):
+            await cache.get_or_compute(key, counting(key, 0)[0])
+
+    asyncio.run(run())
+
+    compute, calls = counting("b", 0)
+    asyncio.run(cache.get_or_compute("b", compute))
+    assert len(calls) == 1  # "b" era el menos usado y se expulsó
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["entries"] == 2
+
+
+def test_error_no_se_guarda():
+    cache = ResultCache()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        raise RuntimeError("rollout fallido")
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.get_or_compute("k", fail) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(calls) == 1
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("k", fail))
+    assert len(calls) == 2
+    assert cache.stats()["errors"] == 2
+
+
+def test_clave_normalizada():
+    base = {c: 1.0 for c in COLUMNS}
+    a = EntryList(data=[Entry(**base) for _ in range(3)])
+    b = EntryList(data=[Entry(**{**base, "cold": 1.0 + 1e-9}) for _ in range(3)])
+    c = EntryList(data=[Entry(**{**base, "cold": 1.5}) for _ in range(3)])
+
+    assert entries_fingerprint(a) == entries_fingerprint(b)
+    assert entries_fingerprint(a) != entries_fingerprint(c)
+
+
+def test_franja_de_15_minutos():
+    assert time_slot(datetime(2025, 6, 1, 10, 7, 31)) == time_slot(datetime(2025, 6, 1, 10, 14, 59))
+    assert time_slot(datetime(2025, 6, 1, 10, 14)) != time_slot(datetime(2025, 6, 1, 10, 15))
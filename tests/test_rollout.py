@@ -0,0 +1,238 @@
+# test_rollout.py
+#
+# Tests de paridad del motor de rollout compilado:
+#  - RolloutEngine da lo mismo que el bucle paso a paso (model.predict por paso).
+#  - TemperaturePredictor.predict da lo mismo que el bucle original con pandas,
+#    corregido para escalar las filas nuevas (antes se mezclaban valores sin
+#    escalar de la previsión en la ventana escalada), para usar el día del
+#    año en year_sin/year_cos (antes se usaba el año) y para que cada paso use
+#    su fila de la previsión (antes todos usaban fut_val[1]).
+#  - Con los escaladores, el motor da lo mismo que escalar fuera con sklearn.
+#  - Sin fut_val, el predictor solo pide la previsión con fetch_forecast=True.
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+tf = pytest.importorskip("tensorflow")
+
+from api.rce_predictors import temperature_predictor as tp
+from api.rce_predictors.config.window_predictor import WindowPredictor
+from api.rce_predictors.rollout import RolloutEngine, stepwise_rollout
+from api.rce_predictors.scaling import Affine
+from api.utils.schemas import Entry, EntryList
+
+COLUMNS = list(Entry.model_fields)
+LABELS = ["cold", "hot"]
+START = datetime(2025, 6, 1, 10, 7, 0)
+FUT_VAL = [
+    {"time": "2025-06-01 10:07", "wind_speed": 0.15, "solar_radiation": 0.40, "radiation_infrared": 0.32},
+    {"time": "2025-06-01 10:22", "wind_speed": 0.20, "solar_radiation": 0.41, "radiation_infrared": 0.33},
+    {"time": "2025-06-01 10:37", "wind_speed": 0.25, "solar_radiation": 0.42, "radiation_infrared": 0.34},
+]
+
+
+def small_model(n_features=len(COLUMNS)):
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=(24, n_features)),
+            tf.keras.layers.LSTM(8),
+            tf.keras.layers.Dense(len(LABELS)),
+        ]
+    )
+
+
+def entry_list(rng) -> EntryList:
+    rows = rng.normal(size=(24, len(COLUMNS)))
+    return EntryList(data=[Entry(**dict(zip(COLUMNS, row))) for row in rows])
+
+
+def legacy_predict(model, parameters, x_scaler, y_scaler, fut_val, date, horizon):
+    """
+    Copia del bucle original de TemperaturePredictor.predict, con cada fila
+    nueva construida sin escalar y escalada con x_scaler, el día del año en
+    year_sin/year_cos y la fila de la previsión de cada paso.
+    """
+    df = pd.DataFrame([entry.dict() for entry in parameters.data])
+    current_window = df.iloc[-24:].copy()
+    current_window = pd.DataFrame(x_scaler.transform(current_window.values), columns=df.columns)
+
+    predictions = []
+    for step in range(horizon):
+        tensor = tf.convert_to_tensor(np.expand_dims(current_window.values, axis=0), dtype=tf.float32)
+        pred = model.predict(tensor, verbose=0).squeeze()
+        predictions.append(pred)
+        new_row = current_window.iloc[-1].copy()
+        raw_pred = y_scaler.inverse_transform(pred.reshape(1, -1))[0]
+        for i, col in enumerate(LABELS):
+            new_row[col] = raw_pred[i]
+
+        curr = fut_val[min(step, len(fut_val) - 1)]
+        doy = date.timetuple().tm_yday
+        time_seconds = date.hour * 3600 + date.minute * 60 + date.second
+        new_row["solar_rad_w_m2"] = curr["solar_radiation"]
+        new_row["ir_rad_w_m2"] = curr["radiation_infrared"]
+        new_row["wind_vel_m_s"] = curr["wind_speed"]
+        new_row["day_sin"] = np.sin(2 * np.pi * time_seconds / 86400)
+        new_row["day_cos"] = np.cos(2 * np.pi * time_seconds / 86400)
+        new_row["year_sin"] = np.sin(2 * np.pi * doy / 365)
+        new_row["year_cos"] = np.cos(2 * np.pi * doy / 365)
+        new_row["mode"] = parameters.data[0].mode
+        new_row["reset_cold"] = parameters.data[0].reset_cold
+        new_row["reset_hot"] = parameters.data[0].reset_hot
+        new_row = pd.Series(x_scaler.transform(new_row.values.reshape(1, -1))[0], index=new_row.index)
+        date = date + timedelta(minutes=15)
+        current_window = pd.concat([current_window, pd.DataFrame([new_row])], ignore_index=True)
+        current_window = current_window.iloc[1:]
+
+    df_preds = pd.DataFrame(y_scaler.inverse_transform(np.array(predictions)), columns=LABELS)
+    s = df_preds["hot"]
+    df_preds["hot"] = s[0] + 2.75 * (s - s[0])
+    return df_preds
+
+
+def test_engine_igual_que_bucle_paso_a_paso():
+    rng = np.random.default_rng(1)
+    model = small_model()
+    window = rng.normal(size=(2, 24, len(COLUMNS))).astype(np.float32)
+    exogenous = rng.normal(size=(2, 16, len(COLUMNS))).astype(np.float32)
+
+    expected = stepwise_rollout(model, window, exogenous, [0, 1])
+    result = RolloutEngine(model, [0, 1], len(COLUMNS)).predict(window, exogenous)
+
+    assert result.shape == (2, 16, 2)
+    np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-5)
+
+
+def test_engine_con_escaladores_igual_que_sklearn():
+    """
+    Ventana y previsión sin escalar con los escaladores dentro del motor
+    equivalen a escalar fuera y devolver las etiquetas al espacio de entrada.
+    """
+    rng = np.random.default_rng(6)
+    model = small_model()
+    x_scaler = StandardScaler().fit(rng.normal(3.0, 2.0, size=(50, len(COLUMNS))))
+    y_scaler = StandardScaler().fit(rng.normal(-1.0, 4.0, size=(50, len(LABELS))))
+    window = rng.normal(size=(2, 24, len(COLUMNS))).astype(np.float32)
+    exogenous = rng.normal(size=(2, 8, len(COLUMNS))).astype(np.float32)
+
+    result = RolloutEngine(
+        model, [0, 1], len(COLUMNS),
+        x_affine=Affine.from_scaler(x_scaler), y_affine=Affine.from_scaler(y_scaler),
+    ).predict(window, exogenous)
+
+    scaled = x_scaler.transform(window.reshape(-1, len(COLUMNS))).reshape(window.shape)
+    expected = []
+    for i in range(exogenous.shape[1]):
+        pred = model(scaled.astype(np.float32), training=False).numpy()
+        raw = y_scaler.inverse_transform(pred)
+        expected.append(raw)
+        row = exogenous[:, i, :].copy()
+        row[:, [0, 1]] = raw
+        scaled = np.concatenate([scaled[:, 1:], x_scaler.transform(row)[:, np.newaxis]], axis=1)
+
+    np.testing.assert_allclose(result, np.stack(expected, axis=1), rtol=1e-4, atol=1e-4)
+
+
+@pytest.fixture
+def predictor(monkeypatch):
+    """
+    TemperaturePredictor con un modelo pequeño, fecha y previsión fijas
+    y un horizonte corto para que el test sea rápido.
+    """
+    rng = np.random.default_rng(2)
+
+    class FixedDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return START
+
+    monkeypatch.setattr(tp, "datetime", FixedDateTime)
+    fetched = []
+    monkeypatch.setattr(tp, "get_fut_val", lambda: fetched.append(1) or FUT_VAL)
+    monkeypatch.setattr(tp, "HORIZON", 12)
+
+    predictor = tp.TemperaturePredictor(
+        window_predictor=WindowPredictor(
+            model=small_model(),
+            input_width=24,
+            label_width=8,
+            shift=8,
+            column_indices={c: i for i, c in enumerate(COLUMNS)},
+            label_columns=LABELS,
+        ),
+        postprocess_pipelines=object(),
+        x_scaler=StandardScaler().fit(rng.normal(size=(50, len(COLUMNS)))),
+        y_scaler=StandardScaler().fit(rng.normal(size=(50, len(LABELS)))),
+    )
+    predictor.fetched = fetched
+    return predictor
+
+
+def test_temperature_predictor_igual_que_bucle_original(predictor):
+    parameters = entry_list(np.random.default_rng(3))
+
+    result = predictor.predict(parameters, fut_val=FUT_VAL)
+    expected = legacy_predict(
+        predictor._predictor.model, parameters,
+        predictor._x_scaler, predictor._y_scaler, FUT_VAL, START, 12,
+    )
+
+    np.testing.assert_allclose(result.values, expected.values, rtol=1e-4, atol=1e-4)
+
+
+def test_predict_batch_igual_que_predicciones_sueltas(predictor):
+    """
+    Cada escenario del lote debe dar lo mismo que ejecutado solo, y un
+    escenario vacío lo mismo que predict().
+    """
+    parameters = entry_list(np.random.default_rng(4))
+    scenarios = [{}, {"mode": 1.0}, {"mode": -1.0, "reset_hot": 0.5}]
+
+    results = predictor.predict_batch(parameters, scenarios, fut_val=FUT_VAL)
+
+    assert len(results) == len(scenarios)
+    np.testing.assert_allclose(
+        results[0].values,
+        predictor.predict(parameters, fut_val=FUT_VAL).values,
+        rtol=1e-4,
+        atol=1e-4,
+    )
+    for scenario, result in zip(scenarios, results):
+        expected = predictor.predict_batch(parameters, [scenario], fut_val=FUT_VAL)[0]
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-4, atol=1e-4)
+    assert not np.allclose(results[1].values, results[2].values)
+
+
+def test_predict_batch_acepta_planes_paso_a_paso(predictor):
+    parameters = entry_list(np.random.default_rng(5))
+    plan = [1.0] * 6 + [-1.0] * 6
+
+    on, off = predictor.predict_batch(
+        parameters, [{"mode": plan}, {"mode": 1.0}], fut_val=FUT_VAL
+    )
+
+    # Las primeras predicciones solo dependen de los pasos comunes
+    np.testing.assert_allclose(on.values[:2], off.values[:2], rtol=1e-4, atol=1e-4)
+    assert not np.allclose(on.values, off.values)
+
+
+def test_sin_prevision_solo_se_pide_si_se_dice(predictor):
+    parameters = entry_list(np.random.default_rng(6))
+
+    with pytest.raises(ValueError):
+        predictor.predict(parameters)
+    with pytest.raises(ValueError):
+        predictor.predict_batch(parameters, [{}])
+    assert predictor.fetched == []
+
+    result = predictor.predict(parameters, fetch_forecast=True)
+
+    assert predictor.fetched == [1]
+    np.testing.assert_allclose(
+        result.values, predictor.predict(parameters, fut_val=FUT_VAL).values, rtol=1e-4, atol=1e-4
+    )
@@ -0,0 +1,59 @@
+# test_scaling.py
+#
+# Tests de los escaladores como transformaciones afines:
+#  - Affine da lo mismo que transform / inverse_transform de sklearn.
+#  - Un escalador no afín se rechaza.
+#  - ScaledModel equivale a escalar, llamar al modelo y desescalar.
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler, PowerTransformer, StandardScaler
+
+from api.rce_predictors.scaling import Affine, ScaledModel
+
+
+@pytest.mark.parametrize("scaler_class", [StandardScaler, MinMaxScaler])
+def test_affine_igual_que_sklearn(scaler_class):
+    rng = np.random.default_rng(0)
+    scaler = scaler_class().fit(rng.normal(5.0, 3.0, size=(40, 4)))
+    x = rng.normal(5.0, 3.0, size=(10, 4))
+
+    affine = Affine.from_scaler(scaler)
+
+    np.testing.assert_allclose(affine.forward(x), scaler.transform(x), rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(affine.inverse(scaler.transform(x)), x, rtol=1e-5, atol=1e-4)
+
+
+def test_escalador_no_afin():
+    scaler = PowerTransformer().fit(np.random.default_rng(1).uniform(1, 10, size=(40, 2)))
+
+    with pytest.raises(ValueError):
+        Affine.from_scaler(scaler)
+
+
+def test_cambio_de_espacio_entre_escaladores():
+    rng = np.random.default_rng(2)
+    x_scaler = StandardScaler().fit(rng.normal(size=(40, 3)))
+    y_scaler = StandardScaler().fit(rng.normal(2.0, 5.0, size=(40, 2)))
+    y_scaled = rng.normal(size=(6, 2))
+
+    feedback = Affine.from_scaler(x_scaler).select([0, 2]).after_inverse(Affine.from_scaler(y_scaler))
+
+    raw = y_scaler.inverse_transform(y_scaled)
+    expected = (raw - x_scaler.mean_[[0, 2]]) / x_scaler.scale_[[0, 2]]
+    np.testing.assert_allclose(feedback.forward(y_scaled), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_scaled_model():
+    rng = np.random.default_rng(3)
+    x_scaler = StandardScaler().fit(rng.normal(size=(40, 3)))
+    y_scaler = StandardScaler().fit(rng.normal(size=(40, 3)))
+    x = rng.normal(size=(5, 3))
+
+    def model(x_scaled, training=False):
+        return 2 * x_scaled
+
+    scaled = ScaledModel(model, Affine.from_scaler(x_scaler), Affine.from_scaler(y_scaler))
+
+    expected = y_scaler.inverse_transform(2 * x_scaler.transform(x))
+    np.testing.assert_allclose(scaled(x), expected, rtol=1e-5, atol=1e-5)
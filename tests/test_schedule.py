@@ -0,0 +1,109 @@
+# test_schedule.py
+#
+# Tests del horario de franjas de 15 minutos (temp_mode):
+#  - active() devuelve el inicio y los modos de la franja que cubre el instante.
+#  - Las franjas que no empiezan en un cuarto de hora conservan su inicio real:
+#    no se activan antes de tiempo.
+#  - Las franjas pasadas se descartan al consultar.
+#  - Los planes de calor y de frío de una misma franja conviven: active() los
+#    devuelve todos y get_decision ejecuta el del plan de la demanda objetivo,
+#    aunque el otro se haya planificado después.
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import sc.main as main
+from sc.utils.schedule import SlotSchedule
+
+HOT, COLD = 1, 0
+T0 = datetime(2025, 1, 1, 12, 0)
+
+
+def test_franja_que_contiene_el_instante():
+    schedule = SlotSchedule(15)
+    schedule.add([T0, T0 + timedelta(minutes=30)], HOT)
+    assert schedule[T0] == HOT
+    assert T0 + timedelta(minutes=35) in schedule
+
+    assert schedule.active(T0 + timedelta(minutes=14, seconds=59)) == (T0, [HOT])
+    assert schedule.active(T0 + timedelta(minutes=15)) is None
+    assert schedule.active(T0 + timedelta(minutes=44)) == (T0 + timedelta(minutes=30), [HOT])
+
+
+def test_franjas_pasadas_se_descartan():
+    schedule = SlotSchedule(15)
+    schedule.add([T0 + timedelta(minutes=15 * k) for k in range(96)], COLD)
+    assert len(schedule) == 96
+
+    assert schedule.active(T0 + timedelta(hours=6, minutes=1)) == (T0 + timedelta(hours=6), [COLD])
+    assert len(schedule) == 96 - 24
+    assert T0 not in schedule
+
+    # Sin plan vigente también se descartan
+    assert schedule.active(T0 + timedelta(days=2)) is None
+    assert len(schedule) == 0
+
+
+def test_calor_y_frio_conviven():
+    schedule = SlotSchedule(15)
+    schedule.add([T0, T0 + timedelta(minutes=15)], HOT)
+    schedule.add([T0 + timedelta(minutes=15), T0 + timedelta(minutes=30)], COLD)
+
+    assert schedule.active(T0 + timedelta(minutes=5)) == (T0, [HOT])
+    assert schedule.modes_at(T0 + timedelta(minutes=20)) == [HOT, COLD]
+    assert schedule.active(T0 + timedelta(minutes=20)) == (T0 + timedelta(minutes=15), [HOT, COLD])
+
+    # Volver a planificar calor en la franja lo pasa al final sin perder el frío
+    schedule.add([T0 + timedelta(minutes=15)], HOT)
+    assert schedule.modes_at(T0 + timedelta(minutes=15)) == [COLD, HOT]
+    assert schedule.active(T0 + timedelta(minutes=16)) == (T0 + timedelta(minutes=15), [COLD, HOT])
+
+
+def test_franjas_no_alineadas():
+    schedule = SlotSchedule(15)
+    first, second = T0 + timedelta(minutes=7), T0 + timedelta(minutes=22)
+    schedule.add([first, second], HOT)
+
+    # Redondeando al cuarto de hora el plan se activaba a las 12:00
+    assert schedule.active(T0 + timedelta(minutes=6, seconds=59)) is None
+    assert schedule.active(first) == (first, [HOT])
+    assert schedule.active(T0 + timedelta(minutes=21, seconds=59)) == (first, [HOT])
+    # La franja de las 12:22 empieza en el cuarto anterior al de las 12:30
+    assert schedule.active(T0 + timedelta(minutes=31)) == (second, [HOT])
+    assert len(schedule) == 1
+    assert schedule.active(T0 + timedelta(minutes=37)) is None
+    assert len(schedule) == 0
+
+
+@pytest.mark.parametrize("demand_mode, expected", [(HOT, "hot"), (COLD, "cold")])
+def test_get_decision_con_calor_y_frio_solapados(monkeypatch, tmp_path, demand_mode, expected):
+    """
+    Un plan de calor y otro de frío cubren la misma franja: se ejecuta el del
+    plan de la demanda objetivo, no el último planificado.
+    """
+    now = T0 + timedelta(minutes=5)
+
+    class FixedDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+
+    schedule = SlotSchedule(15)
+    schedule.add([T0], HOT)
+    schedule.add([T0], COLD)
+    frame = T0.isoformat(timespec="seconds")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "datetime", FixedDateTime)
+    monkeypatch.setattr(main, "get_last_data_from_db", lambda: {})
+    monkeypatch.setattr(main, "temp_mode", schedule)
+    monkeypatch.setattr(main, "prod_data", {"hot": {frame: 1e9}, "cold": {frame: 0.0}})
+    monkeypatch.setattr(main, "dem_data", {"hot_dem": {}, "cold_dem": {}})
+    monkeypatch.setattr(main, "total_predicted_production", 1e9)
+    monkeypatch.setattr(main, "current_dem_target", 1e12)
+    monkeypatch.setattr(main, "current_dem_mode", demand_mode)
+
+    main.get_decision()
+
+    assert main.mode == expected
+    assert main.action == (1 if expected == "hot" else 0)
@@ -0,0 +1,66 @@
+# test_stages.py
+#
+# Tests del grafo de etapas de /predict:
+#  - Las etapas independientes se ejecutan a la vez.
+#  - Cada etapa recibe los resultados de las que la preceden.
+#  - Un error en una etapa se propaga.
+
+import asyncio
+import time
+
+import pytest
+
+from api.utils.stages import StageGraph
+
+
+def slow(value, seconds=0.3):
+    def fn(*_):
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+def test_etapas_independientes_en_paralelo():
+    graph = (
+        StageGraph()
+        .add("rain", slow("r"))
+        .add("temperature", slow("t"))
+        .add("demand", slow("d"))
+    )
+
+    start = time.perf_counter()
+    results = asyncio.run(graph.run())
+
+    # En serie serían 0.9s
+    assert time.perf_counter() - start < 0.7
+    assert results == {"rain": "r", "temperature": "t", "demand": "d"}
+    assert set(graph.timings) == {"rain", "temperature", "demand"}
+
+
+def test_dependencias_reciben_resultados():
+    async def forecasts():
+        return 2
+
+    graph = (
+        StageGraph()
+        .add("forecasts", forecasts)
+        .add("temperature", lambda f: f * 10, after=("forecasts",))
+        .add("production", lambda f, t: f + t, after=("forecasts", "temperature"))
+    )
+
+    assert asyncio.run(graph.run())["production"] == 22
+
+
+def test_error_en_una_etapa_se_propaga():
+    def fail(_):
+        raise RuntimeError("modelo no cargado")
+
+    graph = StageGraph().add("forecasts", slow(1, 0)).add("temperature", fail, after=("forecasts",))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(graph.run())
+
+
+def test_dependencia_desconocida():
+    with pytest.raises(ValueError):
+        StageGraph().add("production", lambda t: t, after=("temperature",))
@@ -0,0 +1,68 @@
+# test_structure_columnar.py
+#
+# Tests del formato de respuesta columnar:
+#  - Contiene los mismos valores que el formato legacy (strings por instante).
+#  - Se serializa igual con orjson y con json de la librería estándar.
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from api.utils.out import encoding, structure
+
+LABELS = ["cold", "hot"]
+COLUMN_INFO = {"cold": 0, "hot": 1}
+FUTURE = structure.future_times("2025-06-01 10:00", 192)
+
+
+def predictions(rng):
+    return pd.DataFrame(rng.normal(30, 5, size=(192, 2)), columns=LABELS)
+
+
+def test_temp_columnar_igual_que_legacy():
+    t_pred = predictions(np.random.default_rng(0))
+
+    legacy = structure.temp(t_pred, FUTURE, COLUMN_INFO, LABELS)
+    columnar = structure.temp_columnar(t_pred, FUTURE, COLUMN_INFO, LABELS)
+
+    for k in ["hot", "cold"]:
+        assert [float(v) for v in legacy[k].values()] == columnar[k]
+        assert list(legacy[k]) == FUTURE
+
+
+def test_prod_columnar_igual_que_legacy():
+    p_pred = predictions(np.random.default_rng(1)).round(2)
+
+    legacy = structure.prod(p_pred, FUTURE, LABELS)
+    columnar = structure.prod_columnar(p_pred, FUTURE, LABELS)
+
+    for k in LABELS:
+        assert [float(v) for v in legacy[k].values()] == columnar[k]
+
+
+def test_frame_columnar():
+    d_pred = pd.DataFrame(
+        {"demand": [1.5, 2.5]},
+        index=[pd.Timestamp("2025-06-01 10:00"), pd.Timestamp("2025-06-01 11:00")],
+    )
+
+    assert structure.frame_columnar(d_pred) == {
+        "timestamps": ["2025-06-01 10:00:00", "2025-06-01 11:00:00"],
+        "demand": [1.5, 2.5],
+    }
+
+
+def test_serializacion_con_y_sin_orjson(monkeypatch):
+    content = {
+        "info": {
+            "timestamps": FUTURE[:3],
+            "tank-temperature": {"hot": [40.25, 41.0, 41.5]},
+        }
+    }
+
+    fast = json.loads(encoding.dumps(content))
+    monkeypatch.setattr(encoding, "orjson", None)
+    fallback = json.loads(encoding.dumps(content))
+
+    assert fast == fallback == content
@@ -0,0 +1,118 @@
+# test_tail_reader.py
+#
+# Tests del lector incremental de los CSV de WinCC:
+#  - Cada poll() solo lee los bytes añadidos desde el anterior.
+#  - Una línea a medio escribir se incorpora una sola vez, cuando está completa.
+#  - Rotación y truncado vuelven a empezar sin repetir muestras.
+#  - El buffer por VarName está acotado.
+#  - last() da lo mismo que build_var_dict_from_names sobre el CSV completo.
+
+import os
+
+import pandas as pd
+import pytest
+
+from sc.utils.read_data import build_var_dict_from_names, safe_float
+from sc.utils.tail_reader import CsvTailReader
+
+HEADER = '"VarName";"TimeString";"VarValue";"Validity";"Time_ms"\n'
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def row(var, i, value=None):
+    value = f"{i},5" if value is None else value
+    return f'"{var}";"10/11/2025 0:{i:02d}:57";{value};1;4597100{i:04d},25\n'
+
+
+def write(path, text, mode="a"):
+    with open(path, mode, encoding="latin-1", newline="") as f:
+        f.write(text)
+
+
+def test_solo_se_leen_las_filas_nuevas(tmp_path):
+    path = tmp_path / "Lecturas0.csv"
+    write(path, HEADER + "".join(row(v, i) for i in range(10) for v in ("TempT9_RCEa", "TempT6_RCEa")), "w")
+    reader = CsvTailReader(str(path))
+
+    assert reader.poll() == 20
+    assert reader.poll() == 0
+
+    appended = row("TempT9_RCEa", 10) + row("TempT6_RCEa", 10)
+    before = reader.bytes_read
+    write(path, appended)
+
+    assert reader.poll() == 2
+    assert reader.bytes_read - before == len(appended.encode("latin-1"))
+    samples = reader.samples("TempT9_RCEa")
+    assert [s[2] for s in samples[-2:]] == [9.5, 10.5]
+
+
+def test_linea_a_medio_escribir(tmp_path):
+    path = tmp_path / "Solarimeter0.csv"
+    write(path, HEADER + row("IO_SENSOR1_DATA_RCEa", 0), "w")
+    reader = CsvTailReader(str(path))
+    reader.poll()
+
+    line = row("IO_SENSOR1_DATA_RCEa", 1, "812,25")
+    write(path, line[:20])
+    assert reader.poll() == 0
+
+    # Línea con todas las columnas pero sin salto de línea: provisional
+    write(path, line[20:-3])
+    assert reader.poll() == 1
+    write(path, line[-3:] + row("IO_SENSOR1_DATA_RCEa", 2))
+    reader.poll()
+
+    samples = reader.samples("IO_SENSOR1_DATA_RCEa")
+    assert [s[2] for s in samples] == [0.5, 812.25, 2.5]
+    assert samples[1][0] == 45971000001.25
+
+
+@pytest.mark.parametrize("rotate", [False, True])
+def test_rotacion_y_truncado(tmp_path, rotate):
+    path = tmp_path / "Pyrgeometer0.csv"
+    write(path, HEADER + "".join(row("E_FIR", i) for i in range(5)), "w")
+    reader = CsvTailReader(str(path))
+    reader.poll()
+
+    if rotate:
+        os.rename(path, tmp_path / "Pyrgeometer0.old.csv")
+    # El fichero nuevo repite las dos últimas muestras y añade una
+    write(path, HEADER + "".join(row("E_FIR", i) for i in range(3, 6)), "w")
+
+    assert reader.poll() == 1
+    assert reader.resets == 1
+    assert [s[2] for s in reader.samples("E_FIR")] == [i + 0.5 for i in range(6)]
+
+
+def test_buffer_acotado(tmp_path):
+    path = tmp_path / "Lecturas0.csv"
+    write(path, HEADER + "".join(row("TempT9_RCEa", i) for i in range(50)), "w")
+    reader = CsvTailReader(str(path), maxlen=8)
+    reader.poll()
+
+    samples = reader.samples("TempT9_RCEa")
+    assert len(samples) == 8
+    assert samples[-1][2] == 49.5
+
+
+@pytest.mark.parametrize(
+    "name, varnames",
+    [
+        ("lect_test.csv", ["TempT9_RCEa"]),
+        ("lect_test.csv", ["TempT6_RCEa", "TempT6_RCEa_v2"]),
+        ("solar_test.csv", ["IO_SENSOR1_DATA_RCEa"]),
+        ("ir_test.csv", ["E_FIR, neto, [W/m2]_RCEb"]),
+    ],
+)
+def test_igual_que_build_var_dict(name, varnames):
+    path = os.path.join(DATA, name)
+    df = pd.read_csv(path, sep=";", encoding="latin-1", low_memory=False)
+    reader = CsvTailReader(path)
+    reader.poll()
+
+    expected = build_var_dict_from_names(df, varnames, n_samples=24)
+    result = reader.last(varnames, n_samples=24)
+
+    assert list(result) == list(expected)
+    assert list(result.values()) == [safe_float(v) for v in expected.values()]
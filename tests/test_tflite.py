@@ -0,0 +1,127 @@
+# test_tflite.py
+#
+# Tests del backend TFLite:
+#  - Los modelos convertidos dan lo mismo que Keras (modelos reales y pequeños,
+#    también cuantizados a float16 con una tolerancia mayor).
+#  - TFLiteRollout da lo mismo que RolloutEngine, también con varios escenarios.
+#  - El registro elige el backend según la configuración.
+
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+tf = pytest.importorskip("tensorflow")
+
+from api.rce_predictors import registry as reg
+from api.rce_predictors.rollout import RolloutEngine
+from api.rce_predictors.scaling import Affine
+from api.rce_predictors.tflite import TFLiteModel, TFLiteRollout, convert, convert_file, tflite_name
+
+
+def lstm_model(n_features=12):
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=(24, n_features)),
+            tf.keras.layers.LSTM(8),
+            tf.keras.layers.Dense(2),
+        ]
+    )
+
+
+def dense_model():
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.Sequential([tf.keras.Input(shape=(10,)), tf.keras.layers.Dense(2)])
+
+
+def test_modelos_reales_misma_salida_que_keras(tmp_path):
+    rng = np.random.default_rng(0)
+    for name in ("modelo.keras", reg.DEMAND_MODEL):
+        keras_path = os.path.join(reg.KERAS_DIR, name)
+        model = tf.keras.models.load_model(keras_path, compile=False)
+        lite = TFLiteModel(convert_file(keras_path, str(tmp_path / tflite_name(name))))
+
+        shape = (3,) + tuple(model.input_shape[1:])
+        x = rng.normal(size=shape).astype(np.float32)
+
+        np.testing.assert_allclose(lite(x), model(x, training=False).numpy(), atol=1e-5)
+
+
+def test_lotes_con_modelo_de_lote_fijo():
+    model = lstm_model()
+    lite = TFLiteModel(model_content=convert(model))
+    x = np.random.default_rng(1).normal(size=(5, 24, 12)).astype(np.float32)
+
+    assert lite.input_shape == (None, 24, 12)
+    np.testing.assert_allclose(lite(x), model(x, training=False).numpy(), atol=1e-5)
+
+
+def test_float16_dentro_de_tolerancia():
+    model = dense_model()
+    lite = TFLiteModel(model_content=convert(model, quantize="float16"))
+    x = np.random.default_rng(2).normal(size=(24, 10)).astype(np.float32)
+
+    np.testing.assert_allclose(lite(x), model(x, training=False).numpy(), atol=1e-2)
+
+
+def test_cuantizacion_desconocida():
+    with pytest.raises(ValueError):
+        convert(dense_model(), quantize="int4")
+
+
+def test_rollout_tflite_igual_que_rollout_engine():
+    model = lstm_model()
+    lite = TFLiteModel(model_content=convert(model))
+    rng = np.random.default_rng(3)
+    window = rng.normal(size=(3, 24, 12)).astype(np.float32)
+    exogenous = rng.normal(size=(3, 16, 12)).astype(np.float32)
+
+    scalers = {
+        "x_affine": Affine(scale=rng.uniform(0.5, 2, 12).astype(np.float32), offset=rng.normal(size=12).astype(np.float32)),
+        "y_affine": Affine(scale=np.float32([0.5, 2.0]), offset=np.float32([1.0, -1.0])),
+    }
+
+    expected = RolloutEngine(model, label_indices=[0, 1], n_features=12, **scalers).predict(window, exogenous)
+    result = TFLiteRollout(lite, label_indices=[0, 1], n_features=12, **scalers).predict(window, exogenous)
+
+    assert result.shape == (3, 16, 2)
+    np.testing.assert_allclose(result, expected, atol=1e-4)
+
+
+@pytest.fixture
+def keras_dir(tmp_path):
+    """
+    Carpeta con el modelo de demanda en Keras y en TFLite y sus escaladores.
+    """
+    model = dense_model()
+    model.save(tmp_path / reg.DEMAND_MODEL)
+    convert_file(str(tmp_path / reg.DEMAND_MODEL))
+
+    rng = np.random.default_rng(0)
+    joblib.dump(StandardScaler().fit(rng.normal(size=(20, 10))), tmp_path / "dem_x_scaler.pkl")
+    joblib.dump(StandardScaler().fit(rng.normal(size=(20, 2))), tmp_path / "dem_y_scaler.pkl")
+    return tmp_path
+
+
+def test_registro_elige_backend(keras_dir):
+    registry = reg.ModelRegistry(keras_dir=str(keras_dir))
+
+    keras_demand = registry.demand({"filepath": "x"})
+    lite_demand = registry.demand({"filepath": "x", "backend": "tflite"})
+
+    assert not isinstance(keras_demand._model, TFLiteModel)
+    assert isinstance(lite_demand._model, TFLiteModel)
+    assert "modelo_dem_fin.tflite" in registry.stats()
+
+    with pytest.raises(ValueError):
+        registry.demand({"backend": "onnx"})
+
+
+def test_registro_sin_fichero_tflite(tmp_path):
+    registry = reg.ModelRegistry(keras_dir=str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        registry.backend_model("modelo.keras", {"backend": "tflite"})
@@ -0,0 +1,69 @@
+# test_var_store.py
+#
+# Tests del almacén columnar por VarName:
+#  - Los decimales con coma de WinCC se convierten de golpe a float64.
+#  - last() da lo mismo que build_var_dict_from_names sobre el CSV completo.
+#  - value_at() busca la última muestra en o antes de un instante.
+#  - from_frame() y from_columns() ordenan cada variable por Time_ms.
+
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sc.utils.read_data import build_var_dict_from_names, safe_float
+from sc.utils.var_store import VarStore, parse_decimal, wincc_time
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def test_parse_decimal():
+    values = parse_decimal(["8,362811", "-4,340278E-04", 0, "", "abc", 12.5])
+
+    assert values.dtype == np.float64
+    assert values[:2].tolist() == [8.362811, -4.340278e-04]
+    assert values[2] == 0.0
+    assert math.isnan(values[3]) and math.isnan(values[4])
+    assert values[5] == 12.5
+
+
+@pytest.mark.parametrize(
+    "name, varnames",
+    [
+        ("lect_test.csv", ["TempT9_RCEa"]),
+        ("lect_test.csv", ["TempT6_RCEa", "TempT6_RCEa_v2"]),
+        ("solar_test.csv", ["IO_SENSOR1_DATA_RCEa"]),
+        ("ir_test.csv", ["E_FIR, neto, [W/m2]_RCEb"]),
+    ],
+)
+def test_igual_que_build_var_dict(name, varnames):
+    df = pd.read_csv(os.path.join(DATA, name), sep=";", encoding="latin-1", low_memory=False)
+    store = VarStore.from_frame(df)
+
+    expected = build_var_dict_from_names(df, varnames, n_samples=24)
+    result = store.last(varnames, n_samples=24)
+
+    assert list(result) == list(expected)
+    assert list(result.values()) == [safe_float(v) for v in expected.values()]
+
+
+def test_orden_por_tiempo_y_value_at():
+    store = VarStore.from_columns(
+        ["A", "B", "A", "A"],
+        ["t2", "t1", "t0", "t1"],
+        ["2,5", "7", "0,5", "1,5"],
+        [wincc_time(datetime(2025, 11, 10, 0, m)) for m in (2, 1, 0, 1)],
+    )
+
+    assert store.varnames() == ["A", "B"]
+    assert store.series("A").labels.tolist() == ["t0", "t1", "t2"]
+    assert store.last("A", n_samples=2, step_every=1) == {"t1": 1.5, "t2": 2.5}
+
+    assert store.value_at("A", datetime(2025, 11, 10, 0, 1, 30)) == 1.5
+    assert store.value_at("A", wincc_time(datetime(2025, 11, 10, 0, 2))) == 2.5
+    assert math.isnan(store.value_at("A", datetime(2025, 11, 9)))
+    assert math.isnan(store.value_at("C", datetime(2025, 11, 10)))
+    assert store.last("C") == {}
@@ -0,0 +1,124 @@
+# test_warmup.py
+#
+# Tests del arranque de la API:
+#  - El calentamiento pasa por temperatura, demanda y producción sin red.
+#  - Readiness pasa de "starting" a "ready" (o "failed" si el arranque falla).
+#  - El perfil de importaciones registra el tiempo de cada módulo nuevo.
+#  - Importar api.main perfila sus importaciones y deja builtins.__import__ como
+#    estaba; con PROFILE_IMPORTS=1 el perfil lista todos los módulos.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from api.rce_predictors.future.open import FEATURES_24H
+from api.rce_predictors.warmup import Readiness, warm_up
+from api.utils.profiling import ImportProfiler
+
+RUN_CONFIG = {
+    "temperature": {"input": 24, "labels": ["cold", "hot"]},
+    "demand": {"filepath": "unused"},
+    "rce-specs": {"volume_cold": 0.05, "volume_hot": 0.15},
+}
+
+
+class FakeTemperature:
+    def __init__(self):
+        self.x_scaler = StandardScaler().fit(np.random.default_rng(0).normal(size=(20, 12)))
+        self.calls = []
+
+    def predict(self, parameters, fut_val=None):
+        self.calls.append((parameters, fut_val))
+        return pd.DataFrame(np.full((192, 2), 30.0), columns=["cold", "hot"])
+
+
+class FakeDemand:
+    def __init__(self):
+        self.forecasts = []
+
+    def predict(self, forecast=None):
+        self.forecasts.append(forecast)
+        return pd.DataFrame()
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.temperature_predictor = FakeTemperature()
+        self.demand_predictor = FakeDemand()
+
+    def temperature(self, config):
+        return self.temperature_predictor
+
+    def demand(self, config=None):
+        return self.demand_predictor
+
+
+def test_warm_up_recorre_todas_las_etapas_sin_red():
+    registry = FakeRegistry()
+
+    timings = warm_up(registry, RUN_CONFIG)
+
+    assert set(timings) == {"temperature", "demand", "production"}
+    parameters, fut_val = registry.temperature_predictor.calls[0]
+    assert len(parameters.data) == 24
+    assert fut_val is not None  # no se pide la previsión real
+    forecast = registry.demand_predictor.forecasts[0]
+    assert list(forecast.columns) == FEATURES_24H and len(forecast) == 24
+
+
+def test_readiness():
+    readiness = Readiness()
+    assert readiness.status == "starting"
+
+    readiness.run(lambda: {"startup_seconds": 1.0}).join()
+    assert readiness.ready and readiness.status == "ready"
+    assert readiness.profile == {"startup_seconds": 1.0}
+
+    def fail():
+        raise OSError("modelo no encontrado")
+
+    failed = Readiness()
+    failed.run(fail).join()
+    assert not failed.wait(timeout=0)
+    assert failed.status == "failed"
+
+
+def test_perfil_de_importaciones(tmp_path, monkeypatch):
+    (tmp_path / "modulo_lento.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    profiler = ImportProfiler()
+
+    profiler.install()
+    try:
+        import modulo_lento  # noqa: F401
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("modulo_lento", None)
+
+    assert profiler.times["modulo_lento"] >= 0.05
+    assert "modulo_lento" in profiler.slowest()
+
+
+@pytest.mark.parametrize("flag, verbose", [(None, False), ("1", True)])
+def test_perfil_de_importaciones_en_cada_arranque(flag, verbose):
+    env = {k: v for k, v in os.environ.items() if k != "PROFILE_IMPORTS"}
+    if flag is not None:
+        env["PROFILE_IMPORTS"] = flag
+    code = (
+        "import builtins; original = builtins.__import__; import api.main; "
+        "from api.utils.profiling import IMPORT_SUMMARY, import_profiler as p; "
+        "s = p.summary(); "
+        "print(builtins.__import__ is original, len(p.times) > IMPORT_SUMMARY, s['total'] > 0, "
+        "len(s['slowest']) > IMPORT_SUMMARY)"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    proc = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True, check=True)
+
+    assert proc.stdout.split()[-4:] == ["True", "True", "True", str(verbose)]